@@ -4,7 +4,7 @@ from django.template.loader import render_to_string
 
 from tablib import Dataset
 
-from ..models import FormSubmission, Webhook
+from ..models import ArchiveSegment, FieldAnswerCount, FormSubmission, SpamCounter, SubmissionStatistics, Webhook
 from .base import BaseFormSubmissionAdmin
 from .forms import WebhookAdminForm
 from .views import FormExportWizardView
@@ -44,5 +44,57 @@ class WebhookAdmin(admin.ModelAdmin):
         return super().changeform_view(request, object_id, form_url, extra_context)
 
 
+class SpamCounterAdmin(admin.ModelAdmin):
+    date_hierarchy = 'day'
+    list_display = ['name', 'day', 'hits']
+    list_filter = ['name']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class ArchiveSegmentAdmin(admin.ModelAdmin):
+    date_hierarchy = 'month'
+    list_display = ['name', 'month', 'count', 'compression', 'path', 'created_at', 'completed_at']
+    list_filter = ['name']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class SubmissionStatisticsAdmin(admin.ModelAdmin):
+    date_hierarchy = 'day'
+    list_display = ['name', 'day', 'language', 'total', 'spam', 'pending']
+    list_filter = ['name', 'language']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class FieldAnswerCountAdmin(admin.ModelAdmin):
+    list_display = ['name', 'field_id', 'value', 'count']
+    list_filter = ['name']
+    search_fields = ['field_id', 'value']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(ArchiveSegment, ArchiveSegmentAdmin)
+admin.site.register(FieldAnswerCount, FieldAnswerCountAdmin)
 admin.site.register(FormSubmission, FormSubmissionAdmin)
+admin.site.register(SpamCounter, SpamCounterAdmin)
+admin.site.register(SubmissionStatistics, SubmissionStatisticsAdmin)
 admin.site.register(Webhook, WebhookAdmin)
@@ -1,17 +1,23 @@
 import re
+from copy import copy
 from email.utils import formataddr
-from typing import Callable
+from functools import lru_cache
+from typing import Callable, Optional
 from urllib.parse import urlencode
 
 from django import forms
 from django.conf import settings
 from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.sites.models import Site
+from django.core.signals import setting_changed
 from django.db.models.query import QuerySet
-from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, JsonResponse
+from django.dispatch import receiver
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, JsonResponse, QueryDict
 from django.template.loader import render_to_string
 from django.template.response import TemplateResponse
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.encoding import force_str
 from django.utils.module_loading import import_string
 from django.utils.text import slugify
@@ -21,13 +27,40 @@ from import_export.fields import Field
 from import_export.resources import Resource
 
 from ..api.webhook import collect_submissions_data, send_submissions_data
-from ..models import FormSubmission, Webhook
+from ..compression import search_compressed
+from ..constants import ALDRYN_FORMS_SUBMISSION_LIST_DISPLAY_FIELD
+from ..models import FormSubmission, FormSubmissionBase, Webhook, prefetch_form_data
+from .large_table import EstimatedCountPaginator, FormNameListFilter, get_large_table_settings
+from .selection import iter_chunks, load_selection, store_selection
 from .utils import PrettyJsonEncoder
 
 
 str_dunder_method = '__str__'
 
 
+@lru_cache(maxsize=None)
+def get_list_display_field() -> Optional[Callable[[FormSubmissionBase], str]]:
+    """Get the callable rendering the column of data in the list of submissions. It is imported only once."""
+    path = getattr(settings, ALDRYN_FORMS_SUBMISSION_LIST_DISPLAY_FIELD, None)
+    return None if path is None else import_string(path)
+
+
+@receiver(setting_changed, dispatch_uid='aldryn_forms_list_display_field')
+def reset_list_display_field(setting, **kwargs):
+    if setting == ALDRYN_FORMS_SUBMISSION_LIST_DISPLAY_FIELD:
+        get_list_display_field.cache_clear()
+
+
+class SubmissionChangeList(ChangeList):
+    """Changelist decoding the data of the page at once for the column of data."""
+
+    def get_results(self, request):
+        super().get_results(request)
+        if get_list_display_field() is not None:
+            self.result_list = list(self.result_list)
+            prefetch_form_data(self.result_list)
+
+
 class FieldKey:
     """Field key is pair of names - parent, child."""
 
@@ -49,7 +82,6 @@ class AldrynFormExportField(Field):
 
 
 class BaseFormSubmissionAdmin(admin.ModelAdmin):
-    date_hierarchy = 'sent_at'
     list_display = [
         str_dunder_method, 'sent_at', 'display_honeypot_filled', 'display_post_ident', 'language', 'display_data'
     ]
@@ -61,6 +93,10 @@ class BaseFormSubmissionAdmin(admin.ModelAdmin):
         ("post_ident", admin.BooleanFieldListFilter),
     ]
     search_fields = ["data"]
+    search_help_text = _(
+        "The search matches the stored data by a regular expression. In compact submissions only the values of the "
+        "fields are found, not their names and labels."
+    )
     actions = ["export_webhook", "send_webhook", "honeypot_filled_on", "honeypot_filled_off"]
     readonly_fields = [
         'name',
@@ -99,14 +135,54 @@ class BaseFormSubmissionAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         return False
 
+    # In the mode of large tables the changelist avoids queries scanning the whole table: the date hierarchy and the
+    # filter of names (DISTINCT), and the counts of all records (COUNT).
+
+    @property
+    def date_hierarchy(self):
+        return None if get_large_table_settings() else 'sent_at'
+
+    @property
+    def show_full_result_count(self):
+        return get_large_table_settings() is None
+
+    def get_list_filter(self, request):
+        list_filter = super().get_list_filter(request)
+        if get_large_table_settings() is None:
+            return list_filter
+        replacements = {'name': FormNameListFilter, 'language': ('language', admin.ChoicesFieldListFilter)}
+        return [replacements.get(item, item) if isinstance(item, str) else item for item in list_filter]
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        if get_large_table_settings() is None:
+            return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+        return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if (get_large_table_settings() is not None and self.is_changelist_page(request)
+                and get_list_display_field() is None):  # noqa: W503
+            # The list does not display the data. Actions (POST) read them, so they are not deferred there.
+            queryset = queryset.defer('data', 'recipients')
+        return queryset
+
+    def is_changelist_page(self, request) -> bool:
+        match = request.resolver_match
+        return request.method == "GET" and match is not None and match.url_name == self.get_admin_url('changelist')
+
     def get_search_results(self, request, queryset, search_term):
         queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
         if search_term:
+            pattern = None
             try:
-                re.match(search_term, "")
+                pattern = re.compile(search_term)
                 queryset |= self.model.objects.filter(data__regex=search_term)
             except Exception as err:
                 messages.error(request, err)
+            # The database does not see into the compressed data, so they are decompressed and searched here.
+            matches = search_compressed(self.model.objects.all(), search_term.split(), pattern)
+            if matches:
+                queryset |= self.model.objects.filter(pk__in=matches)
         return queryset, may_have_duplicates
 
     def get_data_for_display(self, obj):
@@ -253,10 +329,13 @@ class BaseFormSubmissionAdmin(admin.ModelAdmin):
 
         return getattr(resource.export(dataset), export_type)
 
+    def get_changelist(self, request, **kwargs):
+        return SubmissionChangeList
+
     @admin.display(description=_("data"))
     def display_data(self, obj) -> str:
-        if hasattr(settings, 'ALDRYN_FORMS_SUBMISSION_LIST_DISPLAY_FIELD'):
-            submission_field = import_string(settings.ALDRYN_FORMS_SUBMISSION_LIST_DISPLAY_FIELD)
+        submission_field = get_list_display_field()
+        if submission_field is not None:
             return submission_field(obj)
         return ''
 
@@ -277,7 +356,9 @@ class BaseFormSubmissionAdmin(admin.ModelAdmin):
         self, request: HttpRequest, submissions: FormSubmission, webhook: Webhook
     ) -> JsonResponse:
         site = Site.objects.first()
-        data = collect_submissions_data(webhook, submissions, site.domain)
+        data = []
+        for chunk in iter_chunks(submissions):
+            data.extend(collect_submissions_data(webhook, chunk, site.domain))
         response = JsonResponse({"data": data}, encoder=PrettyJsonEncoder, json_dumps_params={"ensure_ascii": False})
         filename = f"form-submissions-webhook-{slugify(webhook.name)}.json"
         response["Content-Disposition"] = f"attachment; filename={filename}"
@@ -287,20 +368,38 @@ class BaseFormSubmissionAdmin(admin.ModelAdmin):
         self, request: HttpRequest, submissions: FormSubmission, webhook: Webhook
     ) -> HttpResponseRedirect:
         site = Site.objects.first()
-        send_submissions_data(webhook, submissions, site.domain)
+        for chunk in iter_chunks(submissions):
+            send_submissions_data(webhook, chunk, site.domain)
         messages.success(request, _("Data sending completed."))
         return HttpResponseRedirect(reverse("admin:aldryn_forms_formsubmission_changelist"))
 
+    def get_selected_submissions(self, request: HttpRequest) -> Optional[QuerySet]:
+        """Get submissions of the selection token or of the list of ids. None if nothing is selected."""
+        token = request.GET.get("selection")
+        if token:
+            selection = load_selection(token, request.user.pk)
+            if selection is None:
+                return None
+            if selection["pks"] is not None:
+                return FormSubmission.objects.filter(pk__in=selection["pks"])
+            # All records matching the filters of the changelist were selected.
+            changelist_request = copy(request)
+            changelist_request.GET = QueryDict(selection["params"])
+            return self.get_changelist_instance(changelist_request).get_queryset(changelist_request)
+        ids = request.GET.get("ids")
+        if ids:
+            return FormSubmission.objects.filter(pk__in=ids.split("."))
+        return None
+
     def process_webhook(self, request: HttpRequest, process_fnc: Callable, process_title: str) -> HttpResponse:
-        ids = request.GET.get("ids", "")
-        if not ids:
+        submissions = self.get_selected_submissions(request)
+        if submissions is None:
             messages.warning(
                 request, "Items must be selected in order to perform actions on them. No items have been changed.")
             return HttpResponseRedirect(reverse("admin:aldryn_forms_formsubmission_changelist"))
-        submissions = FormSubmission.objects.filter(pk__in=ids.split("."))
         SelectWebhookForm = self.get_select_webhook_form()
         if request.method == "POST":
-            if submissions.count():
+            if submissions.exists():
                 form = SelectWebhookForm(request.POST)
                 if form.is_valid():
                     webhook = Webhook.objects.get(pk=form.cleaned_data["webhook"])
@@ -313,7 +412,6 @@ class BaseFormSubmissionAdmin(admin.ModelAdmin):
         else:
             form = SelectWebhookForm()
         data = {
-            "ids": ids,
             "form": form,
             "submissins_size": submissions.count(),
             "process_title": process_title,
@@ -327,24 +425,27 @@ class BaseFormSubmissionAdmin(admin.ModelAdmin):
     def webhook_send(self, request: HttpRequest) -> HttpResponse:
         return self.process_webhook(request, self.send_submissions_data, _("Send data via webhook"))
 
-    def process_response_redirect(self, queryset: QuerySet, path_name: str) -> HttpResponseRedirect:
-        selected = queryset.values_list("pk", flat=True)
-        params = urlencode({"ids": ".".join([str(pk) for pk in selected])})
+    def process_response_redirect(
+        self, request: HttpRequest, queryset: QuerySet, path_name: str
+    ) -> HttpResponseRedirect:
+        # The selection is kept on the server, so the URL stays short even if all records are selected.
+        pks = None if request.POST.get("select_across") == "1" else list(queryset.values_list("pk", flat=True))
+        params = urlencode({"selection": store_selection(request.user.pk, request.GET.urlencode(), pks)})
         path = reverse(path_name)
         return HttpResponseRedirect(f"{path}?{params}")
 
     @admin.action(description=_("Export data via webhook"), permissions=['change'])
     def export_webhook(self, request: HttpRequest, queryset: QuerySet) -> HttpResponseRedirect:
-        return self.process_response_redirect(queryset, "admin:webhook_export")
+        return self.process_response_redirect(request, queryset, "admin:webhook_export")
 
     @admin.action(description=_("Send data via webhook"), permissions=['change'])
     def send_webhook(self, request: HttpRequest, queryset: QuerySet) -> HttpResponseRedirect:
-        return self.process_response_redirect(queryset, "admin:webhook_send")
+        return self.process_response_redirect(request, queryset, "admin:webhook_send")
 
     @admin.action(description=_("Set as spam"), permissions=['change'])
     def honeypot_filled_on(self, request: HttpRequest, queryset: QuerySet) -> HttpResponseRedirect:
-        queryset.update(honeypot_filled=True)
+        queryset.update(honeypot_filled=True, updated_at=timezone.now())
 
     @admin.action(description=_("Set not to spam"), permissions=['change'])
     def honeypot_filled_off(self, request: HttpRequest, queryset: QuerySet) -> HttpResponseRedirect:
-        queryset.update(honeypot_filled=False)
+        queryset.update(honeypot_filled=False, updated_at=timezone.now())
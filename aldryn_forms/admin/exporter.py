@@ -1,16 +1,50 @@
+import json
+from itertools import chain
+
 from tablib import Dataset
 
+from ..compression import decompress_text
+from ..models import FormSchema, FormSubmission
+
 
 class Exporter(object):
 
-    def __init__(self, queryset):
+    def __init__(self, queryset, archived=()):
         self.queryset = queryset
+        # Archived submissions are read after the submissions in the database.
+        self.archived = archived
+        self._columns = {}
+
+    def get_submissions(self):
+        return chain(self.queryset.only('data', 'post_ident', 'schema').iterator(), self.archived)
+
+    def get_columns(self, schema_id, fields):
+        """Get positions of the fields in the values of the schema. None for the fields not in the schema."""
+        if schema_id not in self._columns:
+            field_ids = [field.field_id for field in FormSubmission(schema_id=schema_id).get_schema_fields()]
+            self._columns[schema_id] = [
+                field_ids.index(field_id) if field_id in field_ids else None for field_id in fields]
+        return self._columns[schema_id]
+
+    def get_row_from_columns(self, submission, fields):
+        """Read the values of the compact data directly by their positions in the schema."""
+        try:
+            values = json.loads(decompress_text(submission.data))
+        except ValueError:
+            values = []
+        if len(values) != len(FormSchema.get_fields(submission.schema_id)):
+            return [''] * len(fields)
+        return ['' if column is None else values[column] for column in self.get_columns(submission.schema_id, fields)]
 
     def get_dataset(self, fields):
         headers = [field.rpartition('-')[0] for field in fields]
         dataset = Dataset(headers=headers)
 
-        for submission in self.queryset.only('data').iterator():
+        for submission in self.get_submissions():
+            if submission.schema_id is not None and not submission.post_ident:
+                dataset.append(self.get_row_from_columns(submission, fields))
+                continue
+
             row_data = []
             form_fields = [field for field in submission.get_form_data()
                            if field.field_id in fields]
@@ -34,7 +68,7 @@ class Exporter(object):
         # A user can add fields to the form over time,
         # knowing this we use the latest form submission as a way
         # to get the latest form state.
-        submissions = self.queryset.only('data').iterator()
+        submissions = self.get_submissions()
 
         latest_data = next(submissions)
         latest_fields = [field for field in latest_data.get_form_data()
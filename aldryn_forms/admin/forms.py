@@ -11,8 +11,9 @@ from django.utils.translation import gettext_lazy as _
 
 from jsonschema import validate
 
+from ..archive import count_archived_submissions, get_archived_submissions
 from ..constants import TRANSFORM_SCHEMA
-from ..models import FormSubmission
+from ..models import ArchiveSegment, FormSubmission
 from .exporter import Exporter
 from .utils import PrettyJsonEncoder
 
@@ -48,18 +49,25 @@ class BaseFormExportForm(forms.Form):
         label=_('language'),
         choices=settings.LANGUAGES
     )
+    include_archive = forms.BooleanField(
+        label=_('include archive'),
+        required=False,
+        help_text=_('Export also submissions moved into the archive.'),
+    )
 
     def __init__(self, *args, **kwargs):
         super(BaseFormExportForm, self).__init__(*args, **kwargs)
-        self.fields['form_name'].choices = form_choices(modelClass=self.model)
+        choices = set(form_choices(modelClass=self.model)) | set(form_choices(modelClass=ArchiveSegment))
+        self.fields['form_name'].choices = sorted(choices)
 
     def clean(self):
         if self.errors:
             return self.cleaned_data
 
         queryset = self.get_queryset()
+        count = queryset.count() + self.count_archived_submissions()
 
-        if queryset.count() >= self.excel_limit:
+        if count >= self.excel_limit:
             error_message = _("Export failed! More than 65,536 entries found, exceeded Excel limitation!")
             raise forms.ValidationError(error_message)
 
@@ -78,25 +86,54 @@ class BaseFormExportForm(forms.Form):
             filename = '{}.{}'.format(filename, extension)
         return filename
 
-    def get_queryset(self):
+    def get_date_range(self):
         data = self.cleaned_data
         from_date, to_date = data.get('from_date'), data.get('to_date')
+        lower = upper = None
+
+        if from_date:
+            lower = datetime(*from_date.timetuple()[:6])  # inclusive
+
+        if to_date:
+            upper = datetime(*to_date.timetuple()[:6]) + timedelta(days=1)  # exclusive
+
+        return lower, upper
+
+    def get_queryset(self):
+        data = self.cleaned_data
+        lower, upper = self.get_date_range()
 
         queryset = self.model.objects.filter(
             name=data['form_name'],
             language=data['language'],
         )
 
-        if from_date:
-            lower = datetime(*from_date.timetuple()[:6])  # inclusive
+        if lower:
             queryset = queryset.filter(sent_at__gte=lower)
 
-        if to_date:
-            upper = datetime(*to_date.timetuple()[:6]) + timedelta(days=1)  # exclusive
+        if upper:
             queryset = queryset.filter(sent_at__lt=upper)
 
         return queryset
 
+    def get_archive_date_range(self):
+        return tuple(
+            timezone.make_aware(value) if value and settings.USE_TZ else value for value in self.get_date_range())
+
+    def get_archived_submissions(self):
+        data = self.cleaned_data
+        if not data.get('include_archive'):
+            return iter(())
+        lower, upper = self.get_archive_date_range()
+        return get_archived_submissions(data['form_name'], data['language'], lower, upper)
+
+    def count_archived_submissions(self):
+        data = self.cleaned_data
+        if not data.get('include_archive'):
+            return 0
+        lower, upper = self.get_archive_date_range()
+        return count_archived_submissions(data['form_name'], data['language'], lower, upper)
+
 
 class FormSubmissionExportForm(BaseFormExportForm):
     model = FormSubmission
@@ -112,9 +149,10 @@ class FormExportStep2Form(forms.Form):
 
     def __init__(self, *args, **kwargs):
         submissions = kwargs.pop('submissions')
+        archived = kwargs.pop('archived', ())
         super(FormExportStep2Form, self).__init__(*args, **kwargs)
 
-        exporter = Exporter(queryset=submissions)
+        exporter = Exporter(queryset=submissions, archived=archived)
         current_fields, old_fields = exporter.get_fields_for_export()
 
         pre_selected_fields = (field.field_id for field in current_fields)
@@ -0,0 +1,73 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from ..constants import (
+    ALDRYN_FORMS_ADMIN_LARGE_TABLE, LARGE_TABLE_CACHE_PREFIX, LARGE_TABLE_EXACT_COUNT_LIMIT, LARGE_TABLE_NAMES_TIMEOUT,
+)
+
+
+def get_large_table_settings() -> Optional[Dict[str, Any]]:
+    """Get settings of the admin of large tables. None if it is not enabled."""
+    options = getattr(settings, ALDRYN_FORMS_ADMIN_LARGE_TABLE, None)
+    if options is None:
+        return None
+    return {
+        "exact_count_limit": LARGE_TABLE_EXACT_COUNT_LIMIT,
+        "names_timeout": LARGE_TABLE_NAMES_TIMEOUT,
+        **options,
+    }
+
+
+def get_estimated_count(queryset: QuerySet, exact_count_limit: int) -> int:
+    """Get the number of records estimated by the query planner of PostgreSQL.
+
+    Results estimated below the limit are counted exactly. Other databases always count exactly.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    return estimate if estimate > exact_count_limit else queryset.count()
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator of the changelist with the count estimated by the database."""
+
+    @cached_property
+    def count(self) -> int:
+        return get_estimated_count(self.object_list, get_large_table_settings()["exact_count_limit"])
+
+
+class FormNameListFilter(admin.SimpleListFilter):
+    """Filter by the form name. The names are cached, so the table is not scanned for them on every page."""
+
+    title = _('form name')
+    parameter_name = 'name'
+
+    def lookups(self, request, model_admin) -> List[Tuple[str, str]]:
+        key = f"{LARGE_TABLE_CACHE_PREFIX}_names_{model_admin.model._meta.model_name}"
+        names = cache.get(key)
+        if names is None:
+            names = list(model_admin.model.objects.order_by('name').values_list('name', flat=True).distinct())
+            cache.set(key, names, get_large_table_settings()["names_timeout"])
+        return [(name, name) for name in names]
+
+    def queryset(self, request, queryset: QuerySet) -> QuerySet:
+        if self.value() is None:
+            return queryset
+        return queryset.filter(name=self.value())
@@ -0,0 +1,44 @@
+import secrets
+from typing import Iterator, List, Optional
+
+from django.core.cache import cache
+from django.db.models import Q, QuerySet
+
+from ..constants import SELECTION_CACHE_PREFIX, SELECTION_CHUNK_SIZE, SELECTION_TIMEOUT
+
+
+def get_selection_key(token: str) -> str:
+    return f"{SELECTION_CACHE_PREFIX}_{token}"
+
+
+def store_selection(user_id: int, params: str, pks: Optional[List[int]]) -> str:
+    """Store the selected records in the cache. Return the token of the selection.
+
+    The params are the query string of the changelist. The pks are None when all records matching the params are
+    selected, so selecting all records keeps the selection as short as selecting a few.
+    """
+    token = secrets.token_urlsafe(16)
+    cache.set(get_selection_key(token), {"user": user_id, "params": params, "pks": pks}, SELECTION_TIMEOUT)
+    return token
+
+
+def load_selection(token: str, user_id: int) -> Optional[dict]:
+    """Get the selection stored under the token. None if the selection expired or belongs to another user."""
+    selection = cache.get(get_selection_key(token))
+    if selection is None or selection["user"] != user_id:
+        return None
+    return selection
+
+
+def iter_chunks(queryset: QuerySet, chunk_size: int = SELECTION_CHUNK_SIZE) -> Iterator[QuerySet]:
+    """Split the submissions into chunks ordered from the newest, so that no query holds all of them."""
+    last = None
+    while True:
+        chunk = queryset.order_by("-sent_at", "pk")
+        if last is not None:
+            chunk = chunk.filter(Q(sent_at__lt=last[0]) | Q(sent_at=last[0], pk__gt=last[1]))
+        keys = list(chunk.values_list("sent_at", "pk")[:chunk_size])
+        if not keys:
+            return
+        last = keys[-1]
+        yield queryset.model.objects.filter(pk__in=[pk for _, pk in keys]).order_by("-sent_at", "pk")
@@ -59,12 +59,17 @@ class FormExportWizardView(SessionWizardView):
             form.full_clean()
 
             kwargs['submissions'] = form.get_queryset()
+            kwargs['archived'] = form.get_archived_submissions()
         return kwargs
 
     def render_next_step(self, form, **kwargs):
         next_step = self.steps.next
 
-        if next_step == self.steps.last and not form.get_queryset().exists():
+        if (
+            next_step == self.steps.last
+            and not form.get_queryset().exists()  # noqa: W503
+            and next(form.get_archived_submissions(), None) is None  # noqa: W503
+        ):
             self.storage.reset()
             self.admin.message_user(self.request, gettext("No records found"), level=messages.WARNING)
             export_url = 'admin:{}'.format(self.admin.get_admin_url('export'))
@@ -89,7 +94,8 @@ class FormExportWizardView(SessionWizardView):
         fields = step_2_form.get_fields()
         queryset = step_1_form.get_queryset()
 
-        dataset = Exporter(queryset=queryset).get_dataset(fields=fields)
+        archived = step_1_form.get_archived_submissions()
+        dataset = Exporter(queryset=queryset, archived=archived).get_dataset(fields=fields)
         filename = step_1_form.get_filename(extension=self.file_type)
 
         response = HttpResponse(getattr(dataset, self.file_type), content_type=self.get_content_type())
@@ -0,0 +1,85 @@
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .constants import ALDRYN_FORMS_ANSWER_COUNTS
+from .models import FieldAnswerCount, FormPlugin, FormSubmission, SerializedFormField
+
+
+# Plugin types of the choice fields. The values of the multiple choice fields are joined by commas.
+CHOICE_FIELD_PLUGINS = {
+    "BooleanField": False,
+    "RadioSelectField": False,
+    "SelectField": False,
+    "MultipleSelectField": True,
+    "MultipleCheckboxSelectField": True,
+}
+
+
+def is_answer_counting_enabled() -> bool:
+    return bool(getattr(settings, ALDRYN_FORMS_ANSWER_COUNTS, False))
+
+
+def get_choice_fields(form_plugin: FormPlugin) -> Dict[str, bool]:
+    """Get the names of the choice fields of the form and whether they have multiple values."""
+    return {
+        field.name: CHOICE_FIELD_PLUGINS[field.plugin_instance.plugin_type]
+        for field in form_plugin.get_form_fields()
+        if field.plugin_instance.plugin_type in CHOICE_FIELD_PLUGINS
+    }
+
+
+def get_answers(form_fields: Iterable[SerializedFormField], choice_fields: Dict[str, bool]) -> Counter:
+    """Count the answers of the choice fields by the field id and the value."""
+    answers: Counter = Counter()
+    for field in form_fields:
+        if not isinstance(field, SerializedFormField) or field.name not in choice_fields:
+            continue
+        values = str(field.value).split(", ") if choice_fields[field.name] else [str(field.value)]
+        for value in values:
+            if value:
+                answers[field.field_id, value[:255]] += 1
+    return answers
+
+
+def count_answers(name: str, answers: Counter) -> None:
+    """Add the answers of the new submission to the counters of the form."""
+    for (field_id, value), count in answers.items():
+        lookup = {"name": name, "field_id": field_id, "value": value}
+        if FieldAnswerCount.objects.filter(**lookup).update(count=F("count") + count):
+            continue
+        try:
+            with transaction.atomic():
+                FieldAnswerCount.objects.create(count=count, **lookup)
+        except IntegrityError:
+            # The counter was created by a concurrent submission.
+            FieldAnswerCount.objects.filter(**lookup).update(count=F("count") + count)
+
+
+def update_answer_counts(name: Optional[str] = None) -> int:
+    """Recompute the counters of the form (or of all forms) from the submissions. Return the number of counters.
+
+    The choice fields are taken from the form plugins of the name. Spam submissions are not counted.
+    """
+    plugins = FormPlugin.objects.all() if name is None else FormPlugin.objects.filter(name=name)
+    choice_fields_by_name: Dict[str, Dict[str, bool]] = {}
+    for form_plugin in plugins:
+        choice_fields_by_name.setdefault(form_plugin.name, {}).update(get_choice_fields(form_plugin))
+    total = 0
+    for form_name, choice_fields in choice_fields_by_name.items():
+        answers: Counter = Counter()
+        if choice_fields:
+            submissions = FormSubmission.objects.filter(name=form_name, honeypot_filled=False)
+            for submission in submissions.only("data", "schema", "post_ident").iterator():
+                answers.update(get_answers(submission.get_form_data(), choice_fields))
+        with transaction.atomic():
+            FieldAnswerCount.objects.filter(name=form_name).delete()
+            FieldAnswerCount.objects.bulk_create([
+                FieldAnswerCount(name=form_name, field_id=field_id, value=value, count=count)
+                for (field_id, value), count in answers.items()
+            ])
+        total += len(answers)
+    return total
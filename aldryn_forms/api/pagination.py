@@ -1,7 +1,58 @@
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class AldrynFormsPagination(pagination.PageNumberPagination):
     """Set the maximum list size."""
 
     page_size = 50
+
+
+class KeysetPagination:
+    """Paginate the submissions by the key (sent_at, pk) of the last submission of the previous page.
+
+    The pages do not need to count or skip the submissions before them, so the archive is read only up to the page.
+    """
+
+    page_size = AldrynFormsPagination.page_size
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_cursor(self, request) -> Optional[Tuple[datetime, int]]:
+        """Get the key of the last submission of the previous page. None on the first page."""
+        value = request.query_params.get(self.cursor_query_param)
+        if not value:
+            return None
+        try:
+            sent_at, _, pk = base64.urlsafe_b64decode(value.encode()).decode().partition(",")
+            sent_at, pk = parse_datetime(sent_at), int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if sent_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        if settings.USE_TZ and timezone.is_naive(sent_at):
+            sent_at = timezone.make_aware(sent_at)
+        return sent_at, pk
+
+    def encode_cursor(self, key: Tuple[datetime, int]) -> str:
+        return base64.urlsafe_b64encode(f"{key[0].isoformat()},{key[1]}".encode()).decode()
+
+    def get_paginated_response(
+        self, request, results: List[Dict[str, Any]], next_key: Optional[Tuple[datetime, int]]
+    ) -> Response:
+        """Get the response of the page. The next key is the key of the last submission if there are more."""
+        next_url = None
+        if next_key is not None:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(next_key))
+        return Response({"next": next_url, "results": results})
@@ -1,6 +1,15 @@
+from typing import Any, Collection, Dict, Iterator, List, Optional, Union
+
+from django.db.models import QuerySet
+
 from rest_framework import serializers
 
-from aldryn_forms.models import FormPlugin, FormSubmission
+from aldryn_forms.compat import json_loads
+from aldryn_forms.compression import decompress_text
+from aldryn_forms.models import (
+    FieldAnswerCount, FormPlugin, FormSubmission, FormSubmissionBase, SerializedFormField, SubmissionStatistics,
+    build_form_fields, decode_form_data, decode_steps_data,
+)
 
 
 class FormSubmissionSerializer(serializers.HyperlinkedModelSerializer):
@@ -15,8 +24,110 @@ class FormSubmissionSerializer(serializers.HyperlinkedModelSerializer):
         return self.context.get("hostname", "testserver")
 
 
+def field_as_dict(values: tuple) -> Dict[str, Any]:
+    return dict(zip(SerializedFormField._fields, values))
+
+
+class SubmissionRowSerializer:
+    """Serialize submissions into the same data as FormSubmissionSerializer.
+
+    The submissions are read by values() and the output is built directly, without the field machinery of DRF.
+    The output can be limited to some of the fields and the form data to the fields of some names. Only the columns
+    of the requested fields are read.
+    """
+
+    output_fields = ('hostname', 'name', 'language', 'sent_at', 'form_recipients', 'form_data')
+    columns = {
+        'hostname': (),
+        'name': ('name',),
+        'language': ('language',),
+        'sent_at': ('sent_at',),
+        'form_recipients': ('recipients',),
+        'form_data': ('data', 'schema_id', 'post_ident'),
+    }
+    fields = ('name', 'language', 'sent_at', 'recipients', 'data', 'schema_id', 'post_ident')
+
+    def __init__(
+        self,
+        hostname: Optional[str] = "testserver",
+        fields: Optional[Collection[str]] = None,
+        data_fields: Optional[Collection[str]] = None,
+    ):
+        self.hostname = hostname
+        if fields is not None:
+            unknown = set(fields) - set(self.output_fields)
+            if unknown:
+                raise serializers.ValidationError({'fields': [f"Unknown fields: {', '.join(sorted(unknown))}."]})
+            self.output_fields = tuple(field for field in self.output_fields if field in fields)
+            # The primary key is read if no column is needed, because values() without fields reads all columns.
+            self.fields = tuple(
+                column for field in self.output_fields for column in self.columns[field]) or ('pk',)
+        self.data_fields = None if data_fields is None else frozenset(data_fields)
+        self.getters = [(field, getattr(self, f'get_{field}')) for field in self.output_fields]
+        # Dates are formatted the same way as by the model serializer.
+        self.sent_at_field = serializers.DateTimeField()
+
+    def get_hostname(self, submission: Dict[str, Any], submission_type: str) -> Optional[str]:
+        return self.hostname
+
+    def get_name(self, submission: Dict[str, Any], submission_type: str) -> str:
+        return submission['name']
+
+    def get_language(self, submission: Dict[str, Any], submission_type: str) -> str:
+        return submission['language']
+
+    def get_sent_at(self, submission: Dict[str, Any], submission_type: str) -> str:
+        return self.sent_at_field.to_representation(submission['sent_at'])
+
+    def get_form_recipients(self, submission: Dict[str, Any], submission_type: str) -> List[Dict[str, str]]:
+        try:
+            return [
+                {'name': item['name'], 'email': item['email']}
+                for item in json_loads(decompress_text(submission['recipients']))
+            ]
+        except ValueError:
+            return []
+
+    def get_form_data(self, submission: Dict[str, Any], submission_type: str) -> List[Dict[str, Any]]:
+        try:
+            items = decode_form_data(submission['data'], submission['schema_id'])
+        except ValueError:
+            items = []
+        if submission['post_ident']:
+            items.extend(decode_steps_data(submission_type, submission['post_ident']))
+        return build_form_fields(items, field_as_dict, self.data_fields)
+
+    def to_representation(
+        self, submission: Union[Dict[str, Any], FormSubmissionBase], submission_type: str = "formsubmission"
+    ) -> Dict[str, Any]:
+        """Serialize the row of values() or the instance of the submission."""
+        if isinstance(submission, FormSubmissionBase):
+            submission_type = submission._meta.model_name
+            submission = {field: getattr(submission, field) for field in self.fields}
+        return {field: getter(submission, submission_type) for field, getter in self.getters}
+
+    def serialize_queryset(self, queryset: QuerySet) -> Iterator[Dict[str, Any]]:
+        submission_type = queryset.model._meta.model_name
+        for row in queryset.values(*self.fields).iterator():
+            yield self.to_representation(row, submission_type)
+
+
 class FormSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = FormPlugin
         fields = ['name']
+
+
+class SubmissionStatisticsSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = SubmissionStatistics
+        fields = ['name', 'day', 'language', 'total', 'spam', 'pending']
+
+
+class FieldAnswerCountSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = FieldAnswerCount
+        fields = ['name', 'field_id', 'value', 'count']
@@ -1,4 +1,14 @@
-from typing import Dict
+import hashlib
+import heapq
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+
+from aldryn_forms.constants import ALDRYN_FORMS_API_CACHE, API_CACHE_TIMEOUT
+from aldryn_forms.models import FormSubmission
 
 
 dataType = Dict[str, str]
@@ -9,3 +19,52 @@ def remove_identical_value(rule: dataType, src: dataType, dest: dataType) -> Non
     data = [dest.get(key) for key in rule.get("params", {}).get("fields", [])]
     if len(set(data)) < len(data) and rule["dest"] in dest:
         del dest[rule["dest"]]
+
+
+def iter_rows_with_archive(
+    rows: Iterable[Dict[str, Any]], archived: Iterable[FormSubmission], columns: Iterable[str]
+) -> Iterator[Dict[str, Any]]:
+    """Merge the rows of values() with the archived submissions lazily, the newest first (by sent_at and pk).
+
+    The rows must be ordered the same way and contain the columns sent_at and pk.
+    """
+    archived_rows = ({column: getattr(submission, column) for column in columns} for submission in archived)
+    return heapq.merge(rows, archived_rows, key=lambda row: (row["sent_at"], row["pk"]), reverse=True)
+
+
+def iter_ndjson_chunks(
+    items: Iterable[Dict[str, Any]], compress: bool = False, chunk_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    """Encode the items as newline-delimited JSON in chunks of about the size. Compress them by gzip on the fly."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    buffer: List[bytes] = []
+    size = 0
+    for item in items:
+        line = (json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            chunk = b"".join(buffer)
+            buffer, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = b"".join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def get_api_cache_settings() -> Optional[Dict[str, Any]]:
+    """Get settings of the cache of the API responses. None if it is not enabled."""
+    options = getattr(settings, ALDRYN_FORMS_API_CACHE, None)
+    if options is None:
+        return None
+    return {"cache": "default", "timeout": API_CACHE_TIMEOUT, **options}
+
+
+def get_etag(count: int, last_modified: Optional[datetime], *parts: str) -> str:
+    """Get the entity tag of the response from the fingerprint of the records and the parts of the request."""
+    key = "\n".join([str(count), last_modified.isoformat() if last_modified else "", *parts])
+    return hashlib.sha1(key.encode()).hexdigest()
@@ -1,17 +1,31 @@
-from typing import Callable
+from datetime import datetime, timedelta
+from itertools import dropwhile, islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
+from django.conf import settings
 from django.contrib.sites.models import Site
-from django.http.response import Http404
+from django.core.cache import caches
+from django.db.models import Count, Max, Q, Sum
+from django.http.response import Http404, HttpResponseBase, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
 
 from django_filters import rest_framework as filters
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from aldryn_forms.models import FormPlugin, FormSubmission
+from aldryn_forms.archive import get_segments, get_submission_key, iter_archived_submissions
+from aldryn_forms.constants import API_CACHE_PREFIX
+from aldryn_forms.models import FieldAnswerCount, FormPlugin, FormSubmission, SubmissionStatistics
 
-from .pagination import AldrynFormsPagination
+from .pagination import AldrynFormsPagination, KeysetPagination
 from .permissions import FormPermission, SubmissionsPermission
-from .serializers import FormSerializer, FormSubmissionSerializer
+from .serializers import (
+    FieldAnswerCountSerializer, FormSerializer, FormSubmissionSerializer, SubmissionRowSerializer,
+    SubmissionStatisticsSerializer,
+)
+from .utils import get_api_cache_settings, get_etag, iter_ndjson_chunks, iter_rows_with_archive
 
 
 class SubmissionFilter(filters.FilterSet):
@@ -24,6 +38,14 @@ class SubmissionFilter(filters.FilterSet):
         fields = ('name', 'language')
 
 
+class StatisticsFilter(filters.FilterSet):
+    day_range = filters.DateFromToRangeFilter(field_name='day', label="Day from to")
+
+    class Meta:
+        model = SubmissionStatistics
+        fields = ('name', 'language')
+
+
 class SanitizeGetObjectMixin:
 
     get_object: Callable
@@ -39,12 +61,41 @@ class SanitizeGetObjectMixin:
         return Response(serializer.data)
 
 
-class SubmissionsViewSet(SanitizeGetObjectMixin, viewsets.ReadOnlyModelViewSet):
+class ConditionalListMixin:
+    """Answer conditional requests of the list by the fingerprint of the listed records.
+
+    The fingerprint is the number of the records and the time of their last change, read by one aggregate query.
+    The list is rendered only if the client does not have the current version. Only the ETag is validated, because
+    the fingerprint is not a time of modification: a deleted record does not move it forward.
+    """
+
+    def get_fingerprint(self) -> Tuple[int, Optional[datetime]]:
+        raise NotImplementedError
+
+    def get_etag_parts(self, request) -> List[str]:
+        """Get the parts of the request, which the response depends on: the path and the negotiated renderer."""
+        return [request.get_full_path(), request.accepted_renderer.format]
+
+    def get_conditional_response(self, request, render: Callable[[str], HttpResponseBase]) -> HttpResponseBase:
+        """Return 304 if the client has the current version. Otherwise render the response with the ETag."""
+        count, last_modified = self.get_fingerprint()
+        etag = get_etag(count, last_modified, *self.get_etag_parts(request))
+        response = get_conditional_response(request, quote_etag(etag))
+        if response is None:
+            response = render(etag)
+        if response.status_code in (200, 304):
+            response["ETag"] = quote_etag(etag)
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+
+class SubmissionsViewSet(ConditionalListMixin, SanitizeGetObjectMixin, viewsets.ReadOnlyModelViewSet):
     authentication_classes = []
     permission_classes = [SubmissionsPermission]
     queryset = FormSubmission.objects.filter(post_ident__isnull=True).order_by('-sent_at')
     serializer_class = FormSubmissionSerializer
     paginator = AldrynFormsPagination()
+    keyset_paginator = KeysetPagination()
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = SubmissionFilter
 
@@ -54,10 +105,201 @@ class SubmissionsViewSet(SanitizeGetObjectMixin, viewsets.ReadOnlyModelViewSet):
         context["hostname"] = site.domain
         return context
 
+    def get_row_serializer(self) -> SubmissionRowSerializer:
+        """Get the serializer of the rows limited by the parameters fields and data_fields (comma separated names)."""
+        return SubmissionRowSerializer(
+            self.get_serializer_context()["hostname"],
+            get_names(self.request.query_params.get("fields")),
+            get_names(self.request.query_params.get("data_fields")),
+        )
+
+    def get_etag_parts(self, request) -> List[str]:
+        parts = super().get_etag_parts(request) + [self.action, self.get_serializer_context()["hostname"]]
+        if self.action == "ndjson" and self.accepts_gzip():
+            parts.append("gzip")
+        if self.is_archive_included():
+            filters = self.get_archive_filters()
+            parts.extend(["archived", *(f"{key}={value}" for key, value in sorted((filters or {}).items()))])
+        return parts
+
+    def accepts_gzip(self) -> bool:
+        return "gzip" in self.request.META.get("HTTP_ACCEPT_ENCODING", "")
+
+    def get_fingerprint(self) -> Tuple[int, Optional[datetime]]:
+        """Get the number and the last change of the filtered submissions and of the archive segments if included."""
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        fingerprint = queryset.aggregate(count=Count("pk"), last_modified=Max("updated_at"))
+        count, last_modified = fingerprint["count"], fingerprint["last_modified"]
+        filters = self.get_archive_filters() if self.is_archive_included() else None
+        if filters is not None:
+            segments = get_segments(filters["name"], filters["start"], filters["end"]).aggregate(
+                count=Sum("count"), last_modified=Max("created_at"))
+            count += segments["count"] or 0
+            last_modified = max(filter(None, (last_modified, segments["last_modified"])), default=None)
+        return count, last_modified
+
+    def list(self, request, *args, **kwargs):
+        """List the submissions serialized from values() rows by the lightweight serializer."""
+        return self.get_conditional_response(request, lambda etag: self.render_list())
+
+    def render_list(self) -> Response:
+        serializer = self.get_row_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_archive_included():
+            # The archive is merged by the key of the submissions, so the pages are addressed by the key too.
+            paginator = self.keyset_paginator
+            rows = self.iter_rows_with_archive(
+                queryset, serializer, paginator.get_cursor(self.request), paginator.page_size + 1)
+            page = list(islice(rows, paginator.page_size + 1))
+            next_key = None
+            if len(page) > paginator.page_size:
+                last = page[paginator.page_size - 1]
+                next_key = last["sent_at"], last["pk"]
+            data = [serializer.to_representation(row) for row in page[:paginator.page_size]]
+            return paginator.get_paginated_response(self.request, data, next_key)
+        page = self.paginate_queryset(queryset.values(*serializer.fields))
+        data = [serializer.to_representation(submission) for submission in page]
+        return self.get_paginated_response(data)
+
+    @action(detail=False, methods=["get"])
+    def ndjson(self, request, *args, **kwargs):
+        """Stream the filtered submissions as newline-delimited JSON. The stream is compressed by gzip if accepted."""
+        response = self.get_conditional_response(request, lambda etag: self.render_ndjson())
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+    def render_ndjson(self) -> StreamingHttpResponse:
+        serializer = self.get_row_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_archive_included():
+            submissions = map(serializer.to_representation, self.iter_rows_with_archive(queryset, serializer))
+        else:
+            submissions = serializer.serialize_queryset(queryset)
+        compress = self.accepts_gzip()
+        response = StreamingHttpResponse(iter_ndjson_chunks(submissions, compress), content_type="application/x-ndjson")
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        return response
+
+    def is_archive_included(self) -> bool:
+        return self.action in ("list", "ndjson") and self.request.query_params.get("archived") in ("1", "true")
+
+    def get_archive_filters(self) -> Optional[Dict[str, Any]]:
+        """Get the filters of the archive from name, language, sent_at_range and sent_at_range_time.
+
+        None if the filters are not valid.
+        """
+        filterset = self.filterset_class(self.request.query_params, queryset=FormSubmission.objects.none())
+        if not filterset.is_valid():
+            return None
+        data = filterset.form.cleaned_data
+        start, end = get_range(data.get("sent_at_range"))
+        start_time, end_time = get_range(data.get("sent_at_range_time"))
+        return {
+            "name": data.get("name") or None,
+            "language": data.get("language") or None,
+            "start": max(filter(None, (start, start_time)), default=None),
+            "end": min(filter(None, (end, end_time)), default=None),
+        }
+
+    def iter_rows_with_archive(
+        self,
+        queryset,
+        serializer: SubmissionRowSerializer,
+        cursor: Optional[Tuple[datetime, int]] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Get the filtered submissions merged with the archived ones, the newest first, after the cursor.
+
+        The submissions in the database are read up to the limit and the segments of the archive only as far as the
+        merge gets.
+        """
+        columns = tuple(dict.fromkeys((*serializer.fields, "sent_at", "pk")))
+        filters = self.get_archive_filters()
+        archived = iter(())
+        if cursor is not None:
+            sent_at, pk = cursor
+            queryset = queryset.filter(Q(sent_at__lt=sent_at) | Q(sent_at=sent_at, pk__lt=pk))
+            if filters is not None:
+                # The end of the range is exclusive.
+                end = sent_at + timedelta(microseconds=1)
+                filters["end"] = min(filter(None, (filters["end"], end)))
+        if filters is not None:
+            archived = iter_archived_submissions(**filters)
+            if cursor is not None:
+                archived = dropwhile(lambda submission: get_submission_key(submission) >= cursor, archived)
+        rows = queryset.order_by("-sent_at", "-pk").values(*columns)
+        rows = rows[:limit] if limit is not None else rows.iterator()
+        return iter_rows_with_archive(rows, archived, columns)
 
-class FormViewSet(SanitizeGetObjectMixin, viewsets.ReadOnlyModelViewSet):
+
+def get_names(value: Optional[str]) -> Optional[List[str]]:
+    """Split the parameter into the names. None if the parameter is empty."""
+    if not value:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def get_range(value: Optional[slice]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Convert the value of the range filter into the inclusive start and the exclusive end."""
+    if value is None:
+        return None, None
+    start, end = value.start, value.stop
+    if settings.USE_TZ:
+        start = timezone.make_aware(start) if start and timezone.is_naive(start) else start
+        end = timezone.make_aware(end) if end and timezone.is_naive(end) else end
+    # The end of the filter is included in the range.
+    return start, end + timedelta(microseconds=1) if end else None
+
+
+class FormViewSet(ConditionalListMixin, SanitizeGetObjectMixin, viewsets.ReadOnlyModelViewSet):
     authentication_classes = []
     permission_classes = [FormPermission]
     queryset = FormPlugin.objects.distinct("name").order_by('name')
     serializer_class = FormSerializer
     paginator = AldrynFormsPagination()
+
+    def get_fingerprint(self) -> Tuple[int, Optional[datetime]]:
+        """Get the number and the last change of all form plugins."""
+        fingerprint = FormPlugin.objects.aggregate(count=Count("pk"), last_modified=Max("changed_date"))
+        return fingerprint["count"], fingerprint["last_modified"]
+
+    def list(self, request, *args, **kwargs):
+        """List the form names. The data are cached by the ETag, if the cache is enabled."""
+        return self.get_conditional_response(request, lambda etag: self.render_list(request, etag, *args, **kwargs))
+
+    def render_list(self, request, etag: str, *args, **kwargs) -> Response:
+        options = get_api_cache_settings()
+        if options is None:
+            return super().list(request, *args, **kwargs)
+        cache = caches[options["cache"]]
+        key = f"{API_CACHE_PREFIX}_forms_{etag}"
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, options["timeout"])
+        return Response(data)
+
+
+class StatisticsViewSet(viewsets.ReadOnlyModelViewSet):
+    """Daily numbers of submissions by the form and the language."""
+
+    authentication_classes = []
+    permission_classes = [SubmissionsPermission]
+    queryset = SubmissionStatistics.objects.all()
+    serializer_class = SubmissionStatisticsSerializer
+    paginator = AldrynFormsPagination()
+    filter_backends = (filters.DjangoFilterBackend,)
+    filterset_class = StatisticsFilter
+
+
+class AnswerCountViewSet(viewsets.ReadOnlyModelViewSet):
+    """Numbers of the answers of the choice fields by the form."""
+
+    authentication_classes = []
+    permission_classes = [SubmissionsPermission]
+    queryset = FieldAnswerCount.objects.all()
+    serializer_class = FieldAnswerCountSerializer
+    paginator = AldrynFormsPagination()
+    filter_backends = (filters.DjangoFilterBackend,)
+    filterset_fields = ('name', 'field_id')
@@ -31,11 +31,11 @@ def send_to_webhook(url: str, method: str, data: dataType) -> requests.Response:
 
 def trigger_webhooks(webhooks: ManyToManyField, instance: "FormSubmissionBase", hostname: str) -> None:
     """Trigger webhooks and send them the instance data."""
-    from aldryn_forms.api.serializers import FormSubmissionSerializer
-    serializer = FormSubmissionSerializer(instance, context={"hostname": hostname})
+    from aldryn_forms.api.serializers import SubmissionRowSerializer
+    serialized = SubmissionRowSerializer(hostname).to_representation(instance)
 
     for hook in webhooks.all():
-        data = transform_data(hook.transform, serializer.data)
+        data = transform_data(hook.transform, serialized)
         logger.debug(data)
         try:
             send_to_webhook(hook.url, hook.method, data)
@@ -106,12 +106,11 @@ def process_match(pattern: Union[str, List], value: str) -> str:
 
 def collect_submissions_data(webhook: "Webhook", submissions: "FormSubmission", hostname: str) -> List[Dict[str, str]]:
     """Collect submissions data."""
-    from aldryn_forms.api.serializers import FormSubmissionSerializer
+    from aldryn_forms.api.serializers import SubmissionRowSerializer
 
     response = []
-    for instance in submissions.all():
-        serializer = FormSubmissionSerializer(instance, context={"hostname": hostname})
-        data = transform_data(webhook.transform, serializer.data)
+    for serialized in SubmissionRowSerializer(hostname).serialize_queryset(submissions.all()):
+        data = transform_data(webhook.transform, serialized)
         response.append(data)
 
     return response
@@ -119,11 +118,10 @@ def collect_submissions_data(webhook: "Webhook", submissions: "FormSubmission",
 
 def send_submissions_data(webhook: "Webhook", submissions: "FormSubmission", hostname: str) -> None:
     """Send submissions data to webhook."""
-    from aldryn_forms.api.serializers import FormSubmissionSerializer
+    from aldryn_forms.api.serializers import SubmissionRowSerializer
 
-    for instance in submissions.all():
-        serializer = FormSubmissionSerializer(instance, context={"hostname": hostname})
-        data = transform_data(webhook.transform, serializer.data)
+    for serialized in SubmissionRowSerializer(hostname).serialize_queryset(submissions.all()):
+        data = transform_data(webhook.transform, serialized)
         logger.debug(data)
         try:
             send_to_webhook(webhook.url, webhook.method, data)
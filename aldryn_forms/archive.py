@@ -0,0 +1,275 @@
+import gzip
+import heapq
+import json
+import lzma
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import Storage, storages
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from .constants import ALDRYN_FORMS_ARCHIVE
+from .models import ArchiveSegment, FormSubmission
+from .retention import delete_in_batches
+
+
+ARCHIVED_FIELDS = (
+    "id", "name", "data", "schema_id", "recipients", "language", "form_url", "sent_at", "honeypot_filled",
+)
+
+
+class Compression(NamedTuple):
+    extension: str
+    open: Callable
+
+
+COMPRESSIONS = {
+    "gzip": Compression(".jsonl.gz", gzip.open),
+    "xz": Compression(".jsonl.xz", lzma.open),
+}
+
+
+def get_archive_settings() -> Dict[str, Any]:
+    """Get the storage alias, the location in the storage and the compression of the archive."""
+    return {
+        "storage": "default",
+        "location": "aldryn_forms_archive",
+        "compression": "gzip",
+        **getattr(settings, ALDRYN_FORMS_ARCHIVE, {}),
+    }
+
+
+def get_archive_storage() -> Storage:
+    return storages[get_archive_settings()["storage"]]
+
+
+def get_next_month(month: datetime) -> datetime:
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def get_archive_groups(before: datetime) -> QuerySet:
+    """Get form names and months of the submissions sent before the time."""
+    return (
+        FormSubmission.objects.filter(sent_at__lt=before)
+        .annotate(month=TruncMonth("sent_at"))
+        .values_list("name", "month")
+        .distinct()
+        .order_by("month", "name")
+    )
+
+
+def write_segment(name: str, month: datetime, submissions: QuerySet) -> Optional[ArchiveSegment]:
+    """Stream the submissions into the compressed JSON lines file in the storage and record it in the manifest.
+
+    The submissions are written the newest first (see get_submission_key), so that the segment can be merged with
+    the others without sorting it. The counts by language and the ranges are recorded in the manifest.
+    """
+    options = get_archive_settings()
+    compression = COMPRESSIONS[options["compression"]]
+    count, language_counts, first_pk, last_pk, first_sent_at, last_sent_at = 0, Counter(), None, None, None, None
+    with tempfile.TemporaryFile() as segment_file:
+        with compression.open(segment_file, "wt", encoding="utf-8") as writer:
+            rows = submissions.order_by("-sent_at", "-pk").values(*ARCHIVED_FIELDS).iterator(chunk_size=1000)
+            for row in rows:
+                writer.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+                count += 1
+                language_counts[row["language"]] += 1
+                first_pk = row["id"] if first_pk is None else min(first_pk, row["id"])
+                last_pk = row["id"] if last_pk is None else max(last_pk, row["id"])
+                last_sent_at = row["sent_at"] if last_sent_at is None else last_sent_at
+                first_sent_at = row["sent_at"]
+        if not count:
+            return None
+        segment_file.seek(0)
+        path = f"{options['location']}/{slugify(name) or 'form'}/{month:%Y-%m}{compression.extension}"
+        path = get_archive_storage().save(path, File(segment_file))
+    return ArchiveSegment.objects.create(
+        name=name,
+        month=month.date(),
+        path=path,
+        compression=options["compression"],
+        count=count,
+        language_counts=dict(language_counts),
+        first_sent_at=first_sent_at,
+        last_sent_at=last_sent_at,
+        first_pk=first_pk,
+        last_pk=last_pk,
+    )
+
+
+def get_segment_submissions(segment: ArchiveSegment) -> QuerySet:
+    """Get the submissions in the database which were written into the segment."""
+    return FormSubmission.objects.filter(
+        name=segment.name,
+        sent_at__gte=segment.first_sent_at,
+        sent_at__lte=segment.last_sent_at,
+        pk__gte=segment.first_pk,
+        pk__lte=segment.last_pk,
+    )
+
+
+def complete_segment(segment: ArchiveSegment, batch_size: int = 500, sleep: float = 0) -> None:
+    """Delete the archived submissions of the segment in batches and mark the segment as completed."""
+    delete_in_batches(get_segment_submissions(segment), batch_size, sleep)
+    segment.completed_at = timezone.now()
+    segment.save(update_fields=["completed_at"])
+
+
+def archive_submissions(
+    before: datetime, batch_size: int = 500, sleep: float = 0, dry_run: bool = False
+) -> List[ArchiveSegment]:
+    """Move submissions sent before the time into archive segments per form name and month.
+
+    The archived submissions are deleted in batches. The segments whose deletion was interrupted are completed first,
+    so that their submissions are not archived twice. In the dry run only unsaved segments with counts are returned.
+    """
+    if not dry_run:
+        for segment in ArchiveSegment.objects.filter(completed_at__isnull=True, last_pk__isnull=False):
+            complete_segment(segment, batch_size, sleep)
+    segments = []
+    for name, month in get_archive_groups(before):
+        submissions = FormSubmission.objects.filter(
+            name=name, sent_at__gte=month, sent_at__lt=min(get_next_month(month), before))
+        if dry_run:
+            segments.append(ArchiveSegment(name=name, month=month.date(), count=submissions.count()))
+            continue
+        # Pending steps are merged, so that they are archived too.
+        for submission in submissions.filter(post_ident__isnull=False).iterator():
+            submission.merge_steps()
+        last_pk = submissions.order_by("-pk").values_list("pk", flat=True).first()
+        segment = write_segment(name, month, submissions.filter(pk__lte=last_pk))
+        if segment is None:
+            continue
+        complete_segment(segment, batch_size, sleep)
+        segments.append(segment)
+        if sleep:
+            time.sleep(sleep)
+    return segments
+
+
+def read_segment(segment: ArchiveSegment) -> Iterator[FormSubmission]:
+    """Read the archived submissions. They are unsaved instances of FormSubmission."""
+    compression = COMPRESSIONS[segment.compression]
+    with get_archive_storage().open(segment.path, "rb") as segment_file:
+        with compression.open(segment_file, "rt", encoding="utf-8") as reader:
+            for line in reader:
+                row = json.loads(line)
+                row["sent_at"] = parse_datetime(row["sent_at"])
+                yield FormSubmission(**row)
+
+
+def get_segments(
+    name: Optional[str] = None, start: Optional[datetime] = None, end: Optional[datetime] = None
+) -> QuerySet:
+    """Get the segments of the form overlapping the range. The start is inclusive, the end is exclusive."""
+    segments = ArchiveSegment.objects.all()
+    if name is not None:
+        segments = segments.filter(name=name)
+    if start is not None:
+        segments = segments.filter(last_sent_at__gte=start)
+    if end is not None:
+        segments = segments.filter(first_sent_at__lt=end)
+    return segments
+
+
+def filter_submissions(
+    submissions: Iterable[FormSubmission],
+    language: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[FormSubmission]:
+    """Filter the archived submissions by the language and the range. The start is inclusive, the end is exclusive."""
+    for submission in submissions:
+        if language is not None and submission.language != language:
+            continue
+        if start is not None and submission.sent_at < start:
+            continue
+        if end is not None and submission.sent_at >= end:
+            continue
+        yield submission
+
+
+def count_archived_submissions(
+    name: Optional[str] = None,
+    language: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> int:
+    """Count the archived submissions of the form sent in the range. The start is inclusive, the end is exclusive.
+
+    The segments inside the range are counted from the manifest. Only the segments at the ends of the range are read.
+    """
+    count = 0
+    for segment in get_segments(name, start, end):
+        inside = (start is None or segment.first_sent_at >= start) and (end is None or segment.last_sent_at < end)
+        if inside and segment.last_pk is not None:
+            count += segment.count if language is None else segment.language_counts.get(language, 0)
+        else:
+            count += sum(1 for _ in filter_submissions(read_segment(segment), language, start, end))
+    return count
+
+
+def get_archived_submissions(
+    name: Optional[str] = None,
+    language: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[FormSubmission]:
+    """Get the archived submissions of the form sent in the range. The start is inclusive, the end is exclusive.
+
+    Only segments overlapping the range are read.
+    """
+    for segment in get_segments(name, start, end):
+        yield from filter_submissions(read_segment(segment), language, start, end)
+
+
+def get_submission_key(submission: FormSubmission) -> Tuple[datetime, int]:
+    """Get the key by which the submissions are listed: the time of sending and the primary key."""
+    return submission.sent_at, submission.pk
+
+
+def iter_archived_submissions(
+    name: Optional[str] = None,
+    language: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[FormSubmission]:
+    """Get the archived submissions of the form sent in the range, the newest first (see get_submission_key).
+
+    The segments are merged lazily in the order of their last submission. A segment is opened only when the merge
+    reaches its time and it is streamed, so only the current submission of each open segment is held in memory.
+    """
+    segments = get_segments(name, start, end).order_by("-last_sent_at", "-pk").iterator()
+    # Items of the heap: the reversed key of the submission, the number of the segment, the submission and the rest
+    # of the segment.
+    heap: List[Tuple[Tuple[float, int], int, FormSubmission, Iterator[FormSubmission]]] = []
+
+    def push(number: int, submissions: Iterator[FormSubmission]) -> None:
+        submission = next(submissions, None)
+        if submission is not None:
+            key = (-submission.sent_at.timestamp(), -submission.pk)
+            heapq.heappush(heap, (key, number, submission, submissions))
+
+    number, segment = 0, next(segments, None)
+    while heap or segment is not None:
+        if segment is not None and (not heap or segment.last_sent_at >= heap[0][2].sent_at):
+            submissions = filter_submissions(read_segment(segment), language, start, end)
+            if segment.last_pk is None:
+                # The segment was written in the order of the primary key.
+                submissions = iter(sorted(submissions, key=get_submission_key, reverse=True))
+            push(number, submissions)
+            number, segment = number + 1, next(segments, None)
+            continue
+        _key, current, submission, rest = heapq.heappop(heap)
+        yield submission
+        push(current, rest)
@@ -0,0 +1,222 @@
+import os
+import shutil
+from datetime import datetime
+from typing import IO, Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.db.models import Sum
+from django.http import HttpRequest
+from django.utils.crypto import get_random_string
+from django.utils.translation import gettext
+
+from .constants import (
+    ALDRYN_FORMS_CHUNKED_UPLOADS, CHUNKED_UPLOAD_CHUNK_SIZE, CHUNKED_UPLOAD_EXPIRATION, CHUNKED_UPLOAD_MAX_SIZE,
+    CHUNKED_UPLOAD_MAX_TOTAL_SIZE, CHUNKED_UPLOAD_SNIFF_SIZE, UPLOAD_TOKEN_SUFFIX,
+)
+from .forms import FileSizeCheckMixin
+from .models import ChunkedUpload, FormPlugin
+from .sizefield.utils import filesizeformat
+from .upload_limits import get_upload_fields, is_accepted_content
+
+
+RESOLVED_UPLOAD_TOKENS = "aldryn_forms_resolved_upload_tokens"
+
+
+class ChunkedUploadError(Exception):
+    """The upload was refused. The status is the status code of the response."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def get_chunked_upload_settings() -> Optional[Dict[str, Any]]:
+    """Get settings of the chunked uploads. None if they are not enabled."""
+    options = getattr(settings, ALDRYN_FORMS_CHUNKED_UPLOADS, None)
+    if options is None:
+        return None
+    if not options.get("dir"):
+        # The chunks of one upload can be received by different hosts.
+        raise ImproperlyConfigured(f'Set "dir" shared by all hosts in settings.{ALDRYN_FORMS_CHUNKED_UPLOADS}.')
+    return {
+        "chunk_size": CHUNKED_UPLOAD_CHUNK_SIZE,
+        "expiration": CHUNKED_UPLOAD_EXPIRATION,
+        "max_size": CHUNKED_UPLOAD_MAX_SIZE,
+        "max_total_size": CHUNKED_UPLOAD_MAX_TOTAL_SIZE,
+        **options,
+    }
+
+
+def get_upload_path(upload: ChunkedUpload) -> str:
+    """Get the path of the assembled file."""
+    return os.path.join(get_chunked_upload_settings()["dir"], upload.token)
+
+
+def get_part_path(upload: ChunkedUpload, part: int) -> str:
+    return f"{get_upload_path(upload)}.part{part}"
+
+
+def get_upload_field(form_plugin_id: int, field_name: str) -> FileSizeCheckMixin:
+    """Get the form field of the upload with the rules of the field plugin."""
+    try:
+        upload_fields = get_upload_fields(form_plugin_id)
+    except FormPlugin.DoesNotExist:
+        raise ChunkedUploadError("Form does not exist.")
+    if field_name not in upload_fields:
+        raise ChunkedUploadError("Field is not an upload field.")
+    return upload_fields[field_name]
+
+
+def start_upload(
+    form_plugin_id: int, field_name: str, filename: str, size: int, content_type: str
+) -> ChunkedUpload:
+    """Check the announced file against the rules of the field and the global limits and create the upload.
+
+    The limits apply also to the fields without the maximal size, so that the uploads cannot fill the disk.
+    """
+    options = get_chunked_upload_settings()
+    if size > options["max_size"]:
+        raise ChunkedUploadError(gettext('File size exceeded the specified limit %(size)s.') % {
+            'size': filesizeformat(options["max_size"])}, 413)
+    form_field = get_upload_field(form_plugin_id, field_name)
+    if not form_field.is_accepted_type(filename, content_type):
+        message = gettext('"%(file_name)s" is not of accepted file type.') % {'file_name': filename}
+        raise ChunkedUploadError(message + " " + form_field.get_accepted_types_message())
+    error = form_field.check_files_size(size)
+    if error is not None:
+        raise ChunkedUploadError(error, 413)
+    stored = ChunkedUpload.objects.aggregate(total=Sum("size"))["total"] or 0
+    if stored + size > options["max_total_size"]:
+        raise ChunkedUploadError("Uploads are not available at the moment.", 507)
+    return ChunkedUpload.objects.create(
+        token=get_random_string(32),
+        form_plugin_id=form_plugin_id,
+        field_name=field_name,
+        filename=filename,
+        content_type=content_type,
+        size=size,
+    )
+
+
+def append_chunk(token: str, offset: int, stream: IO[bytes]) -> ChunkedUpload:
+    """Store the chunk as the next part of the upload. The file is assembled after the last part.
+
+    The offset must be the number of bytes already received, so that the client can resume the upload.
+    """
+    options = get_chunked_upload_settings()
+    with transaction.atomic():
+        try:
+            upload = ChunkedUpload.objects.select_for_update().get(token=token)
+        except ChunkedUpload.DoesNotExist:
+            raise ChunkedUploadError("Upload does not exist.", 404)
+        if upload.completed:
+            raise ChunkedUploadError("Upload is completed.", 409)
+        if offset != upload.received:
+            raise ChunkedUploadError("Unexpected offset.", 409)
+        os.makedirs(options["dir"], exist_ok=True)
+        path = get_part_path(upload, upload.parts)
+        received = upload.received
+        with open(path, "wb") as part:
+            while chunk := stream.read(64 * 1024):
+                received += len(chunk)
+                # The size is checked while the data are read.
+                if received > upload.size or received - upload.received > options["chunk_size"]:
+                    part.close()
+                    os.remove(path)
+                    raise ChunkedUploadError("Chunk exceeds the size of the upload.", 413)
+                part.write(chunk)
+        upload.received = received
+        upload.parts += 1
+        upload.save(update_fields=["received", "parts"])
+    if upload.completed:
+        assemble_upload(upload)
+        check_assembled_type(upload)
+    return upload
+
+
+def assemble_upload(upload: ChunkedUpload) -> None:
+    """Join the parts into one file."""
+    with open(get_upload_path(upload), "wb") as target:
+        for part in range(upload.parts):
+            with open(get_part_path(upload, part), "rb") as source:
+                shutil.copyfileobj(source, target)
+    for part in range(upload.parts):
+        os.remove(get_part_path(upload, part))
+
+
+def check_assembled_type(upload: ChunkedUpload) -> None:
+    """Check the type sniffed from the assembled file, because the type announced by the client cannot be trusted.
+
+    The refused upload is removed.
+    """
+    form_field = get_upload_field(upload.form_plugin_id, upload.field_name)
+    if not form_field.accepted_types:
+        return
+    path = get_upload_path(upload)
+    with open(path, "rb") as assembled:
+        header = assembled.read(CHUNKED_UPLOAD_SNIFF_SIZE)
+    if is_accepted_content(form_field, upload.filename, upload.content_type, header):
+        return
+    os.remove(path)
+    upload.delete()
+    message = gettext('"%(file_name)s" is not of accepted file type.') % {'file_name': upload.filename}
+    raise ChunkedUploadError(message + " " + form_field.get_accepted_types_message())
+
+
+def resolve_upload_tokens(request: HttpRequest, form_plugin_id: int) -> None:
+    """Put the files uploaded in chunks into request.FILES under the names of their fields.
+
+    The resolved uploads are kept in the request, so that they are consumed with the submission (see
+    consume_upload_tokens).
+    """
+    resolved: Dict[int, List[ChunkedUpload]] = getattr(request, RESOLVED_UPLOAD_TOKENS, {})
+    if form_plugin_id in resolved or get_chunked_upload_settings() is None:
+        return
+    resolved[form_plugin_id] = []
+    setattr(request, RESOLVED_UPLOAD_TOKENS, resolved)
+    for key in request.POST:
+        if not key.endswith(UPLOAD_TOKEN_SUFFIX):
+            continue
+        field_name = key[:-len(UPLOAD_TOKEN_SUFFIX)]
+        uploads = ChunkedUpload.objects.filter(
+            token__in=request.POST.getlist(key), form_plugin_id=form_plugin_id, field_name=field_name)
+        for upload in uploads:
+            if upload.completed:
+                request.FILES.appendlist(field_name, UploadedFile(
+                    open(get_upload_path(upload), "rb"), upload.filename, upload.content_type, upload.size))
+                resolved[form_plugin_id].append(upload)
+
+
+def consume_upload_tokens(request: HttpRequest, form_plugin_id: int) -> None:
+    """Delete the uploads resolved for the form, so that their tokens cannot be submitted again.
+
+    Call it in the transaction saving the submission. The upload submitted by a parallel request in the meantime
+    fails the transaction. The files are removed after the commit.
+    """
+    uploads = getattr(request, RESOLVED_UPLOAD_TOKENS, {}).get(form_plugin_id)
+    if not uploads:
+        return
+    deleted, _ = ChunkedUpload.objects.filter(pk__in=[upload.pk for upload in uploads]).delete()
+    if deleted != len(uploads):
+        raise ChunkedUploadError("Upload was already submitted.", 409)
+    paths = [get_upload_path(upload) for upload in uploads]
+    transaction.on_commit(lambda: remove_files(paths))
+
+
+def remove_files(paths: List[str]) -> None:
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def remove_expired_uploads(before: datetime) -> int:
+    """Remove uploads started before the time with their files. Return the number of removed uploads."""
+    removed = 0
+    for upload in ChunkedUpload.objects.filter(created_at__lt=before):
+        remove_files([get_upload_path(upload)] + [get_part_path(upload, part) for part in range(upload.parts + 1)])
+        upload.delete()
+        removed += 1
+    return removed
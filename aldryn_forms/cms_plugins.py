@@ -10,9 +10,11 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.admin import TabularInline
 from django.core.validators import MinLengthValidator
+from django.db import transaction
 from django.db.models import query
 from django.http import HttpRequest
 from django.template.loader import select_template
+from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils.translation import get_language, gettext
 from django.utils.translation import gettext_lazy as _
@@ -26,10 +28,13 @@ import markdown
 from emailit.api import send_mail
 from emailit.utils import get_template_names
 from filer.models import filemodels, imagemodels
-from PIL import Image
 
-from . import models
-from .constants import ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION, ALDRYN_FORMS_POST_IDENT_NAME, MAX_IDENT_SIZE
+from . import duplicates, models
+from .chunked import consume_upload_tokens, get_chunked_upload_settings, resolve_upload_tokens
+from .constants import (
+    ALDRYN_FORMS_HONEYPOT_SKIP_PERSISTENCE, ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION, ALDRYN_FORMS_POST_IDENT_NAME,
+    MAX_IDENT_SIZE,
+)
 from .forms import (
     BooleanFieldForm, CaptchaFieldForm, DateFieldForm, DateTimeFieldForm, EmailFieldForm, FileFieldForm, FormPluginForm,
     FormSubmissionBaseForm, HiddenFieldForm, ImageFieldForm, MultipleSelectFieldForm, RadioFieldForm,
@@ -40,6 +45,12 @@ from .helpers import get_user_name
 from .models import FieldPluginBase, SerializedFormField, SubmittedToBeSent
 from .signals import form_post_save, form_pre_save
 from .sizefield.utils import filesizeformat
+from .spam import count_honeypot_hit
+from .staging import StagedFile, is_deferred_upload_enabled, link_staged_uploads, stage_upload
+from .throttling import RATE_LIMIT_MESSAGE, is_rate_limited
+from .uploads import (
+    find_duplicate, get_filer_file_fields, get_upload_digest, get_upload_info, is_deduplication_enabled, record_digest,
+)
 from .utils import get_action_backends
 from .validators import MaxChoicesValidator, MinChoicesValidator, is_valid_recipient
 
@@ -113,6 +124,21 @@ class FormPlugin(FieldContainer):
         if instance.error_message:
             form._add_error(message=instance.error_message)
 
+    def form_spam(self, instance: models.FormPlugin, request: HttpRequest, form: FormSubmissionBaseForm) -> None:
+        """Count the honeypot hit instead of saving the submission."""
+        count_honeypot_hit(instance.name)
+        self.send_success_message(instance, request)
+
+    def form_duplicate(
+        self, instance: models.FormPlugin, request: HttpRequest, form: FormSubmissionBaseForm, post_ident: Optional[str]
+    ) -> None:
+        """Respond to the duplicate submission the same way as to the original one."""
+        if post_ident is not None:
+            form.cleaned_data[ALDRYN_FORMS_POST_IDENT_NAME] = post_ident
+            form.instance.post_ident = post_ident
+        logger.info(f'Duplicate submission of form "{instance.name}" ignored.')
+        self.send_success_message(instance, request)
+
     def process_form(self, instance: models.FormPlugin, request: HttpRequest) -> FormSubmissionBaseForm:
         PROCESSED_FORM = "aldryn_forms_processed_forms"
         processed_forms_dict = getattr(request, PROCESSED_FORM, {})
@@ -120,6 +146,10 @@ class FormPlugin(FieldContainer):
         if processed_form is not None:
             return processed_form  # Form was already processed by middleware HandleHttpPost.
 
+        is_submitted = request.POST.get('form_plugin_id') == str(instance.id)
+        # Check the rate before the form class is built and validated.
+        rate_limited = is_submitted and is_rate_limited(request, instance.pk)
+
         form_class = self.get_form_class(instance)
         form_kwargs = self.get_form_kwargs(instance, request)
         form = form_class(**form_kwargs)  # django.forms.widgets.AldrynDynamicForm
@@ -128,36 +158,64 @@ class FormPlugin(FieldContainer):
         processed_forms_dict[instance.pk] = form
         setattr(request, PROCESSED_FORM, processed_forms_dict)
 
+        if rate_limited:
+            # The error prevents validation of the form.
+            form._add_error(message=RATE_LIMIT_MESSAGE)
+            return form
+
         # Put files into fields.
         if form.files:
             for input_name in form.files.keys():
                 if input_name in form.fields:
                     form.fields[input_name].files = form.files.getlist(input_name)
 
-        if request.POST.get('form_plugin_id') == str(instance.id) and form.is_valid():
+        if is_submitted and form.is_valid():
             if self.ident_field_name:
                 form.cleaned_data[self.ident_field_name] = request.POST.get(self.ident_field_name, "")[:MAX_IDENT_SIZE]
             fields = [field for field in form.base_fields.values()
                       if hasattr(field, '_plugin_instance')]
 
             form.instance.honeypot_filled = self.honeypot_filled
+            if self.honeypot_filled and getattr(settings, ALDRYN_FORMS_HONEYPOT_SKIP_PERSISTENCE, False):
+                # Skip uploads, notifications and saving entirely.
+                self.form_spam(instance, request, form)
+                return form
+
+            duplicate_key = None
+            if duplicates.get_duplicate_window():
+                duplicate_key = duplicates.get_submission_key(request, form)
+                if not duplicates.claim_submission(duplicate_key):
+                    self.form_duplicate(instance, request, form, duplicates.get_duplicate_post_ident(duplicate_key))
+                    return form
 
-            # pre save field hooks
-            for field in fields:
-                field._plugin_instance.form_pre_save(
-                    instance=field._model_instance,
-                    form=form,
-                    request=request,
-                )
-
-            form_pre_save.send(
-                sender=models.FormPlugin,
-                instance=instance,
-                form=form,
-                request=request,
-            )
-
-            self.form_valid(instance, request, form)
+            try:
+                with transaction.atomic():
+                    # pre save field hooks
+                    for field in fields:
+                        field._plugin_instance.form_pre_save(
+                            instance=field._model_instance,
+                            form=form,
+                            request=request,
+                        )
+
+                    form_pre_save.send(
+                        sender=models.FormPlugin,
+                        instance=instance,
+                        form=form,
+                        request=request,
+                    )
+
+                    self.form_valid(instance, request, form)
+                    # The files uploaded in chunks are consumed with the submission.
+                    consume_upload_tokens(request, instance.pk)
+            except Exception:
+                # Let the client send the submission again.
+                if duplicate_key is not None:
+                    duplicates.release_submission(duplicate_key)
+                raise
+            if duplicate_key is not None:
+                post_ident = form.cleaned_data.get(ALDRYN_FORMS_POST_IDENT_NAME) or form.instance.post_ident
+                duplicates.store_submission(duplicate_key, post_ident)
 
             # post save field hooks
             for field in fields:
@@ -173,7 +231,7 @@ class FormPlugin(FieldContainer):
                 form=form,
                 request=request,
             )
-        elif request.POST.get('form_plugin_id') == str(instance.id) and request.method == 'POST':
+        elif is_submitted and request.method == 'POST':
             # only call form_invalid if request is POST and form is not valid
             self.form_invalid(instance, request, form)
 
@@ -211,6 +269,7 @@ class FormPlugin(FieldContainer):
             kwargs['data'] = request.POST.copy()
             kwargs['data']['language'] = instance.language
             kwargs['data']['form_plugin_id'] = instance.pk
+            resolve_upload_tokens(request, instance.pk)
             kwargs['files'] = request.FILES
         return kwargs
 
@@ -241,6 +300,7 @@ class FormPlugin(FieldContainer):
         return SubmittedToBeSent.objects.create(
             name=form.instance.name,
             data=form.instance.data,
+            schema=form.instance.schema,
             recipients=form.instance.recipients,
             language=form.instance.language,
             form_url=form.instance.form_url,
@@ -266,12 +326,12 @@ class FormPlugin(FieldContainer):
             new_instance = self.save_new_submission(form, post_ident)
             new_instance.webhooks.set(instance.webhooks.all())
         else:
-            try:
-                previous_submit = SubmittedToBeSent.objects.get(post_ident=post_ident)
-                form.append_into_previous_submission(previous_submit)
-            except SubmittedToBeSent.DoesNotExist:
-                new_instance = self.save_new_submission(form, post_ident)
-                new_instance.webhooks.set(instance.webhooks.all())
+            submission, created = form.get_or_create_submission(
+                SubmittedToBeSent, post_ident, lambda: self.save_new_submission(form, post_ident))
+            if created:
+                submission.webhooks.set(instance.webhooks.all())
+            else:
+                form.append_into_previous_submission(submission)
 
         return users_notified
 
@@ -854,12 +914,16 @@ class FileField(Field):
             attrs['data-max_size'] = instance.max_size
         if instance.enable_js:
             attrs['data-enable_js'] = "on"
+        options = get_chunked_upload_settings()
+        if options is not None:
+            attrs['data-chunked_upload_url'] = reverse('aldryn_forms_chunked_upload_start')
+            attrs['data-chunk_size'] = options['chunk_size']
         return attrs
 
     def get_form_field_kwargs(self, instance):
         kwargs = super().get_form_field_kwargs(instance)
         if instance.max_size:
-            if 'help_text' in kwargs:
+            if kwargs.get('help_text'):
                 kwargs['help_text'] = kwargs['help_text'].replace(
                     'MAXSIZE', filesizeformat(instance.max_size))
             kwargs['max_size'] = instance.max_size
@@ -877,34 +941,36 @@ class FileField(Field):
     def form_pre_save(self, instance, form, **kwargs):
         """Save the uploaded file to django-filer
 
-        The type of model (file or image) is automatically chosen by trying to
-        open the uploaded file.
+        The type of model (file or image) is automatically chosen by the type
+        sniffed from the header of the uploaded file. With the deduplication,
+        a file with the same content already stored in the folder is reused.
         """
         request = kwargs['request']
 
         filer_file_instances = []
         field_name = form.form_plugin.get_form_field_name(field=instance)
 
+        deferred = is_deferred_upload_enabled()
+        deduplicate = is_deduplication_enabled()
         for uploaded_file in request.FILES.getlist(field_name):
-            if uploaded_file.content_type == 'image/svg+xml':
-                model = imagemodels.Image
-            else:
-                try:
-                    with Image.open(uploaded_file) as img:
-                        img.verify()
-                except:  # noqa
-                    model = filemodels.File
-                else:
-                    model = imagemodels.Image
-
-            filer_file = model(
-                folder=instance.upload_to,
-                file=uploaded_file,
-                name=uploaded_file.name,
-                original_filename=uploaded_file.name,
-                is_public=True,
-            )
-            filer_file.save()
+            filer_file = find_duplicate(get_upload_digest(uploaded_file), instance.upload_to) if deduplicate else None
+            if filer_file is None:
+                if deferred:
+                    # The file is moved into filer by the aldryn_forms_ingest_uploads command.
+                    filer_file_instances.append(stage_upload(uploaded_file, instance.upload_to, request))
+                    continue
+                model = imagemodels.Image if get_upload_info(uploaded_file).is_image else filemodels.File
+                filer_file = model(
+                    folder=instance.upload_to,
+                    file=uploaded_file,
+                    name=uploaded_file.name,
+                    original_filename=uploaded_file.name,
+                    is_public=True,
+                    **get_filer_file_fields(uploaded_file),
+                )
+                filer_file.save()
+                if deduplicate:
+                    record_digest(filer_file, get_upload_digest(uploaded_file))
 
             # NOTE: This is a hack to make the full URL available later when we
             # need to serialize this field. We avoid to serialize it here directly
@@ -914,6 +980,20 @@ class FileField(Field):
 
         form.cleaned_data[field_name] = filer_file_instances
 
+    def form_post_save(self, instance, form, **kwargs):
+        """Link the staged uploads to the saved submission, so that only its rows are patched after the ingestion."""
+        field_name = form.form_plugin.get_form_field_name(field=instance)
+        tokens = [item.token for item in form.cleaned_data.get(field_name) or [] if isinstance(item, StagedFile)]
+        if not tokens:
+            return
+        post_ident = form.cleaned_data.get(ALDRYN_FORMS_POST_IDENT_NAME) or form.instance.post_ident
+        submission_id = form.instance.pk
+        if submission_id is None and post_ident:
+            # The post was appended as a step into the previous submission.
+            submission_id = models.FormSubmission.objects.filter(post_ident=post_ident).values_list(
+                'pk', flat=True).first()
+        link_staged_uploads(tokens, post_ident, submission_id)
+
 
 class MultipleFilesField(FileField):
 
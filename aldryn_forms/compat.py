@@ -12,3 +12,8 @@ try:
     from cms.utils.plugins import build_plugin_tree
 except ImportError:
     from cms.utils.plugins import get_plugins_as_layered_tree as build_plugin_tree  # noqa
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads  # noqa
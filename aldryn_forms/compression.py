@@ -0,0 +1,182 @@
+import base64
+import time
+import zlib
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Pattern
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from .constants import ALDRYN_FORMS_COMPRESSION, COMPRESSED_PREFIX, COMPRESSION_THRESHOLD, STAGED_UPLOAD_PREFIX
+
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSED_FIELDS = ("data", "recipients")
+
+
+class Codec(NamedTuple):
+    compress: Callable[[bytes, Optional[int]], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+CODECS = {
+    "zlib": Codec(lambda data, level: zlib.compress(data, -1 if level is None else level), zlib.decompress),
+}
+if zstandard is not None:
+    CODECS["zstd"] = Codec(
+        lambda data, level: zstandard.ZstdCompressor(level=3 if level is None else level).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+
+
+class CompressionResult(NamedTuple):
+    """Number of compressed records and the size of their fields in characters before and after."""
+
+    count: int
+    size_before: int
+    size_after: int
+
+
+class BenchmarkResult(NamedTuple):
+    """Average time of get_form_data in milliseconds of plain and compressed data."""
+
+    count: int
+    plain: float
+    compressed: float
+
+
+def get_compression_settings() -> Optional[Dict[str, Any]]:
+    """Get settings of the compression. None if it is not enabled. Zstandard is used if it is installed."""
+    options = getattr(settings, ALDRYN_FORMS_COMPRESSION, None)
+    if options is None:
+        return None
+    return {
+        "algorithm": "zlib" if zstandard is None else "zstd",
+        "threshold": COMPRESSION_THRESHOLD,
+        "level": None,
+        **options,
+    }
+
+
+def is_compressed(text: str) -> bool:
+    return text.startswith(COMPRESSED_PREFIX)
+
+
+def compress_text(text: str, options: Optional[Dict[str, Any]] = None) -> str:
+    """Compress the text longer than the threshold. The result starts with the marker of the algorithm.
+
+    Texts with staged uploads are not compressed, because their links are replaced in the database.
+    """
+    options = options or get_compression_settings()
+    if options is None or len(text) < options["threshold"] or is_compressed(text) or STAGED_UPLOAD_PREFIX in text:
+        return text
+    algorithm = options["algorithm"]
+    payload = CODECS[algorithm].compress(text.encode(), options["level"])
+    compressed = f"{COMPRESSED_PREFIX}{algorithm}:{base64.b85encode(payload).decode('ascii')}"
+    return compressed if len(compressed) < len(text) else text
+
+
+def decompress_text(text: str) -> str:
+    """Decompress the text with the marker. Other texts are returned as they are. Raise ValueError on invalid data."""
+    if not is_compressed(text):
+        return text
+    algorithm, _, payload = text[len(COMPRESSED_PREFIX):].partition(":")
+    if algorithm not in CODECS:
+        raise ValueError(f"Compression {algorithm} is not available.")
+    try:
+        return CODECS[algorithm].decompress(base64.b85decode(payload)).decode()
+    except Exception as error:
+        raise ValueError(f"Compressed data are not valid: {error}") from error
+
+
+def search_compressed(queryset: QuerySet, words: List[str], pattern: Optional[Pattern] = None) -> List[int]:
+    """Get the primary keys of the records with compressed data containing all words or matching the pattern.
+
+    The compressed data are decompressed in chunks, so the search reads all compressed records of the queryset.
+    """
+    words = [word.lower() for word in words]
+    matches = []
+    compressed = queryset.filter(data__startswith=COMPRESSED_PREFIX).values_list("pk", "data")
+    for pk, data in compressed.iterator(chunk_size=500):
+        try:
+            text = decompress_text(data)
+        except ValueError:
+            continue
+        lowered = text.lower()
+        if (words and all(word in lowered for word in words)) or (pattern is not None and pattern.search(text)):
+            matches.append(pk)
+    return matches
+
+
+def compress_records(queryset: QuerySet, batch_size: int = 500, dry_run: bool = False) -> CompressionResult:
+    """Compress data and recipients of the records longer than the threshold in batches ordered by the primary key.
+
+    In the dry run nothing is saved and only the sizes are computed. Records changed since they were read are skipped.
+    """
+    options = get_compression_settings()
+    if options is None:
+        return CompressionResult(0, 0, 0)
+    condition = Q()
+    for field in COMPRESSED_FIELDS:
+        condition |= Q(**{f"{field}_length__gte": options["threshold"]}) & ~Q(
+            **{f"{field}__startswith": COMPRESSED_PREFIX})
+    candidates = queryset.annotate(
+        **{f"{field}_length": Length(field) for field in COMPRESSED_FIELDS}).filter(condition).order_by("pk")
+    count, size_before, size_after, last_pk = 0, 0, 0, 0
+    while True:
+        batch = list(candidates.filter(pk__gt=last_pk).only("pk", *COMPRESSED_FIELDS)[:batch_size])
+        if not batch:
+            return CompressionResult(count, size_before, size_after)
+        last_pk = batch[-1].pk
+        changed = []
+        for record in batch:
+            before = [getattr(record, field) for field in COMPRESSED_FIELDS]
+            after = [compress_text(value, options) for value in before]
+            if before == after:
+                continue
+            for field, value in zip(COMPRESSED_FIELDS, after):
+                setattr(record, field, value)
+            changed.append((record, before))
+            size_before += sum(map(len, before))
+            size_after += sum(map(len, after))
+        if dry_run:
+            count += len(changed)
+            continue
+        for record, before in changed:
+            # The record is updated only if it was not changed since it was read, e.g. by merged steps.
+            unchanged = dict(zip(COMPRESSED_FIELDS, before))
+            values = {field: getattr(record, field) for field in COMPRESSED_FIELDS}
+            updated = queryset.model.objects.filter(pk=record.pk, **unchanged).update(
+                **values, updated_at=timezone.now())
+            if not updated:
+                size_before -= sum(map(len, before))
+                size_after -= sum(map(len, values.values()))
+                continue
+            count += 1
+
+
+def benchmark_decoding(queryset: QuerySet, sample: int = 100) -> BenchmarkResult:
+    """Measure get_form_data of the sample of records with plain and with compressed data."""
+    options = {**(get_compression_settings() or {"algorithm": "zlib", "level": None}), "threshold": 0}
+    plain_time, compressed_time, count = 0.0, 0.0, 0
+    for record in queryset.order_by("-pk")[:sample]:
+        plain = decompress_text(record.data)
+        for data, compressed in ((plain, False), (compress_text(plain, options), True)):
+            record.data = data
+            start = time.perf_counter()
+            record.get_form_data()
+            elapsed = time.perf_counter() - start
+            if compressed:
+                compressed_time += elapsed
+            else:
+                plain_time += elapsed
+        count += 1
+    if not count:
+        return BenchmarkResult(0, 0.0, 0.0)
+    return BenchmarkResult(count, plain_time * 1000 / count, compressed_time * 1000 / count)
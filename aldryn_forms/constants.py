@@ -10,6 +10,65 @@ MAX_IDENT_SIZE = 64
 
 ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION = "ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION"
 
+ALDRYN_FORMS_HONEYPOT_SKIP_PERSISTENCE = "ALDRYN_FORMS_HONEYPOT_SKIP_PERSISTENCE"
+SPAM_COUNTER_PREFIX = "aldryn_forms_spam"
+SPAM_COUNTER_DAYS = 7
+
+ALDRYN_FORMS_RATE_LIMIT = "ALDRYN_FORMS_RATE_LIMIT"
+RATE_LIMIT_PREFIX = "aldryn_forms_rate"
+RATE_LIMIT_PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+ALDRYN_FORMS_DUPLICATE_SUBMISSION_WINDOW = "ALDRYN_FORMS_DUPLICATE_SUBMISSION_WINDOW"
+DUPLICATE_SUBMISSION_PREFIX = "aldryn_forms_duplicate"
+IDEMPOTENCY_KEY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+
+ALDRYN_FORMS_DEFERRED_UPLOADS = "ALDRYN_FORMS_DEFERRED_UPLOADS"
+ALDRYN_FORMS_UPLOADS_STAGING_DIR = "ALDRYN_FORMS_UPLOADS_STAGING_DIR"
+STAGED_UPLOAD_PREFIX = "aldryn-forms-staged-upload:"
+
+ALDRYN_FORMS_DEDUPLICATE_UPLOADS = "ALDRYN_FORMS_DEDUPLICATE_UPLOADS"
+
+ALDRYN_FORMS_CHUNKED_UPLOADS = "ALDRYN_FORMS_CHUNKED_UPLOADS"
+CHUNKED_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+CHUNKED_UPLOAD_EXPIRATION = 24 * 60 * 60
+CHUNKED_UPLOAD_MAX_SIZE = 1024 * 1024 * 1024
+CHUNKED_UPLOAD_MAX_TOTAL_SIZE = 10 * 1024 * 1024 * 1024
+CHUNKED_UPLOAD_SNIFF_SIZE = 64 * 1024
+UPLOAD_TOKEN_SUFFIX = "_upload_token"
+
+ALDRYN_FORMS_RETENTION_POLICIES = "ALDRYN_FORMS_RETENTION_POLICIES"
+RETENTION_POLICY_DEFAULT = "*"
+
+ALDRYN_FORMS_ARCHIVE = "ALDRYN_FORMS_ARCHIVE"
+
+ALDRYN_FORMS_PARTITIONING = "ALDRYN_FORMS_PARTITIONING"
+
+ALDRYN_FORMS_COMPACT_DATA = "ALDRYN_FORMS_COMPACT_DATA"
+
+ALDRYN_FORMS_COMPRESSION = "ALDRYN_FORMS_COMPRESSION"
+COMPRESSED_PREFIX = "~"
+COMPRESSION_THRESHOLD = 1024
+
+ALDRYN_FORMS_API_CACHE = "ALDRYN_FORMS_API_CACHE"
+API_CACHE_PREFIX = "aldryn_forms_api"
+API_CACHE_TIMEOUT = 300
+
+ALDRYN_FORMS_STATISTICS = "ALDRYN_FORMS_STATISTICS"
+STATISTICS_DAYS = 7
+
+ALDRYN_FORMS_ANSWER_COUNTS = "ALDRYN_FORMS_ANSWER_COUNTS"
+
+ALDRYN_FORMS_SUBMISSION_LIST_DISPLAY_FIELD = "ALDRYN_FORMS_SUBMISSION_LIST_DISPLAY_FIELD"
+
+ALDRYN_FORMS_ADMIN_LARGE_TABLE = "ALDRYN_FORMS_ADMIN_LARGE_TABLE"
+LARGE_TABLE_CACHE_PREFIX = "aldryn_forms_admin"
+LARGE_TABLE_EXACT_COUNT_LIMIT = 10000
+LARGE_TABLE_NAMES_TIMEOUT = 300
+
+SELECTION_CACHE_PREFIX = "aldryn_forms_admin_selection"
+SELECTION_TIMEOUT = 60 * 60
+SELECTION_CHUNK_SIZE = 500
+
 WEBHOOK_METHODS = (
     ('post', 'POST'),
     ('json', 'JSON'),
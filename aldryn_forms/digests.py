@@ -0,0 +1,145 @@
+import logging
+from typing import Iterator, List, NamedTuple, Set
+from urllib.parse import urlparse
+
+from django.db.models import Count, Min
+
+from filer.models import filemodels
+
+from .models import (
+    FileDigest, FileReference, FileUploadFieldPlugin, ImageUploadFieldPlugin, MultipleFilesUploadFieldPlugin,
+)
+from .references import relink_file
+from .uploads import UploadDigest, hash_file, record_digest
+
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateGroup(NamedTuple):
+    """Files with the same content in the folder. The original is the oldest file."""
+
+    original_id: int
+    folder_id: int
+    sha256: str
+    size: int
+    count: int
+
+
+def get_upload_folder_ids() -> Set[int]:
+    """Get the folders used by the upload fields."""
+    folder_ids = set()
+    for model in (FileUploadFieldPlugin, MultipleFilesUploadFieldPlugin, ImageUploadFieldPlugin):
+        folder_ids.update(model.objects.values_list("upload_to_id", flat=True))
+    return folder_ids
+
+
+def hash_filer_file(filer_file: filemodels.File) -> UploadDigest:
+    """Compute the hashes of the file in the storage."""
+    filer_file.file.open("rb")
+    try:
+        return hash_file(filer_file.file)
+    finally:
+        filer_file.file.close()
+
+
+def get_files_without_digest(folder_ids: Set[int]):
+    """Get the files in the folders that were not hashed yet."""
+    return (
+        filemodels.File.objects.non_polymorphic()
+        .filter(folder_id__in=folder_ids)
+        .exclude(pk__in=FileDigest.objects.values("file_id"))
+    )
+
+
+def digest_missing_files(folder_ids: Set[int], batch_size: int) -> int:
+    """Store the digests of the files in the folders that were uploaded before the deduplication was enabled."""
+    digested, last_pk = 0, 0
+    while True:
+        batch = list(
+            get_files_without_digest(folder_ids).filter(pk__gt=last_pk).order_by("pk")[:batch_size]
+        )
+        if not batch:
+            return digested
+        for filer_file in batch:
+            try:
+                record_digest(filer_file, hash_filer_file(filer_file))
+                digested += 1
+            except OSError as error:
+                logger.error(f'File "{filer_file.file.name}" was not hashed: {error}')
+        last_pk = batch[-1].pk
+
+
+def get_duplicate_groups(folder_ids: Set[int]) -> Iterator[DuplicateGroup]:
+    """Get the groups of files with the same content in the same folder."""
+    groups = (
+        FileDigest.objects.filter(file__folder_id__in=folder_ids)
+        .values("file__folder_id", "sha256", "size")
+        .annotate(count=Count("pk"), original_id=Min("file_id"))
+        .filter(count__gt=1)
+        .order_by("original_id")
+    )
+    for group in groups.iterator():
+        yield DuplicateGroup(
+            group["original_id"], group["file__folder_id"], group["sha256"], group["size"], group["count"])
+
+
+def get_duplicates(group: DuplicateGroup, batch_size: int, last_pk: int = 0) -> List[filemodels.File]:
+    """Get the next batch of the duplicates of the original file."""
+    file_ids = FileDigest.objects.filter(sha256=group.sha256, size=group.size).values("file_id")
+    return list(
+        filemodels.File.objects.non_polymorphic()
+        .filter(pk__in=file_ids, folder_id=group.folder_id, pk__gt=last_pk)
+        .exclude(pk=group.original_id)
+        .order_by("pk")[:batch_size]
+    )
+
+
+def is_used_elsewhere(filer_file: filemodels.File) -> bool:
+    """Check whether a model other than the form submissions references the filer file, e.g. a plugin or a
+    clipboard.
+    """
+    model = filer_file.get_real_instance_class() or type(filer_file)
+    for opts in [model._meta] + [parent._meta for parent in model._meta.get_parent_list()]:
+        for field in opts.get_fields(include_hidden=True):
+            if not field.auto_created or field.concrete or getattr(field, "parent_link", False):
+                continue
+            if field.related_model is FileDigest:
+                continue
+            if field.related_model._base_manager.filter(**{field.field.name: filer_file.pk}).exists():
+                return True
+    return False
+
+
+def is_reclaimable(filer_file: filemodels.File) -> bool:
+    """Check whether the file is linked in the submissions only."""
+    path = urlparse(filer_file.url).path
+    return FileReference.objects.filter(path=path).exists() and not is_used_elsewhere(filer_file)
+
+
+def iter_reclaimable_duplicates(group: DuplicateGroup, batch_size: int) -> Iterator[filemodels.File]:
+    """Get the duplicates of the original file that are linked in the submissions only."""
+    last_pk = 0
+    while True:
+        duplicates = get_duplicates(group, batch_size, last_pk)
+        if not duplicates:
+            return
+        # The yielded duplicates can be deleted.
+        last_pk = duplicates[-1].pk
+        for duplicate in duplicates:
+            if is_reclaimable(duplicate):
+                yield duplicate
+
+
+def reclaim_duplicates(group: DuplicateGroup, batch_size: int) -> int:
+    """Link the original file in the submissions instead of the duplicates and delete the duplicates.
+
+    The duplicates used outside of the submissions are kept. Return the number of deleted files.
+    """
+    original = filemodels.File.objects.non_polymorphic().get(pk=group.original_id)
+    deleted = 0
+    for duplicate in iter_reclaimable_duplicates(group, batch_size):
+        relink_file(urlparse(duplicate.url).path, urlparse(original.url).path)
+        duplicate.delete()
+        deleted += 1
+    return deleted
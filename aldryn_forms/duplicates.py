@@ -0,0 +1,71 @@
+import hashlib
+import json
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import UploadedFile
+from django.forms import Form
+from django.http import HttpRequest
+
+from .constants import ALDRYN_FORMS_DUPLICATE_SUBMISSION_WINDOW, DUPLICATE_SUBMISSION_PREFIX, IDEMPOTENCY_KEY_HEADER
+from .throttling import get_client_key
+
+
+# Value of the key while the first submission is still being processed.
+PENDING = ""
+
+
+def get_duplicate_window() -> int:
+    """Get the number of seconds in which the same submission is considered a duplicate. Zero means disabled."""
+    return getattr(settings, ALDRYN_FORMS_DUPLICATE_SUBMISSION_WINDOW, 0)
+
+
+def normalize_value(value: Any) -> Any:
+    """Normalize the cleaned value into a JSON-serializable form."""
+    if isinstance(value, UploadedFile):
+        return [value.name, value.size]
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return str(value)
+
+
+def get_submission_key(request: HttpRequest, form: Form) -> str:
+    """Get the key of the submission.
+
+    The key is the Idempotency-Key header sent by the client, or the hash of the normalized cleaned data.
+    Both are combined with the form id and the client key.
+    """
+    form_plugin_id = form.form_plugin.pk
+    idempotency_key = request.META.get(IDEMPOTENCY_KEY_HEADER)
+    if idempotency_key:
+        content = f"key:{idempotency_key}"
+    else:
+        data = {name: normalize_value(value) for name, value in form.cleaned_data.items() if name != "language"}
+        content = "data:" + json.dumps(data, sort_keys=True, default=str)
+    digest = hashlib.sha256(f"{form_plugin_id}:{get_client_key(request, form_plugin_id)}:{content}".encode())
+    return f"{DUPLICATE_SUBMISSION_PREFIX}:{digest.hexdigest()}"
+
+
+def claim_submission(key: str) -> bool:
+    """Claim the submission. Return False if the same submission was already claimed within the window."""
+    return cache.add(key, PENDING, get_duplicate_window())
+
+
+def get_duplicate_post_ident(key: str) -> Optional[str]:
+    """Get post_ident of the original submission."""
+    return cache.get(key) or None
+
+
+def store_submission(key: str, post_ident: Optional[str]) -> None:
+    """Store post_ident of the processed submission, so that duplicates are redirected the same way."""
+    cache.set(key, post_ident or PENDING, get_duplicate_window())
+
+
+def release_submission(key: str) -> None:
+    """Release the claim, so that the submission can be sent again."""
+    cache.delete(key)
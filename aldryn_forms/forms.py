@@ -1,25 +1,28 @@
 import json
 import re
-from typing import Dict, List, Optional
+from typing import Callable, Optional, Tuple, Type
 
 from django import forms
 from django.conf import settings
 from django.core import validators
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.forms.forms import NON_FIELD_ERRORS
 from django.forms.utils import ErrorDict
 from django.forms.widgets import ClearableFileInput
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django.utils.module_loading import import_string
 from django.utils.translation import gettext
 from django.utils.translation import gettext_lazy as _
 
 from easy_thumbnails.VIL import Image as VILImage
-from PIL import Image
 
 from .constants import ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION, ALDRYN_FORMS_POST_IDENT_NAME, MAX_IDENT_SIZE
-from .models import FormSubmission, FormSubmissionBase
+from .models import FormSubmission, FormSubmissionBase, SubmissionStep, decode_form_data
+from .partitioning import lock_post_ident
 from .sizefield.utils import filesizeformat
+from .uploads import SVG_MIME_TYPE, UploadInfo, get_upload_info, set_upload_info
 from .utils import add_form_error, get_action_backends, get_user_model
 
 
@@ -32,6 +35,11 @@ class FileSizeCheckMixin:
         super().__init__(*args, **kwargs)
 
     def clean(self, *args, **kwargs):
+        # Files rejected by the upload handler while they were received.
+        upload_errors = [file.upload_error for file in self.files if getattr(file, 'upload_error', None)]
+        if upload_errors:
+            raise forms.ValidationError(" ".join(upload_errors))
+
         super().clean(*args, **kwargs)
 
         if not self.files:
@@ -41,40 +49,49 @@ class FileSizeCheckMixin:
 
         # Check file extension.
         if self.accepted_types:
-            accepted_types, main_mimetypes = self.split_mimetypes(self.accepted_types)
             errors = []
             for file_in_memory in self.files:
-                match = re.search(r'(\.\w+)$', file_in_memory.name.lower())
-                extension = match.group(1) if match else None  # '.csv'
-                if not (
-                    extension in self.accepted_types
-                    or file_in_memory.content_type in self.accepted_types  # noqa: W503 line break before bin operator
-                    or file_in_memory.content_type.split("/")[0] in main_mimetypes  # noqa: W503
-                ):
+                if not self.is_accepted_type(file_in_memory.name, file_in_memory.content_type):
                     errors.append(gettext('"%(file_name)s" is not of accepted file type.') % {
                         'file_name': file_in_memory.name})
             if errors:
-                all_errors.append(
-                    " ".join(errors) + " " + gettext("Accepted file types are") + ": " + ", ".join(
-                        self.accepted_types) + ".")
+                all_errors.append(" ".join(errors) + " " + self.get_accepted_types_message())
 
         # Check files size summary.
-        if self.max_size is not None:
-            errors = []
-            files_size_summary = 0
-            for file_in_memory in self.files:
-                files_size_summary += file_in_memory.size
-            if files_size_summary > self.max_size:
-                if len(self.files) > 1:
-                    msg = gettext('The total file size has exceeded the specified limit %(size)s.')
-                else:
-                    msg = gettext('File size exceeded the specified limit %(size)s.')
-                all_errors.append(msg % {'size': filesizeformat(self.max_size)})
+        error = self.check_files_size(sum(file_in_memory.size for file_in_memory in self.files), len(self.files))
+        if error is not None:
+            all_errors.append(error)
 
         if all_errors:
             raise forms.ValidationError(" ".join(all_errors))
         return self.files
 
+    def is_accepted_type(self, file_name: str, content_type: str) -> bool:
+        """Check the file extension or the mimetype."""
+        if not self.accepted_types:
+            return True
+        accepted_types, main_mimetypes = self.split_mimetypes(self.accepted_types)
+        match = re.search(r'(\.\w+)$', file_name.lower())
+        extension = match.group(1) if match else None  # '.csv'
+        return (
+            extension in self.accepted_types
+            or content_type in self.accepted_types  # noqa: W503 line break before bin operator
+            or content_type.split("/")[0] in main_mimetypes  # noqa: W503
+        )
+
+    def get_accepted_types_message(self) -> str:
+        return gettext("Accepted file types are") + ": " + ", ".join(self.accepted_types) + "."
+
+    def check_files_size(self, files_size_summary: int, number_of_files: int = 1) -> Optional[str]:
+        """Return the error message if the size of files exceeds the limit."""
+        if self.max_size is None or files_size_summary <= self.max_size:
+            return None
+        if number_of_files > 1:
+            msg = gettext('The total file size has exceeded the specified limit %(size)s.')
+        else:
+            msg = gettext('File size exceeded the specified limit %(size)s.')
+        return msg % {'size': filesizeformat(self.max_size)}
+
     def split_mimetypes(self, accepted_types):
         """Split mimetypes with wildcards."""
         # Example of accepted_types: ['.pdf', 'text/plain', 'application/msword', 'image/*', 'text/*']
@@ -148,7 +165,7 @@ class RestrictedMultipleFilesField(FileSizeCheckMixin, forms.FileField):
 
 
 def validate_image_and_svg_file_extension(value):
-    if value.content_type == 'image/svg+xml':
+    if value.content_type == SVG_MIME_TYPE:
         return True
     return validators.validate_image_file_extension(value)
 
@@ -172,26 +189,28 @@ class RestrictedImageField(FileSizeCheckMixin, forms.ImageField):
         if f is None:
             return None
 
-        if data.content_type == 'image/svg+xml':
+        if data.content_type == SVG_MIME_TYPE:
             image = VILImage.load(data)
             if image is None:
                 raise ValidationError(self.error_messages['invalid_image'], code='invalid_image')
             f.image = image
             f.content_type = data.content_type
+            set_upload_info(f, UploadInfo(True, SVG_MIME_TYPE, image.width, image.height, True))
             return f
-        return super().to_python(data)
+
+        # The type and dimensions are read from the header only. The image is not decoded.
+        info = get_upload_info(f)
+        if not info.is_image:
+            raise ValidationError(self.error_messages['invalid_image'], code='invalid_image')
+        f.content_type = info.mime_type
+        return f
 
     def _clean_image(self, data):
         if data is None or not any([self.max_width, self.max_height]):
             return data
 
-        if hasattr(data, 'image'):
-            # Django >= 1.8
-            width, height = data.image.size
-        else:
-            width, height = Image.open(data).size
-            # cleanup after ourselves
-            data.seek(0)
+        info = get_upload_info(data)
+        width, height = info.width, info.height
 
         if self.max_width and width > self.max_width:
             raise forms.ValidationError(
@@ -333,38 +352,81 @@ class FormSubmissionBaseForm(forms.Form):
         """Generate new post_ident."""
         return self.initial_post_ident if self.initial_post_ident else get_random_string(MAX_IDENT_SIZE)
 
-    def save_form_submission(self, post_ident: Optional[str]) -> None:
+    def save_form_submission(self, post_ident: Optional[str]) -> FormSubmission:
         """Save a new submission with unique ID."""
         self.instance.post_ident = post_ident
         self.instance.set_form_data(self)
         self.instance.save()
+        return self.instance
+
+    def get_or_create_submission(
+        self, model: Type[FormSubmissionBase], post_ident: str, create: Callable[[], FormSubmissionBase]
+    ) -> Tuple[FormSubmissionBase, bool]:
+        """Get the previous submission by post_ident or create a new one.
+
+        The first of parallel posts creates the submission. The others are appended into it. The posts are serialized
+        by the lock of the post_ident on PostgreSQL, where the partitioned table has no unique constraint of post_ident,
+        and by the unique constraint elsewhere.
+        """
+        try:
+            return model.objects.only('post_ident').get(post_ident=post_ident), False
+        except model.DoesNotExist:
+            pass
+        try:
+            with transaction.atomic():
+                lock_post_ident(model, post_ident)
+                previous = model.objects.only('post_ident').filter(post_ident=post_ident).first()
+                if previous is not None:
+                    return previous, False
+                return create(), True
+        except IntegrityError:
+            return model.objects.only('post_ident').get(post_ident=post_ident), False
 
     def append_into_previous_submission(self, previous_submit: FormSubmissionBase) -> None:
-        """Append post into previous submission."""
-        data: List[Dict[str, str]] = json.loads(previous_submit.data)
+        """Append post into previous submission as a new step.
+
+        The step is inserted without reading the data of the previous submission.
+        It is merged when the submission is finished (see FormSubmissionBase.merge_steps). The step is inserted under
+        the lock of the submission, so it is not lost while the post_ident expires (see expire_post_ident). If the
+        post_ident expired in the meantime, the fields are appended into the data directly.
+        """
         fields = self.get_serialized_fields(is_confirmation=False)
         fields_as_dicts = [field._asdict() for field in fields if field.name != ALDRYN_FORMS_POST_IDENT_NAME]
-        data.extend(fields_as_dicts)
-        previous_submit.data = json.dumps(data)
+        model = type(previous_submit)
+        with transaction.atomic():
+            current = model.objects.select_for_update().filter(pk=previous_submit.pk).first()
+            if current is None:
+                return
+            if current.post_ident == previous_submit.post_ident:
+                SubmissionStep.objects.create(
+                    submission_type=previous_submit._meta.model_name,
+                    post_ident=previous_submit.post_ident,
+                    data=json.dumps(fields_as_dicts),
+                )
+            else:
+                try:
+                    data = decode_form_data(current.data, current.schema_id)
+                except ValueError:
+                    data = []
+                current.set_data(data + fields_as_dicts)
+                current.save(update_fields=['data', 'schema', 'updated_at'])
         if self.instance.honeypot_filled:
             previous_submit.honeypot_filled = True
-        previous_submit.save()
+            type(previous_submit).objects.filter(pk=previous_submit.pk).update(
+                honeypot_filled=True, updated_at=timezone.now())
 
     def save(self, commit=False) -> FormSubmissionBase:
         """Save a new submission or append into a previous one."""
         post_ident = self.cleaned_data.get(ALDRYN_FORMS_POST_IDENT_NAME)
-        if post_ident is None:
+        if not post_ident:
             duration = getattr(settings, ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION, 0)
             post_ident = self.generate_post_ident() if duration else None
-            self.save_form_submission(post_ident)
-        else:
-            try:
-                previous_submit = FormSubmission.objects.get(post_ident=post_ident)
-                self.append_into_previous_submission(previous_submit)
-                return previous_submit
-            except FormSubmission.DoesNotExist:
-                self.save_form_submission(post_ident)
-        return self.instance
+            return self.save_form_submission(post_ident)
+        submission, created = self.get_or_create_submission(
+            FormSubmission, post_ident, lambda: self.save_form_submission(post_ident))
+        if not created:
+            self.append_into_previous_submission(submission)
+        return submission
 
 
 class ExtandableErrorForm(forms.ModelForm):
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now as django_timezone_now
+from django.utils.timezone import timedelta
+
+from aldryn_forms.archive import archive_submissions
+
+
+class Command(BaseCommand):
+    help = "Move submissions older than the cutoff into compressed archive segments per form name and month."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=180, help="Archive submissions older than the days.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report the counts. Nothing is archived.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Number of submissions deleted in one batch.")
+        parser.add_argument("--sleep", type=float, default=0.5, help="Seconds to sleep between batches.")
+
+    def handle(self, *args, **options):
+        before = django_timezone_now() - timedelta(days=options["days"])
+        segments = archive_submissions(before, options["batch_size"], options["sleep"], options["dry_run"])
+        if options["dry_run"] or options["verbosity"] > 1:
+            action = "Would archive" if options["dry_run"] else "Archived"
+            for segment in segments:
+                self.stdout.write(f"{segment.name} {segment.month:%Y-%m}: {action} {segment.count} submissions.")
@@ -0,0 +1,66 @@
+import gc
+import json
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from aldryn_forms.compat import json_loads
+from aldryn_forms.models import FormSubmission, SerializedFormField
+
+
+def decode_with_hooks(data):
+    """Decode the data by the object hook per field as get_form_data did before. Used as the baseline."""
+    occurrences = defaultdict(lambda: 1)
+
+    def hook(item):
+        field_label = item.get("label", "").strip()
+        key = f'{item.get("name", "").rpartition("_")[0]}_{field_label}' if field_label else item.get("name", "")
+        if key in occurrences:
+            occurrences[key] += 1
+        return SerializedFormField(item.get("name", ""), item.get("label", ""), occurrences[key], item.get("value", ""))
+
+    return json.loads(data, object_hook=hook)
+
+
+class Command(BaseCommand):
+    help = "Measure decoding of submission data by get_form_data on generated submissions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="Number of generated submissions.")
+        parser.add_argument("--fields", type=int, default=10, help="Number of fields of the generated form.")
+        parser.add_argument(
+            "--name", help="Use the data of the latest submission of the form instead of generated fields.")
+
+    def handle(self, *args, **options):
+        data = self.get_data(options["name"], options["fields"])
+        submissions = [FormSubmission(name="Benchmark", data=data) for _ in range(options["rows"])]
+
+        baseline = self.measure(lambda submission: decode_with_hooks(submission.data), submissions)
+        first = self.measure(FormSubmission.get_form_data, submissions)
+        cached = self.measure(FormSubmission.get_form_data, submissions)
+
+        self.stdout.write(f"Decoder: {json_loads.__module__}. Submissions: {len(submissions)}.")
+        for label, seconds in (("Object hooks", baseline), ("get_form_data", first), ("get_form_data cached", cached)):
+            self.stdout.write(f"{label}: {seconds:.3f} s ({len(submissions) / max(seconds, 1e-9):.0f} rows/s).")
+
+    def get_data(self, name, fields):
+        if name is not None:
+            submission = FormSubmission.objects.filter(name=name, post_ident__isnull=True).order_by("-pk").first()
+            if submission is not None:
+                return json.dumps([field._asdict() for field in submission.get_form_data()])
+        return json.dumps([
+            {"name": f"text_{index}", "label": f"Label of the field {index}", "value": f"Value of the field {index}"}
+            for index in range(1, fields + 1)
+        ])
+
+    def measure(self, decode, submissions):
+        # The garbage collector is disabled as in timeit, because the cached fields of all rows stay in memory.
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for submission in submissions:
+                decode(submission)
+            return time.perf_counter() - start
+        finally:
+            gc.enable()
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from aldryn_forms.compression import benchmark_decoding, compress_records, get_compression_settings
+from aldryn_forms.models import FormSubmission, SubmittedToBeSent
+from aldryn_forms.sizefield.utils import filesizeformat
+
+
+class Command(BaseCommand):
+    help = "Compress data and recipients of existing submissions above the threshold of ALDRYN_FORMS_COMPRESSION."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Number of submissions updated in one batch.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report the sizes. Nothing is saved.")
+        parser.add_argument(
+            "--benchmark", type=int, metavar="SAMPLE", default=0,
+            help="Measure get_form_data of the sample of submissions with plain and compressed data.")
+
+    def handle(self, *args, **options):
+        if get_compression_settings() is None:
+            raise CommandError("Set ALDRYN_FORMS_COMPRESSION to enable the compression.")
+        table_size = self.get_table_size()
+        for model in (FormSubmission, SubmittedToBeSent):
+            result = compress_records(model.objects.all(), options["batch_size"], options["dry_run"])
+            if options["dry_run"] or options["verbosity"] > 1:
+                action = "Would compress" if options["dry_run"] else "Compressed"
+                self.stdout.write(
+                    f"{model._meta.verbose_name_plural}: {action} {result.count} records "
+                    f"from {filesizeformat(result.size_before)} to {filesizeformat(result.size_after)}.")
+        if table_size is not None and not options["dry_run"]:
+            self.stdout.write(
+                f"Table size: {filesizeformat(table_size)} before, {filesizeformat(self.get_table_size())} after. "
+                "The space is reclaimed by VACUUM.")
+        if options["benchmark"]:
+            result = benchmark_decoding(FormSubmission.objects.all(), options["benchmark"])
+            self.stdout.write(
+                f"get_form_data of {result.count} submissions: {result.plain:.3f} ms plain, "
+                f"{result.compressed:.3f} ms compressed per submission.")
+
+    def get_table_size(self):
+        """Get the size of the submission table with its TOAST, indexes and partitions on PostgreSQL."""
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_total_relation_size(%s::regclass) + COALESCE((SELECT SUM(pg_total_relation_size(inhrelid)) "
+                "FROM pg_inherits WHERE inhparent = %s::regclass), 0)",
+                [FormSubmission._meta.db_table] * 2,
+            )
+            return cursor.fetchone()[0]
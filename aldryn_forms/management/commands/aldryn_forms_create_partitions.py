@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from aldryn_forms.partitioning import (
+    PartitioningError, create_partitions, get_partitioning_settings, is_partitioned, is_partitioning_supported,
+    partition_table,
+)
+
+
+class Command(BaseCommand):
+    help = "Create monthly partitions of the submission table ahead of time (PostgreSQL only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, help="Number of months ahead. The default is set in the settings.")
+        parser.add_argument(
+            "--convert", action="store_true", help="Convert the submission table into a partitioned table first.")
+        parser.add_argument(
+            "--batch-size", type=int, default=10000, help="Number of rows copied in one transaction by --convert.")
+        parser.add_argument("--sleep", type=float, default=0, help="Seconds to wait between the copied batches.")
+
+    def handle(self, *args, **options):
+        if not is_partitioning_supported():
+            self.stdout.write("Partitioning is not enabled or not supported by the database.")
+            return
+        months = options["months"]
+        if months is None:
+            months = get_partitioning_settings()["months_ahead"]
+        if options["convert"]:
+            try:
+                copied = partition_table(months, options["batch_size"], options["sleep"])
+            except PartitioningError as error:
+                raise CommandError(str(error))
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Copied {copied} submissions into the partitioned table.")
+        elif not is_partitioned():
+            self.stderr.write("The submission table is not partitioned. Use --convert.")
+            return
+        for partition in create_partitions(months):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Created partition {partition.name}.")
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from aldryn_forms.digests import (
+    digest_missing_files, get_duplicate_groups, get_files_without_digest, get_upload_folder_ids,
+    iter_reclaimable_duplicates, reclaim_duplicates,
+)
+from aldryn_forms.sizefield.utils import filesizeformat
+
+
+class Command(BaseCommand):
+    help = "Report uploaded files with the same content in the same folder and delete the duplicates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only report the duplicates among the hashed files. Nothing is hashed, stored or deleted.")
+        parser.add_argument("--batch-size", type=int, default=100, help="Number of files processed in one batch.")
+
+    def handle(self, *args, **options):
+        folder_ids = get_upload_folder_ids()
+        if options["dry_run"]:
+            missing = get_files_without_digest(folder_ids).count()
+            if missing:
+                self.stdout.write(f"{missing} files are not hashed yet and are not checked.")
+        else:
+            digested = digest_missing_files(folder_ids, options["batch_size"])
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Hashed {digested} files.")
+        duplicates, reclaimed = 0, 0
+        for group in get_duplicate_groups(folder_ids):
+            if options["dry_run"]:
+                count = sum(1 for _ in iter_reclaimable_duplicates(group, options["batch_size"]))
+            else:
+                count = reclaim_duplicates(group, options["batch_size"])
+            duplicates += count
+            reclaimed += count * group.size
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{group.sha256} {filesizeformat(group.size)}: {count} duplicates.")
+        action = "Found" if options["dry_run"] else "Deleted"
+        self.stdout.write(f"{action} {duplicates} duplicates ({filesizeformat(reclaimed)}).")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now as django_timezone_now
+from django.utils.timezone import timedelta
+
+from aldryn_forms.partitioning import drop_partitions, is_partitioning_supported
+
+
+class Command(BaseCommand):
+    help = "Detach and drop monthly partitions of submissions older than the days (PostgreSQL only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, required=True, help="Drop partitions ending before the days.")
+        parser.add_argument(
+            "--detach-only", action="store_true", help="Only detach the partitions. The tables are kept.")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the partitions. Nothing is dropped.")
+
+    def handle(self, *args, **options):
+        if not is_partitioning_supported():
+            self.stdout.write("Partitioning is not enabled or not supported by the database.")
+            return
+        before = django_timezone_now() - timedelta(days=options["days"])
+        partitions = drop_partitions(before, options["detach_only"], options["dry_run"])
+        if options["dry_run"] or options["verbosity"] > 1:
+            if options["dry_run"]:
+                action = "Would detach" if options["detach_only"] else "Would drop"
+            else:
+                action = "Detached" if options["detach_only"] else "Dropped"
+            for partition in partitions:
+                self.stdout.write(f"{action} partition {partition.name}.")
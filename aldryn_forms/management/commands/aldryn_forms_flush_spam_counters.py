@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from aldryn_forms.constants import SPAM_COUNTER_DAYS
+from aldryn_forms.spam import flush_honeypot_counters
+
+
+class Command(BaseCommand):
+    help = "Flush counters of honeypot hits from the cache into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=SPAM_COUNTER_DAYS, help="Number of days to flush.")
+
+    def handle(self, *args, **options):
+        hits = flush_honeypot_counters(options["days"])
+        if options["verbosity"] > 1:
+            self.stdout.write(f"Flushed {hits} honeypot hits.")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from aldryn_forms.staging import ingest_staged_uploads
+
+
+class Command(BaseCommand):
+    help = "Move staged uploads into filer and replace their placeholders in submissions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Number of parallel workers.")
+        parser.add_argument("--limit", type=int, default=None, help="Maximum number of uploads to ingest.")
+
+    def handle(self, *args, **options):
+        ingested, failed = ingest_staged_uploads(options["workers"], options["limit"])
+        if options["verbosity"] > 1:
+            self.stdout.write(f"Ingested {ingested} uploads. Failed {failed} uploads.")
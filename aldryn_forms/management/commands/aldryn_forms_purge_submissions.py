@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from aldryn_forms.retention import get_retention_policies, purge_submissions
+
+
+class Command(BaseCommand):
+    help = "Delete submissions older than the retention policy of the form and their orphaned uploaded files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report the counts. Nothing is deleted.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Number of submissions deleted in one batch.")
+        parser.add_argument("--sleep", type=float, default=0.5, help="Seconds to sleep between batches.")
+
+    def handle(self, *args, **options):
+        policies = get_retention_policies()
+        for name, days in policies.items():
+            result = purge_submissions(
+                name, days, policies, options["batch_size"], options["sleep"], options["dry_run"])
+            if options["dry_run"] or options["verbosity"] > 1:
+                action = "Would delete" if options["dry_run"] else "Deleted"
+                self.stdout.write(
+                    f'{name}: {action} {result.submissions} submissions and {result.files} files.')
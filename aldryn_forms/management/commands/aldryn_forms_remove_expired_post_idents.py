@@ -1,10 +1,13 @@
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils.timezone import now as django_timezone_now
 from django.utils.timezone import timedelta
 
 from aldryn_forms.constants import ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION
 from aldryn_forms.models import FormSubmission
+from aldryn_forms.retention import delete_in_batches
+from aldryn_forms.statistics import is_statistics_enabled, uncount_pending
 
 
 class Command(BaseCommand):
@@ -14,7 +17,12 @@ class Command(BaseCommand):
         duration = getattr(settings, ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION, 0)
         if duration:
             expire = django_timezone_now() - timedelta(minutes=duration)
-            FormSubmission.objects.filter(
-                post_ident__isnull=False, sent_at__lt=expire
-            ).update(post_ident=None)
-            FormSubmission.objects.filter(post_ident__isnull=True, honeypot_filled=True).delete()
+            expired = FormSubmission.objects.filter(post_ident__isnull=False, sent_at__lt=expire)
+            count_statistics = is_statistics_enabled()
+            for submission in expired.iterator():
+                with transaction.atomic():
+                    # The steps are merged under the same lock as the post_ident is cleared.
+                    if submission.expire_post_ident() and count_statistics:
+                        uncount_pending(submission)
+            spam = FormSubmission.objects.filter(post_ident__isnull=True, honeypot_filled=True)
+            delete_in_batches(spam, batch_size=500)
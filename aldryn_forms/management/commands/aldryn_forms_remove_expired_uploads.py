@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now as django_timezone_now
+from django.utils.timezone import timedelta
+
+from aldryn_forms.chunked import get_chunked_upload_settings, remove_expired_uploads
+
+
+class Command(BaseCommand):
+    help = "Remove expired chunked uploads and their files."
+
+    def handle(self, *args, **options):
+        upload_settings = get_chunked_upload_settings()
+        if upload_settings is not None:
+            expire = django_timezone_now() - timedelta(seconds=upload_settings["expiration"])
+            removed = remove_expired_uploads(expire)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Removed {removed} uploads.")
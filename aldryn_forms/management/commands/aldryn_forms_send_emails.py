@@ -7,6 +7,7 @@ from django.utils.timezone import timedelta
 from aldryn_forms.api.webhook import trigger_webhooks
 from aldryn_forms.constants import ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION
 from aldryn_forms.models import SubmittedToBeSent
+from aldryn_forms.staging import has_staged_uploads
 from aldryn_forms.utils import send_postponed_notifications
 
 
@@ -23,6 +24,10 @@ class Command(BaseCommand):
 
         site = Site.objects.first()
         for instance in queryset:
+            if has_staged_uploads(instance):
+                # Wait until the uploads are moved into filer and the links are valid.
+                continue
+            instance.merge_steps(save=False)
             if not instance.honeypot_filled:
                 if send_postponed_notifications(instance):
                     trigger_webhooks(instance.webhooks, instance, site.domain)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from aldryn_forms.answers import update_answer_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the numbers of the answers of the choice fields from the submissions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", help="Form name. All forms by default.")
+
+    def handle(self, *args, **options):
+        counters = update_answer_counts(options["name"])
+        if options["verbosity"] > 1:
+            self.stdout.write(f"Updated {counters} answer counters.")
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+from django.utils import timezone
+
+from aldryn_forms.constants import STATISTICS_DAYS
+from aldryn_forms.models import FormSubmission
+from aldryn_forms.statistics import update_statistics
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily statistics of submissions from the submissions of the last days."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=STATISTICS_DAYS, help="Number of days to recompute.")
+        parser.add_argument("--all", action="store_true", help="Recompute the days of all stored submissions.")
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            first = FormSubmission.objects.aggregate(first=Min("sent_at"))["first"]
+            if first is None:
+                return
+            since = timezone.localdate(first)
+        else:
+            since = timezone.localdate() - timedelta(days=options["days"] - 1)
+        rows = update_statistics(since)
+        if options["verbosity"] > 1:
+            self.stdout.write(f"Updated {rows} rows of statistics since {since.isoformat()}.")
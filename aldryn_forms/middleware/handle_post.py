@@ -1,21 +1,27 @@
 # import markdown
 from typing import Callable, Dict, Optional, Tuple, Union
 
-from django.http import HttpRequest, HttpResponseRedirect, JsonResponse
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 
 from aldryn_forms.constants import ALDRYN_FORMS_POST_IDENT_NAME
 from aldryn_forms.forms import FormSubmissionBaseForm
 from aldryn_forms.models import FormPlugin
+from aldryn_forms.throttling import get_rate_limited_response
+from aldryn_forms.upload_limits import install_upload_limits
 from aldryn_forms.utils import get_plugin_tree
 
 
 class HandleHttpPost(MiddlewareMixin):
     """Handle HTTP POST."""
 
+    def process_request(self, request: HttpRequest) -> None:
+        """Check uploads while they are received. The request body must not be read yet."""
+        install_upload_limits(request)
+
     def process_view(
         self, request: HttpRequest, callback: Callable, callback_args: Tuple[str, ...], callback_kwargs: Dict[str, str]
-    ) -> Optional[Union[HttpResponseRedirect, JsonResponse]]:
+    ) -> Optional[Union[HttpResponse, JsonResponse]]:
         """Process view when request method is POST and when the form plugin is found."""
 
         if request.method != 'POST':
@@ -28,6 +34,10 @@ class HandleHttpPost(MiddlewareMixin):
         if not form_plugin_id.isdigit():
             return get_response(request)
 
+        response = get_rate_limited_response(request, int(form_plugin_id))
+        if response is not None:
+            return response
+
         try:
             form_plugin = get_plugin_tree(FormPlugin, pk=form_plugin_id)
         except FormPlugin.DoesNotExist:
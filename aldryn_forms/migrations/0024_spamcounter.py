@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0023_remove_formplugin_redirect_page_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpamCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='form name')),
+                ('day', models.DateField(verbose_name='day')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='hits')),
+            ],
+            options={
+                'verbose_name': 'Spam counter',
+                'verbose_name_plural': 'Spam counters',
+                'ordering': ['-day', 'name'],
+                'constraints': [models.UniqueConstraint(fields=('name', 'day'), name='aldryn_forms_spamcounter_unique_name_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0024_spamcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionStep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('submission_type', models.CharField(editable=False, max_length=32)),
+                ('post_ident', models.CharField(db_index=True, editable=False, max_length=64)),
+                ('data', models.TextField(blank=True, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Submission step',
+                'verbose_name_plural': 'Submission steps',
+                'ordering': ['pk'],
+            },
+        ),
+    ]
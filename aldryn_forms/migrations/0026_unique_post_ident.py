@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:13
+
+from django.db import migrations, models
+
+
+def clear_duplicate_post_idents(apps, schema_editor):
+    """Keep post_ident only at the oldest submission, so that the unique constraint can be created."""
+    alias = schema_editor.connection.alias
+    for model_name in ("FormSubmission", "SubmittedToBeSent"):
+        model = apps.get_model("aldryn_forms", model_name)
+        model.objects.using(alias).filter(post_ident="").update(post_ident=None)
+        duplicates = (
+            model.objects.using(alias).filter(post_ident__isnull=False)
+            .values("post_ident")
+            .annotate(count=models.Count("pk"), first=models.Min("pk"))
+            .filter(count__gt=1)
+        )
+        for row in duplicates:
+            others = model.objects.using(alias).filter(post_ident=row["post_ident"]).exclude(pk=row["first"])
+            others.update(post_ident=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0025_submissionstep'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_post_idents, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='formsubmission',
+            constraint=models.UniqueConstraint(fields=('post_ident',), name='aldryn_forms_formsubmission_unique_post_ident'),
+        ),
+        migrations.AddConstraint(
+            model_name='submittedtobesent',
+            constraint=models.UniqueConstraint(fields=('post_ident',), name='aldryn_forms_submittedtobesent_unique_post_ident'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:27
+
+import django.db.models.deletion
+import filer.fields.folder
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0026_unique_post_ident'),
+        ('filer', '0018_alter_file_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StagedUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(editable=False, max_length=64, unique=True)),
+                ('path', models.CharField(editable=False, max_length=255)),
+                ('original_filename', models.CharField(editable=False, max_length=255)),
+                ('base_uri', models.CharField(editable=False, max_length=255)),
+                ('is_image', models.BooleanField(default=False, editable=False)),
+                ('file_fields', models.JSONField(default=dict, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('folder', filer.fields.folder.FilerFolderField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='filer.folder')),
+            ],
+            options={
+                'verbose_name': 'Staged upload',
+                'verbose_name_plural': 'Staged uploads',
+                'ordering': ['pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0027_stagedupload'),
+        ('filer', '0018_alter_file_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(editable=False, max_length=64)),
+                ('size', models.BigIntegerField(editable=False)),
+                ('file', models.OneToOneField(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='filer.file')),
+            ],
+            options={
+                'verbose_name': 'File digest',
+                'verbose_name_plural': 'File digests',
+                'indexes': [models.Index(fields=['sha256', 'size'], name='aldryn_forms_filedigest_hash')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0028_filedigest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(editable=False, max_length=64, unique=True)),
+                ('form_plugin_id', models.PositiveIntegerField(editable=False)),
+                ('field_name', models.CharField(editable=False, max_length=255)),
+                ('filename', models.CharField(editable=False, max_length=255)),
+                ('content_type', models.CharField(editable=False, max_length=255)),
+                ('size', models.BigIntegerField(editable=False)),
+                ('received', models.BigIntegerField(default=0, editable=False)),
+                ('parts', models.PositiveIntegerField(default=0, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Chunked upload',
+                'verbose_name_plural': 'Chunked uploads',
+                'ordering': ['pk'],
+            },
+        ),
+    ]
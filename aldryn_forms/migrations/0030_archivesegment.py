@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0029_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=255, verbose_name='form name')),
+                ('month', models.DateField(verbose_name='month')),
+                ('path', models.CharField(max_length=255, verbose_name='path')),
+                ('compression', models.CharField(max_length=16, verbose_name='compression')),
+                ('count', models.PositiveIntegerField(verbose_name='count')),
+                ('first_sent_at', models.DateTimeField(verbose_name='first sent at')),
+                ('last_sent_at', models.DateTimeField(verbose_name='last sent at')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archive segment',
+                'verbose_name_plural': 'Archive segments',
+                'ordering': ['-month', 'name', '-pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,12 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0030_archivesegment'),
+    ]
+
+    # The submission table is converted into a partitioned table by the command aldryn_forms_create_partitions
+    # --convert outside of migrations, because the rows are copied in batches.
+    operations = []
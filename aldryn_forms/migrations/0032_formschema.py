@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0031_partition_formsubmission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormSchema',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(editable=False, max_length=255, verbose_name='form name')),
+                ('fields', models.JSONField(editable=False, verbose_name='fields')),
+                ('digest', models.CharField(editable=False, max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Form schema',
+                'verbose_name_plural': 'Form schemas',
+                'ordering': ['name', 'pk'],
+            },
+        ),
+        migrations.AddField(
+            model_name='formsubmission',
+            name='schema',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='aldryn_forms.formschema', verbose_name='schema'),
+        ),
+        migrations.AddField(
+            model_name='submittedtobesent',
+            name='schema',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='aldryn_forms.formschema', verbose_name='schema'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0032_formschema'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='form name')),
+                ('day', models.DateField(verbose_name='day')),
+                ('language', models.CharField(max_length=10, verbose_name='language')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='total')),
+                ('spam', models.PositiveIntegerField(default=0, verbose_name='spam')),
+                ('pending', models.PositiveIntegerField(default=0, verbose_name='pending')),
+            ],
+            options={
+                'verbose_name': 'Submission statistics',
+                'verbose_name_plural': 'Submission statistics',
+                'ordering': ['-day', 'name', 'language'],
+                'constraints': [models.UniqueConstraint(fields=('name', 'day', 'language'), name='aldryn_forms_submissionstatistics_unique')],
+            },
+        ),
+    ]
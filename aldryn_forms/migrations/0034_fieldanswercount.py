@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0033_submissionstatistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FieldAnswerCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='form name')),
+                ('field_id', models.CharField(max_length=255, verbose_name='field')),
+                ('value', models.CharField(max_length=255, verbose_name='value')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='count')),
+            ],
+            options={
+                'verbose_name': 'Field answer count',
+                'verbose_name_plural': 'Field answer counts',
+                'ordering': ['name', 'field_id', '-count'],
+                'constraints': [models.UniqueConstraint(fields=('name', 'field_id', 'value'), name='aldryn_forms_fieldanswercount_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0034_fieldanswercount'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='formsubmission',
+            name='sent_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='submittedtobesent',
+            name='sent_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
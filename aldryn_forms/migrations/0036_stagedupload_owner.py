@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:38
+
+from django.db import migrations, models
+
+
+def link_staged_uploads(apps, schema_editor):
+    """Find the rows with the placeholders of the uploads staged before the owners were recorded."""
+    alias = schema_editor.connection.alias
+    StagedUpload = apps.get_model("aldryn_forms", "StagedUpload")
+    models_with_post_ident = [
+        apps.get_model("aldryn_forms", name) for name in ("FormSubmission", "SubmittedToBeSent", "SubmissionStep")]
+    for staged in StagedUpload.objects.using(alias).all():
+        placeholder = f"aldryn-forms-staged-upload:{staged.token}"
+        for model in models_with_post_ident:
+            row = model.objects.using(alias).filter(data__contains=placeholder).values("pk", "post_ident").first()
+            if row is None:
+                continue
+            if model.__name__ == "FormSubmission":
+                staged.submission_id = row["pk"]
+            staged.post_ident = staged.post_ident or row["post_ident"]
+        staged.save(update_fields=["submission_id", "post_ident"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0035_sent_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stagedupload',
+            name='post_ident',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='stagedupload',
+            name='submission_id',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(link_staged_uploads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:43
+
+import base64
+import json
+import zlib
+from urllib.parse import urlparse
+
+from django.db import migrations, models
+
+
+def decompress(text):
+    """Decompress the data compressed by aldryn_forms.compression at the time of this migration."""
+    if not text.startswith("~"):
+        return text
+    algorithm, _, payload = text[1:].partition(":")
+    payload = base64.b85decode(payload)
+    if algorithm == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(payload).decode()
+    return zlib.decompress(payload).decode()
+
+
+def get_linked_paths(data):
+    try:
+        fields = json.loads(decompress(data))
+    except ValueError:
+        return set()
+    paths = set()
+    for field in fields:
+        value = field.get("value") if isinstance(field, dict) else field
+        if isinstance(value, str):
+            for line in value.split("\n"):
+                if line.startswith(("http://", "https://", "/")):
+                    paths.add(urlparse(line).path)
+    return paths
+
+
+def create_file_references(apps, schema_editor):
+    """Record the links of the existing submissions and steps."""
+    alias = schema_editor.connection.alias
+    FileReference = apps.get_model("aldryn_forms", "FileReference")
+    for model_name in ("FormSubmission", "SubmittedToBeSent", "SubmissionStep"):
+        model = apps.get_model("aldryn_forms", model_name)
+        last_pk = 0
+        while True:
+            batch = list(
+                model.objects.using(alias).filter(pk__gt=last_pk).order_by("pk").values_list("pk", "data")[:1000])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            FileReference.objects.using(alias).bulk_create([
+                FileReference(submission_type=model_name.lower(), object_id=pk, path=path)
+                for pk, data in batch for path in get_linked_paths(data)
+            ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0036_stagedupload_owner'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('submission_type', models.CharField(editable=False, max_length=32)),
+                ('object_id', models.PositiveBigIntegerField(editable=False)),
+                ('path', models.CharField(db_index=True, editable=False, max_length=1024)),
+            ],
+            options={
+                'verbose_name': 'File reference',
+                'verbose_name_plural': 'File references',
+                'indexes': [models.Index(fields=['submission_type', 'object_id'], name='aldryn_forms_fileref_object')],
+            },
+        ),
+        migrations.RunPython(create_file_references, migrations.RunPython.noop),
+    ]
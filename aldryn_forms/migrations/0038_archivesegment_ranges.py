@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0037_filereference'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivesegment',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='completed at'),
+        ),
+        migrations.AddField(
+            model_name='archivesegment',
+            name='first_pk',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='first id'),
+        ),
+        migrations.AddField(
+            model_name='archivesegment',
+            name='language_counts',
+            field=models.JSONField(default=dict, verbose_name='counts by language'),
+        ),
+        migrations.AddField(
+            model_name='archivesegment',
+            name='last_pk',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='last id'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0038_archivesegment_ranges'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formsubmission',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='submittedtobesent',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aldryn_forms', '0039_submission_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='formsubmission',
+            name='aldryn_forms_formsubmission_unique_post_ident',
+        ),
+        migrations.AlterField(
+            model_name='formsubmission',
+            name='webhooks',
+            field=models.ManyToManyField(blank=True, db_constraint=False, to='aldryn_forms.webhook'),
+        ),
+        migrations.AddIndex(
+            model_name='formsubmission',
+            index=models.Index(fields=['post_ident'], name='aldryn_forms_formsub_post_id'),
+        ),
+    ]
@@ -1,13 +1,15 @@
+import hashlib
 import json
 import re
 from collections import defaultdict, namedtuple
-from functools import partial
-from typing import Dict, List
+from functools import lru_cache, partial
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
@@ -18,8 +20,9 @@ from djangocms_alias.models import AliasPlugin
 from djangocms_attributes_field.fields import AttributesField
 from filer.fields.folder import FilerFolderField
 
-from .compat import build_plugin_tree
-from .constants import WEBHOOK_METHODS
+from .compat import build_plugin_tree, json_loads
+from .compression import compress_text, decompress_text
+from .constants import ALDRYN_FORMS_COMPACT_DATA, WEBHOOK_METHODS
 from .fields import AldrynFormsLinkField
 from .helpers import is_form_element
 from .sizefield.models import FileSizeField
@@ -67,6 +70,17 @@ BaseSerializedFormField = namedtuple(
 )
 
 
+@lru_cache(maxsize=4096)
+def get_field_id(name: str, label: str, field_occurrence: int) -> str:
+    field_label = label.strip()
+
+    if field_label:
+        field_as_string = f'{field_label}-{name.rpartition("_")[0]}'
+    else:
+        field_as_string = name
+    return f'{field_as_string}:{field_occurrence}'
+
+
 class SerializedFormField(BaseSerializedFormField):
 
     # For _asdict() with Py3K
@@ -74,14 +88,8 @@ class SerializedFormField(BaseSerializedFormField):
 
     @property
     def field_id(self):
-        field_label = self.label.strip()
-
-        if field_label:
-            field_as_string = f'{field_label}-{self.field_type}'
-        else:
-            field_as_string = self.name
-        field_id = f'{field_as_string}:{self.field_occurrence}'
-        return field_id
+        # The same fields repeat in all submissions of the form, so the ids are cached.
+        return get_field_id(self.name, self.label, self.field_occurrence)
 
     @property
     def field_type_occurrence(self):
@@ -643,6 +651,141 @@ class FormButtonPlugin(CMSPlugin):
         return self.label
 
 
+class FormSchema(models.Model):
+    """Names and labels of the form fields. Submissions in the compact encoding store only the values."""
+
+    name = models.CharField(_('form name'), max_length=255, editable=False)
+    fields = models.JSONField(_('fields'), editable=False)
+    digest = models.CharField(max_length=64, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # The schemas are never changed, so their fields are cached by the primary key.
+    _fields_cache: Dict[int, List[List[str]]] = {}
+
+    class Meta:
+        ordering = ['name', 'pk']
+        verbose_name = _('Form schema')
+        verbose_name_plural = _('Form schemas')
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def get_for_fields(cls, name: str, fields: List[List[str]]) -> "FormSchema":
+        """Get the schema of the form with the names and labels of the fields. It is created the first time."""
+        digest = hashlib.sha256(json.dumps([name, fields]).encode()).hexdigest()
+        schema, _created = cls.objects.get_or_create(digest=digest, defaults={'name': name, 'fields': fields})
+        return schema
+
+    @classmethod
+    def get_fields(cls, pk: int) -> List[List[str]]:
+        """Get the names and labels of the fields of the schema."""
+        fields = cls._fields_cache.get(pk)
+        if fields is None:
+            fields = cls.objects.values_list('fields', flat=True).get(pk=pk)
+            # A schema created in a transaction rolled back later must not be cached.
+            transaction.on_commit(partial(cls._fields_cache.__setitem__, pk, fields))
+        return fields
+
+
+COMPACT_FIELD_KEYS = {'name', 'label', 'field_occurrence', 'value'}
+
+
+def is_compact_data_enabled() -> bool:
+    """Check if the submissions store only the values of the fields with the reference to the form schema."""
+    return getattr(settings, ALDRYN_FORMS_COMPACT_DATA, False)
+
+
+def encode_form_data(name: str, fields: List[Dict[str, Any]]) -> Tuple[str, Optional[FormSchema]]:
+    """Encode the fields into the data of the submission. The schema is None if the fields are stored as they are."""
+    if not is_compact_data_enabled() or any(set(field) - COMPACT_FIELD_KEYS for field in fields):
+        return compress_text(json.dumps(fields)), None
+    schema = FormSchema.get_for_fields(name, [[field.get('name', ''), field.get('label', '')] for field in fields])
+    return compress_text(json.dumps([field.get('value', '') for field in fields], separators=(',', ':'))), schema
+
+
+def decode_form_data(data: str, schema_id: Optional[int]) -> List[Any]:
+    """Decode the data of the submission into the list of fields. Raise ValueError if the data are not valid."""
+    data = json_loads(decompress_text(data))
+    if schema_id is None:
+        return data
+    fields = FormSchema.get_fields(schema_id)
+    if not isinstance(data, list) or len(data) != len(fields):
+        raise ValueError("Data do not match the form schema.")
+    return [{'name': name, 'label': label, 'value': value} for (name, label), value in zip(fields, data)]
+
+
+@lru_cache(maxsize=4096)
+def get_occurrence_key(name: str, label: str) -> str:
+    """Get the key by which the occurrences of the field in the submission are counted."""
+    field_label = label.strip()
+    return f'{name.rpartition("_")[0]}_{field_label}' if field_label else name
+
+
+def decode_steps_data(submission_type: str, post_ident: str) -> List[Any]:
+    """Decode the data of the steps appended to the submission by post_ident."""
+    items = []
+    steps = SubmissionStep.objects.filter(submission_type=submission_type, post_ident=post_ident).order_by('pk')
+    for step_data in steps.values_list('data', flat=True):
+        try:
+            items.extend(json_loads(step_data))
+        except ValueError:
+            pass
+    return items
+
+
+def build_form_fields(
+    items: List[Any], factory: Optional[Callable[[tuple], Any]] = None, names: Optional[Collection[str]] = None
+) -> List[Any]:
+    """Convert the decoded fields into serialized form fields in one pass. The occurrences of the fields are counted.
+
+    The factory gets the tuple of the name, label, occurrence and value. Items that are not fields are kept as they are.
+    If the names are given, only the fields of the names are converted and the other items are left out.
+    """
+    occurrences: Dict[str, int] = {}
+    form_fields = []
+    new_field = factory or partial(tuple.__new__, SerializedFormField)
+    for item in items:
+        if not isinstance(item, dict):
+            if names is None:
+                form_fields.append(item)
+            continue
+        name, label = item.get('name', ''), item.get('label', '')
+        key = get_occurrence_key(name, label)
+        # The occurrences are counted over all fields, so they do not change by the selection.
+        occurrences[key] = occurrence = occurrences.get(key, 0) + 1
+        if names is None or name in names:
+            form_fields.append(new_field((name, label, occurrence, item.get('value', ''))))
+    return form_fields
+
+
+def prefetch_form_data(submissions: List['FormSubmissionBase']) -> None:
+    """Decode the data of the submissions and load their pending steps by one query.
+
+    The fields are cached in the submissions, so get_form_data does not decode them again.
+    """
+    steps: Dict[Tuple[str, str], List[Any]] = defaultdict(list)
+    pending = [submission for submission in submissions if submission.post_ident]
+    if pending:
+        queryset = SubmissionStep.objects.filter(
+            post_ident__in={submission.post_ident for submission in pending},
+            submission_type__in={submission._meta.model_name for submission in pending},
+        ).order_by('pk')
+        for submission_type, post_ident, step_data in queryset.values_list('submission_type', 'post_ident', 'data'):
+            try:
+                steps[submission_type, post_ident].extend(json_loads(step_data))
+            except ValueError:
+                pass
+    for submission in submissions:
+        try:
+            items = decode_form_data(submission.data, submission.schema_id)
+        except ValueError:
+            items = []
+        if submission.post_ident:
+            items.extend(steps.get((submission._meta.model_name, submission.post_ident), []))
+        submission._form_data_cache = ((submission.data, submission.schema_id), build_form_fields(items), True)
+
+
 class FormSubmissionBase(models.Model):
 
     name = models.CharField(
@@ -670,10 +813,21 @@ class FormSubmissionBase(models.Model):
         max_length=255,
         blank=True,
     )
-    sent_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    # Changed on every write, also by the updates of querysets, so that the API can tell the changed lists.
+    updated_at = models.DateTimeField(auto_now=True, editable=False)
     post_ident = models.CharField(max_length=64, null=True, blank=True)
     webhooks = models.ManyToManyField(Webhook, blank=True)
     honeypot_filled = models.BooleanField(default=False)
+    schema = models.ForeignKey(
+        FormSchema,
+        verbose_name=_('schema'),
+        null=True,
+        blank=True,
+        editable=False,
+        on_delete=models.PROTECT,
+        related_name='+',
+    )
 
     class Meta:
         abstract = True
@@ -681,46 +835,90 @@ class FormSubmissionBase(models.Model):
     def __str__(self):
         return self.name
 
-    def _form_data_hook(self, data, occurrences):
-        field_label = data.get("label", "").strip()
-
-        if field_label:
-            field_type = data.get("name", "").rpartition('_')[0]
-            field_id = f'{field_type}_{field_label}'
-        else:
-            field_id = data.get("name", "")
-
-        if field_id in occurrences:
-            occurrences[field_id] += 1
-
-        data['field_occurrence'] = occurrences[field_id]
-        for name in ("label", "name", "value"):
-            if name not in data:
-                data[name] = ""
-        return SerializedFormField(**data)
-
     def _recipients_hook(self, data):
         return Recipient(**data)
 
     def get_form_data(self) -> List[SerializedFormField]:
-        occurrences = defaultdict(lambda: 1)
+        """Get the fields of the submission. They are decoded once and cached until the data are changed.
 
-        data_hook = partial(self._form_data_hook, occurrences=occurrences)
+        Submissions with pending steps are not cached, because the steps can be appended at any time,
+        unless the steps were loaded by prefetch_form_data.
+        """
+        key = (self.data, self.schema_id)
+        cached = getattr(self, '_form_data_cache', None)
+        if cached is not None and cached[0] == key and (not self.post_ident or cached[2]):
+            return list(cached[1])
 
         try:
-            form_data = json.loads(
-                self.data,
-                object_hook=data_hook,
-            )
+            items = decode_form_data(self.data, self.schema_id)
         except ValueError:
             # TODO: Log this?
-            form_data = []
-        return form_data
+            items = []
+
+        # Steps that have not been merged into the data yet.
+        if self.post_ident:
+            items.extend(decode_steps_data(self._meta.model_name, self.post_ident))
+        form_data = build_form_fields(items)
+        self._form_data_cache = (key, form_data, False)
+        return list(form_data)
+
+    def get_schema_fields(self) -> List[SerializedFormField]:
+        """Get the fields of the schema without values."""
+        return build_form_fields([
+            {'name': name, 'label': label, 'value': ''} for name, label in FormSchema.get_fields(self.schema_id)])
+
+    def get_steps(self) -> models.QuerySet:
+        """Get steps appended to the submission by post_ident."""
+        return SubmissionStep.objects.filter(
+            submission_type=self._meta.model_name,
+            post_ident=self.post_ident,
+        ).order_by('pk')
+
+    def merge_steps(self, save: bool = True) -> None:
+        """Merge the appended steps into the data of the submission and remove them."""
+        if not self.post_ident:
+            return
+        with transaction.atomic():
+            # The lock of the submission serializes parallel merges.
+            current = type(self).objects.select_for_update().filter(pk=self.pk).values_list(
+                'data', 'schema_id').first()
+            steps = list(self.get_steps().select_for_update().values_list('pk', 'data'))
+            if not steps:
+                return
+            try:
+                data = decode_form_data(*(current or (self.data, self.schema_id)))
+            except ValueError:
+                data = []
+            for _pk, step_data in steps:
+                try:
+                    data.extend(json.loads(step_data))
+                except ValueError:
+                    pass
+            self.set_data(data)
+            if save:
+                self.save(update_fields=['data', 'schema', 'updated_at'])
+            # Only the read steps are removed, so that a step appended in the meantime is not lost.
+            SubmissionStep.objects.filter(pk__in=[pk for pk, _data in steps]).delete()
+
+    def expire_post_ident(self) -> bool:
+        """Merge the appended steps and clear the post_ident under one lock of the submission.
+
+        Steps are appended under the same lock, so no step is appended between the merge and the clearing and lost.
+        Return False if the post_ident was already cleared.
+        """
+        with transaction.atomic():
+            model = type(self)
+            if not model.objects.select_for_update().filter(pk=self.pk, post_ident__isnull=False).exists():
+                return False
+            self.merge_steps()
+            model.objects.filter(pk=self.pk).update(post_ident=None, updated_at=timezone.now())
+            self.post_ident = None
+            return True
 
     def get_recipients(self) -> List[Recipient]:
         try:
             recipients = json.loads(
-                self.recipients,
+                decompress_text(self.recipients),
                 object_hook=self._recipients_hook
             )
         except ValueError:
@@ -732,12 +930,15 @@ class FormSubmissionBase(models.Model):
         fields = form.get_serialized_fields(is_confirmation=False)
         fields_as_dicts = [field._asdict() for field in fields]
 
-        self.data = json.dumps(fields_as_dicts)
+        self.set_data(fields_as_dicts)
+
+    def set_data(self, fields_as_dicts: List[Dict[str, Any]]) -> None:
+        self.data, self.schema = encode_form_data(self.name, fields_as_dicts)
 
     def set_recipients(self, recipients):
         raw_recipients = [
             {'name': rec[0], 'email': rec[1]} for rec in recipients]
-        self.recipients = json.dumps(raw_recipients)
+        self.recipients = compress_text(json.dumps(raw_recipients))
 
     def form_recipients(self) -> List[Dict[str, str]]:
         """Form recipients for API."""
@@ -749,11 +950,22 @@ class FormSubmissionBase(models.Model):
 
 
 class FormSubmission(FormSubmissionBase):
+    """Submitted form.
+
+    The table can be partitioned by the month of sent_at on PostgreSQL (see aldryn_forms.partitioning), where the
+    primary key becomes (id, sent_at). Unique constraints and foreign keys referencing the table would have to
+    include sent_at, so the model has neither: the posts of a post_ident are serialized by a lock instead.
+    """
+
+    webhooks = models.ManyToManyField(Webhook, blank=True, db_constraint=False)
 
     class Meta:
         ordering = ['-sent_at']
         verbose_name = _('Form submission')
         verbose_name_plural = _('Form submissions')
+        indexes = [
+            models.Index(fields=['post_ident'], name='aldryn_forms_formsub_post_id'),
+        ]
 
 
 class SubmittedToBeSent(FormSubmissionBase):
@@ -763,3 +975,203 @@ class SubmittedToBeSent(FormSubmissionBase):
         ordering = ['-sent_at']
         verbose_name = _('Submitted form to be sent')
         verbose_name_plural = _('Submitted forms to be sent')
+        constraints = [
+            models.UniqueConstraint(fields=['post_ident'], name='aldryn_forms_submittedtobesent_unique_post_ident'),
+        ]
+
+
+class SubmissionStep(models.Model):
+    """Data of the form appended to the previous submission by post_ident."""
+
+    submission_type = models.CharField(max_length=32, editable=False)
+    post_ident = models.CharField(max_length=64, db_index=True, editable=False)
+    data = models.TextField(blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['pk']
+        verbose_name = _('Submission step')
+        verbose_name_plural = _('Submission steps')
+
+    def __str__(self):
+        return self.post_ident
+
+
+class StagedUpload(models.Model):
+    """Uploaded file waiting in the staging directory to be moved into filer."""
+
+    token = models.CharField(max_length=64, unique=True, editable=False)
+    path = models.CharField(max_length=255, editable=False)
+    original_filename = models.CharField(max_length=255, editable=False)
+    folder = FilerFolderField(null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    base_uri = models.CharField(max_length=255, editable=False)
+    is_image = models.BooleanField(default=False, editable=False)
+    file_fields = models.JSONField(default=dict, editable=False)
+    # The placeholder is in the submission and in the submissions and steps of the post_ident. The submission is not
+    # a foreign key, because the table of submissions can be partitioned.
+    submission_id = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    post_ident = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['pk']
+        verbose_name = _('Staged upload')
+        verbose_name_plural = _('Staged uploads')
+
+    def __str__(self):
+        return self.original_filename
+
+
+class ChunkedUpload(models.Model):
+    """File uploaded in chunks before the form is submitted."""
+
+    token = models.CharField(max_length=64, unique=True, editable=False)
+    form_plugin_id = models.PositiveIntegerField(editable=False)
+    field_name = models.CharField(max_length=255, editable=False)
+    filename = models.CharField(max_length=255, editable=False)
+    content_type = models.CharField(max_length=255, editable=False)
+    size = models.BigIntegerField(editable=False)
+    received = models.BigIntegerField(default=0, editable=False)
+    parts = models.PositiveIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['pk']
+        verbose_name = _('Chunked upload')
+        verbose_name_plural = _('Chunked uploads')
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def completed(self) -> bool:
+        return self.received == self.size
+
+
+class FileDigest(models.Model):
+    """SHA-256 hash and size of the uploaded filer file for finding duplicates."""
+
+    file = models.OneToOneField('filer.File', on_delete=models.CASCADE, related_name='+', editable=False)
+    sha256 = models.CharField(max_length=64, editable=False)
+    size = models.BigIntegerField(editable=False)
+
+    class Meta:
+        verbose_name = _('File digest')
+        verbose_name_plural = _('File digests')
+        indexes = [
+            models.Index(fields=['sha256', 'size'], name='aldryn_forms_filedigest_hash'),
+        ]
+
+    def __str__(self):
+        return self.sha256
+
+
+class FileReference(models.Model):
+    """Path of the uploaded file linked in the data of the submission or of the step.
+
+    The submission is not a foreign key, because the table of submissions can be partitioned.
+    """
+
+    submission_type = models.CharField(max_length=32, editable=False)
+    object_id = models.PositiveBigIntegerField(editable=False)
+    path = models.CharField(max_length=1024, db_index=True, editable=False)
+
+    class Meta:
+        verbose_name = _('File reference')
+        verbose_name_plural = _('File references')
+        indexes = [
+            models.Index(fields=['submission_type', 'object_id'], name='aldryn_forms_fileref_object'),
+        ]
+
+    def __str__(self):
+        return self.path
+
+
+class ArchiveSegment(models.Model):
+    """Compressed file with archived submissions of the form from one month."""
+
+    name = models.CharField(_('form name'), max_length=255, db_index=True)
+    month = models.DateField(_('month'))
+    path = models.CharField(_('path'), max_length=255)
+    compression = models.CharField(_('compression'), max_length=16)
+    count = models.PositiveIntegerField(_('count'))
+    language_counts = models.JSONField(_('counts by language'), default=dict)
+    first_sent_at = models.DateTimeField(_('first sent at'))
+    last_sent_at = models.DateTimeField(_('last sent at'))
+    # The range of primary keys of the archived submissions. Segments written before it was recorded have none and
+    # their submissions are in the order of the primary key instead of the newest first.
+    first_pk = models.PositiveBigIntegerField(_('first id'), null=True, blank=True)
+    last_pk = models.PositiveBigIntegerField(_('last id'), null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the archived submissions are deleted from the database.
+    completed_at = models.DateTimeField(_('completed at'), null=True, blank=True)
+
+    class Meta:
+        ordering = ['-month', 'name', '-pk']
+        verbose_name = _('Archive segment')
+        verbose_name_plural = _('Archive segments')
+
+    def __str__(self):
+        return self.path
+
+
+class SpamCounter(models.Model):
+    """Honeypot hits that were counted instead of being saved as submissions."""
+
+    name = models.CharField(_('form name'), max_length=255)
+    day = models.DateField(_('day'))
+    hits = models.PositiveIntegerField(_('hits'), default=0)
+
+    class Meta:
+        ordering = ['-day', 'name']
+        verbose_name = _('Spam counter')
+        verbose_name_plural = _('Spam counters')
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'day'], name='aldryn_forms_spamcounter_unique_name_day'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class SubmissionStatistics(models.Model):
+    """Daily numbers of submissions of the form in the language."""
+
+    name = models.CharField(_('form name'), max_length=255)
+    day = models.DateField(_('day'))
+    language = models.CharField(_('language'), max_length=10)
+    total = models.PositiveIntegerField(_('total'), default=0)
+    spam = models.PositiveIntegerField(_('spam'), default=0)
+    pending = models.PositiveIntegerField(_('pending'), default=0)
+
+    class Meta:
+        ordering = ['-day', 'name', 'language']
+        verbose_name = _('Submission statistics')
+        verbose_name_plural = _('Submission statistics')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'day', 'language'], name='aldryn_forms_submissionstatistics_unique'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class FieldAnswerCount(models.Model):
+    """Number of submissions of the form with the answer of the choice field."""
+
+    name = models.CharField(_('form name'), max_length=255)
+    field_id = models.CharField(_('field'), max_length=255)
+    value = models.CharField(_('value'), max_length=255)
+    count = models.PositiveIntegerField(_('count'), default=0)
+
+    class Meta:
+        ordering = ['name', 'field_id', '-count']
+        verbose_name = _('Field answer count')
+        verbose_name_plural = _('Field answer counts')
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'field_id', 'value'], name='aldryn_forms_fieldanswercount_unique'),
+        ]
+
+    def __str__(self):
+        return self.value
@@ -0,0 +1,312 @@
+import re
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Type
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+
+from .constants import ALDRYN_FORMS_PARTITIONING
+from .models import FileReference, FormSubmission, SubmissionStep
+
+
+PARTITION_NAME_PATTERN = re.compile(r"_p(\d{4})_(\d{2})$")
+INDEX_DEFINITION_PATTERN = re.compile(r"^(?P<create>CREATE (?:UNIQUE )?INDEX )\S+ ON (?:ONLY )?\S+ ")
+
+
+class PartitioningError(Exception):
+    """The submission table cannot be partitioned."""
+
+
+class Partition(NamedTuple):
+    """Monthly partition of the submission table. The start is inclusive, the end is exclusive."""
+
+    name: str
+    start: datetime
+    end: datetime
+
+
+def get_partitioning_settings() -> Optional[Dict[str, Any]]:
+    """Get settings of the partitioning. None if it is not enabled."""
+    options = getattr(settings, ALDRYN_FORMS_PARTITIONING, None)
+    if options is None:
+        return None
+    return {"months_ahead": 3, **options}
+
+
+def is_partitioning_supported(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Check if the partitioning is enabled and the database is PostgreSQL."""
+    return get_partitioning_settings() is not None and connections[using].vendor == "postgresql"
+
+
+def get_table_name() -> str:
+    return FormSubmission._meta.db_table
+
+
+def get_month_start(value: date) -> datetime:
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def get_next_month(month: datetime) -> datetime:
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def get_partition(month: datetime) -> Partition:
+    """Get the partition of the month."""
+    start = get_month_start(month)
+    return Partition(f"{get_table_name()}_p{start:%Y_%m}", start, get_next_month(start))
+
+
+def get_default_partition_name() -> str:
+    """Get the name of the partition for the rows outside of the monthly partitions."""
+    return f"{get_table_name()}_default"
+
+
+def is_partitioned(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Check if the submission table is partitioned."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [get_table_name()])
+        return cursor.fetchone() is not None
+
+
+def get_partitions(using: str = DEFAULT_DB_ALIAS) -> List[Partition]:
+    """Get the monthly partitions of the submission table ordered by the month."""
+    if not is_partitioned(using):
+        return []
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [get_table_name()],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = PARTITION_NAME_PATTERN.search(name)
+        if match is not None:
+            partitions.append(get_partition(datetime(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+def create_partition(partition: Partition, using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Create the partition if it does not exist. Return True if it was created.
+
+    The partition is created as a table and attached, so the default partition stays attached. Rows of the month
+    stored in the default partition are moved into the table first. The default partition is empty as long as the
+    partitions are created ahead of time, so the move does not find any rows.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table, default, name = quote(get_table_name()), quote(get_default_partition_name()), quote(partition.name)
+    if partition in get_partitions(using):
+        return False
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {default} WHERE sent_at >= %s AND sent_at < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            [partition.start, partition.end],
+        )
+        cursor.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{partition.start.isoformat()}') TO ('{partition.end.isoformat()}')"
+        )
+    return True
+
+
+def create_partitions(
+    months_ahead: int, today: Optional[date] = None, using: str = DEFAULT_DB_ALIAS
+) -> List[Partition]:
+    """Create the partitions from the current month to the months ahead. Return the created partitions."""
+    month = get_month_start(today or datetime.now(timezone.utc))
+    created = []
+    for _ in range(months_ahead + 1):
+        partition = get_partition(month)
+        if create_partition(partition, using):
+            created.append(partition)
+        month = get_next_month(month)
+    return created
+
+
+def drop_partitions(
+    before: datetime, detach_only: bool = False, dry_run: bool = False, using: str = DEFAULT_DB_ALIAS
+) -> List[Partition]:
+    """Detach the partitions ending before the time and drop them. Return the affected partitions.
+
+    The pending steps, the webhooks and the file references of the submissions are deleted with the partition.
+    Detached partitions stay in the database as standalone tables, so they can be archived or dropped later.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    webhooks = FormSubmission.webhooks.through
+    partitions = [partition for partition in get_partitions(using) if partition.end <= before]
+    if dry_run:
+        return partitions
+    for partition in partitions:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {quote(get_table_name())} DETACH PARTITION {quote(partition.name)}")
+            if detach_only:
+                continue
+            cursor.execute(
+                f"DELETE FROM {quote(SubmissionStep._meta.db_table)} WHERE submission_type = %s AND post_ident IN "
+                f"(SELECT post_ident FROM {quote(partition.name)} WHERE post_ident IS NOT NULL)",
+                [FormSubmission._meta.model_name],
+            )
+            cursor.execute(
+                f"DELETE FROM {quote(webhooks._meta.db_table)} WHERE formsubmission_id IN "
+                f"(SELECT id FROM {quote(partition.name)})"
+            )
+            cursor.execute(
+                f"DELETE FROM {quote(FileReference._meta.db_table)} WHERE submission_type = %s AND object_id IN "
+                f"(SELECT id FROM {quote(partition.name)})",
+                [FormSubmission._meta.model_name],
+            )
+            cursor.execute(f"DROP TABLE {quote(partition.name)}")
+    return partitions
+
+
+def get_partitioned_table_name() -> str:
+    """Get the name of the partitioned table while the rows are copied into it."""
+    return f"{get_table_name()}_partitioned"
+
+
+def get_change_log_name() -> str:
+    """Get the name of the table and of the trigger recording the rows changed while they are copied."""
+    return f"{get_table_name()}_changes"
+
+
+def get_index_definitions(cursor, name: str) -> Dict[str, str]:
+    """Get the definitions of the indexes of the table by their names, except the primary key and unique constraints."""
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+        "(SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u'))",
+        [name, name],
+    )
+    return dict(cursor.fetchall())
+
+
+def partition_table(
+    months_ahead: int = 3, batch_size: int = 10000, sleep: float = 0, using: str = DEFAULT_DB_ALIAS
+) -> int:
+    """Convert the submission table into a table partitioned by the month of sent_at. Return the number of copied rows.
+
+    The rows are copied into the new table in batches, each in its own transaction, so the submissions can be saved
+    meanwhile. A trigger records the rows inserted, updated or deleted since the copying started. At the end they are
+    copied again while the table is locked against writes and the new table replaces the old one. The primary key
+    becomes (id, sent_at), because PostgreSQL requires the partition key in unique constraints, and the model has no
+    unique constraints or foreign keys referencing the table for the same reason. A conversion interrupted before is
+    started again. Nothing is done on other databases or if the table is already partitioned.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql" or is_partitioned(using):
+        return 0
+    quote = connection.ops.quote_name
+    name, new_name = get_table_name(), get_partitioned_table_name()
+    table, new, log = quote(name), quote(new_name), quote(get_change_log_name())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conrelid::regclass::text FROM pg_constraint WHERE contype = 'f' AND confrelid = %s::regclass",
+            [name],
+        )
+        referencing = [row[0] for row in cursor.fetchall()]
+    if referencing:
+        raise PartitioningError(f"Foreign keys of the tables {', '.join(referencing)} reference the table {name}.")
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {log} ON {table}")
+        cursor.execute(f"DROP FUNCTION IF EXISTS {log}()")
+        cursor.execute(f"DROP TABLE IF EXISTS {new}, {log}")
+        cursor.execute(f"CREATE TABLE {log} (id bigint NOT NULL)")
+        cursor.execute(
+            f"CREATE FUNCTION {log}() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+            f"INSERT INTO {log} (id) VALUES (CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END); "
+            f"RETURN NULL; END $$"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER {log} AFTER INSERT OR UPDATE OR DELETE ON {table} FOR EACH ROW EXECUTE FUNCTION {log}()")
+        cursor.execute(
+            f"CREATE TABLE {new} (LIKE {table} INCLUDING ALL EXCLUDING INDEXES) PARTITION BY RANGE (sent_at)")
+        cursor.execute(f"CREATE TABLE {quote(get_default_partition_name())} PARTITION OF {new} DEFAULT")
+        cursor.execute(f"SELECT MIN(sent_at) FROM {table}")
+        month = get_month_start(cursor.fetchone()[0] or datetime.now(timezone.utc))
+        last = get_month_start(datetime.now(timezone.utc))
+        while month <= last:
+            partition = get_partition(month)
+            cursor.execute(
+                f"CREATE TABLE {quote(partition.name)} PARTITION OF {new} "
+                f"FOR VALUES FROM ('{partition.start.isoformat()}') TO ('{partition.end.isoformat()}')"
+            )
+            month = partition.end
+        # The indexes are created before the rows are copied, so that the table is not locked for their build.
+        # They get the names of the old indexes when the old table is dropped.
+        cursor.execute(f"ALTER TABLE {new} ADD CONSTRAINT {quote(f'{new_name}_pkey')} PRIMARY KEY (id, sent_at)")
+        # Foreign keys are not copied by LIKE. Their names are unique only in the table, so they are kept.
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [name],
+        )
+        for constraint, definition in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE {new} ADD CONSTRAINT {quote(constraint)} {definition}")
+        indexes = get_index_definitions(cursor, name)
+        for number, (index_name, definition) in enumerate(sorted(indexes.items())):
+            cursor.execute(INDEX_DEFINITION_PATTERN.sub(
+                f"\\g<create>{quote(f'{new_name}_{number}')} ON {new} ", definition, count=1))
+
+    copied, last_id = 0, 0
+    while True:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {new} SELECT * FROM {table} WHERE id > %s ORDER BY id LIMIT %s RETURNING id",
+                [last_id, batch_size],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            break
+        copied += len(ids)
+        last_id = max(ids)
+        if sleep:
+            time.sleep(sleep)
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        # The reads of the table go on, the writes wait until the new table replaces it.
+        cursor.execute(f"LOCK TABLE {table} IN EXCLUSIVE MODE")
+        cursor.execute(f"DELETE FROM {new} WHERE id IN (SELECT id FROM {log})")
+        cursor.execute(f"INSERT INTO {new} SELECT * FROM {table} WHERE id IN (SELECT id FROM {log})")
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [new_name])
+        if cursor.fetchone()[0] is None:
+            # The serial column of the new table uses the sequence of the old table, which would be dropped with it.
+            cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [name])
+            cursor.execute(f"ALTER SEQUENCE {cursor.fetchone()[0]} OWNED BY {new}.id")
+        cursor.execute(f"DROP TABLE {table}, {log}")
+        cursor.execute(f"DROP FUNCTION {log}()")
+        cursor.execute(f"ALTER TABLE {new} RENAME TO {table}")
+        cursor.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {quote(f'{new_name}_pkey')} TO {quote(f'{name}_pkey')}")
+        for number, index_name in enumerate(sorted(indexes)):
+            cursor.execute(f"ALTER INDEX {quote(f'{new_name}_{number}')} RENAME TO {quote(index_name)}")
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)",
+            [name],
+        )
+    create_partitions(months_ahead, using=using)
+    return copied
+
+
+def lock_post_ident(model: Type[models.Model], post_ident: str, using: str = DEFAULT_DB_ALIAS) -> None:
+    """Lock the post_ident until the end of the transaction on PostgreSQL.
+
+    The submission table has no unique constraint of post_ident, because it can be partitioned, so parallel posts of
+    the same post_ident are serialized by the lock. On other databases only the unique constraint of the submissions
+    to be sent guards against parallel posts.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))", [f"{model._meta.db_table}:{post_ident}"])
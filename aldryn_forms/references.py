@@ -0,0 +1,124 @@
+import json
+from typing import Any, Iterable, List, Optional, Set, Type
+from urllib.parse import urlparse
+
+from django.db import models, transaction
+from django.db.models import QuerySet
+
+from filer.models import filemodels
+
+from .compression import decompress_text
+from .models import FileReference, FormSubmission, SubmissionStep, SubmittedToBeSent, decode_form_data
+
+
+def get_upload_url_prefix() -> str:
+    """Get the path of the URL under which the storage of filer serves the uploaded files, e.g. "/media/"."""
+    return urlparse(filemodels.File._meta.get_field("file").storage.url("")).path
+
+
+def get_linked_paths(data: str) -> Set[str]:
+    """Get the paths of the links to the uploaded files in the submission data.
+
+    Only the links under the URL of the uploaded files are taken, so other answers starting with "/" are not files.
+    """
+    paths: Set[str] = set()
+    try:
+        fields = json.loads(decompress_text(data))
+    except ValueError:
+        return paths
+    prefix = get_upload_url_prefix()
+    for field in fields:
+        # The compact data contain only the values.
+        value = field.get("value") if isinstance(field, dict) else field
+        if not isinstance(value, str):
+            continue
+        for line in value.split("\n"):
+            if line.startswith(("http://", "https://", "/")):
+                path = urlparse(line).path
+                if path.startswith(prefix) and len(path) > len(prefix):
+                    paths.add(path)
+    return paths
+
+
+def replace_linked_path(fields: List[Any], old_path: str, new_path: str) -> bool:
+    """Replace the path of the links equal to the old path in the values of the fields. Return True if changed.
+
+    Only the complete links are compared, so the link of a file whose path starts with the old path is kept.
+    """
+    changed = False
+    for field in fields:
+        if not isinstance(field, dict) or not isinstance(field.get("value"), str):
+            continue
+        lines = field["value"].split("\n")
+        for index, line in enumerate(lines):
+            if line.startswith(("http://", "https://", "/")) and urlparse(line).path == old_path:
+                lines[index] = urlparse(line)._replace(path=new_path).geturl()
+                changed = True
+        field["value"] = "\n".join(lines)
+    return changed
+
+
+def relink_file(old_path: str, new_path: str) -> int:
+    """Link the new path instead of the old one in the submissions and steps referencing it.
+
+    The rows are found by their file references and updated one by one under the lock. Return the number of
+    updated rows.
+    """
+    updated = 0
+    for model in (FormSubmission, SubmittedToBeSent, SubmissionStep):
+        pks = list(FileReference.objects.filter(
+            submission_type=model._meta.model_name, path=old_path).values_list("object_id", flat=True))
+        for pk in pks:
+            with transaction.atomic():
+                row = model.objects.select_for_update().filter(pk=pk).first()
+                if row is None:
+                    continue
+                try:
+                    if model is SubmissionStep:
+                        fields = json.loads(row.data)
+                    else:
+                        fields = decode_form_data(row.data, row.schema_id)
+                except ValueError:
+                    continue
+                if not replace_linked_path(fields, old_path, new_path):
+                    # The reference is stale.
+                    update_file_references(row)
+                    continue
+                if model is SubmissionStep:
+                    row.data = json.dumps(fields)
+                    row.save(update_fields=["data"])
+                else:
+                    row.set_data(fields)
+                    row.save(update_fields=["data", "schema", "updated_at"])
+                updated += 1
+    return updated
+
+
+def add_file_references(model: Type[models.Model], pks: Iterable[int], path: str) -> None:
+    """Record the link of the path in the rows of the submissions or steps."""
+    submission_type = model._meta.model_name
+    FileReference.objects.bulk_create([
+        FileReference(submission_type=submission_type, object_id=pk, path=path) for pk in pks])
+
+
+def update_file_references(instance: models.Model) -> None:
+    """Replace the references of the submission or the step by the links in its data."""
+    delete_file_references(type(instance), [instance.pk])
+    submission_type = instance._meta.model_name
+    FileReference.objects.bulk_create([
+        FileReference(submission_type=submission_type, object_id=instance.pk, path=path)
+        for path in get_linked_paths(instance.data)
+    ])
+
+
+def delete_file_references(model: Type[models.Model], pks: Iterable[int]) -> None:
+    FileReference.objects.filter(submission_type=model._meta.model_name, object_id__in=pks).delete()
+
+
+def get_referenced_paths(paths: Iterable[str], exclude: Optional[QuerySet] = None) -> Set[str]:
+    """Get the paths still linked by a submission or a step. The submissions in the exclude queryset are skipped."""
+    references = FileReference.objects.filter(path__in=paths)
+    if exclude is not None:
+        references = references.exclude(
+            submission_type=exclude.model._meta.model_name, object_id__in=exclude.values("pk"))
+    return set(references.values_list("path", flat=True).distinct())
@@ -0,0 +1,110 @@
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, List, NamedTuple, Set
+from urllib.parse import unquote, urlparse
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils.timezone import now
+
+from filer.models import filemodels
+
+from .constants import ALDRYN_FORMS_RETENTION_POLICIES, RETENTION_POLICY_DEFAULT
+from .digests import get_upload_folder_ids
+from .models import FileReference, FormSubmission, SubmissionStep
+from .references import get_referenced_paths, get_upload_url_prefix
+
+
+class PurgeResult(NamedTuple):
+    """Number of purged submissions and orphaned files of the retention policy."""
+
+    name: str
+    submissions: int
+    files: int
+
+
+def get_retention_policies() -> Dict[str, int]:
+    """Get the number of days the submissions are kept by the form name. The key "*" is for the other forms."""
+    return getattr(settings, ALDRYN_FORMS_RETENTION_POLICIES, {})
+
+
+def get_expired_submissions(name: str, days: int, policies: Dict[str, int]) -> QuerySet:
+    """Get submissions of the form older than the retention period."""
+    queryset = FormSubmission.objects.filter(sent_at__lt=now() - timedelta(days=days))
+    if name == RETENTION_POLICY_DEFAULT:
+        return queryset.exclude(name__in=[key for key in policies if key != RETENTION_POLICY_DEFAULT])
+    return queryset.filter(name=name)
+
+
+def delete_in_batches(queryset: QuerySet, batch_size: int, sleep: float = 0) -> int:
+    """Delete the records in batches ordered by the primary key, so that the table is not locked for long.
+
+    Return the number of deleted records.
+    """
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += queryset.model.objects.filter(pk__in=pks).delete()[1].get(queryset.model._meta.label, 0)
+        if sleep:
+            time.sleep(sleep)
+
+
+def get_file_path(filer_file: filemodels.File) -> str:
+    return urlparse(filer_file.url).path
+
+
+def get_linked_files(paths: Iterable[str], folder_ids: Set[int]) -> List[filemodels.File]:
+    """Get the uploaded filer files with the paths by one query of their stored names."""
+    prefix = get_upload_url_prefix()
+    names = {unquote(path[len(prefix):]) for path in paths if path.startswith(prefix)}
+    if not names:
+        return []
+    candidates = filemodels.File.objects.non_polymorphic().filter(folder_id__in=folder_ids, file__in=names)
+    paths = set(paths)
+    return [candidate for candidate in candidates if get_file_path(candidate) in paths]
+
+
+def purge_submissions(
+    name: str, days: int, policies: Dict[str, int], batch_size: int, sleep: float = 0, dry_run: bool = False
+) -> PurgeResult:
+    """Delete expired submissions of the policy in batches and the uploaded files linked only by them.
+
+    The linked files are found by the file references of the batch, so the data are not read. Files still linked by
+    other submissions are resolved by one query per batch. In the dry run nothing is deleted and only the counts are
+    returned.
+    """
+    expired = get_expired_submissions(name, days, policies)
+    folder_ids = get_upload_folder_ids()
+    submissions, files, last_pk = 0, 0, 0
+    orphaned: Set[int] = set()
+    while True:
+        batch = list(expired.filter(pk__gt=last_pk).order_by("pk").values_list("pk", "post_ident")[:batch_size])
+        if not batch:
+            return PurgeResult(name, submissions, files)
+        last_pk = batch[-1][0]
+        pks = [pk for pk, _ in batch]
+        paths = set(FileReference.objects.filter(
+            submission_type=FormSubmission._meta.model_name, object_id__in=pks).values_list("path", flat=True))
+        linked_files = get_linked_files(paths, folder_ids)
+        submissions += len(batch)
+        if dry_run:
+            referenced = get_referenced_paths(paths, expired)
+            orphaned.update(
+                filer_file.pk for filer_file in linked_files if get_file_path(filer_file) not in referenced)
+            files = len(orphaned)
+            continue
+        # The references of the deleted rows are removed by the signals.
+        FormSubmission.objects.filter(pk__in=pks).delete()
+        SubmissionStep.objects.filter(
+            submission_type=FormSubmission._meta.model_name,
+            post_ident__in=[post_ident for _, post_ident in batch if post_ident],
+        ).delete()
+        referenced = get_referenced_paths(paths)
+        for filer_file in linked_files:
+            if get_file_path(filer_file) not in referenced:
+                filer_file.delete()
+                files += 1
+        if sleep:
+            time.sleep(sleep)
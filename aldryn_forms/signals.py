@@ -1,7 +1,10 @@
-from django.db.models.signals import pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import Signal, receiver
 
-from .models import EmailFieldPlugin
+from .answers import count_answers, get_answers, get_choice_fields, is_answer_counting_enabled
+from .models import EmailFieldPlugin, FormSubmission, SubmissionStep, SubmittedToBeSent, build_form_fields
+from .references import delete_file_references, update_file_references
+from .statistics import count_submission, is_statistics_enabled
 
 
 form_pre_save = Signal()
@@ -13,3 +16,35 @@ def protect_form_action_backend(sender, instance, using, **kwargs):
     plugin_form, action_backend = instance.get_parent_form_action_backend()
     if action_backend is not None:
         getattr(action_backend, "delete_field", lambda field, form: None)(instance, plugin_form)
+
+
+@receiver(post_save, sender=FormSubmission, dispatch_uid='aldryn_forms_post_save_submission')
+def count_submission_statistics(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and is_statistics_enabled():
+        count_submission(instance)
+
+
+@receiver(post_save, sender=FormSubmission, dispatch_uid='aldryn_forms_post_save_submission_references')
+@receiver(post_save, sender=SubmittedToBeSent, dispatch_uid='aldryn_forms_post_save_to_be_sent_references')
+@receiver(post_save, sender=SubmissionStep, dispatch_uid='aldryn_forms_post_save_step_references')
+def save_file_references(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and (update_fields is None or 'data' in update_fields):
+        update_file_references(instance)
+
+
+@receiver(post_delete, sender=FormSubmission, dispatch_uid='aldryn_forms_post_delete_submission_references')
+@receiver(post_delete, sender=SubmittedToBeSent, dispatch_uid='aldryn_forms_post_delete_to_be_sent_references')
+@receiver(post_delete, sender=SubmissionStep, dispatch_uid='aldryn_forms_post_delete_step_references')
+def remove_file_references(sender, instance, **kwargs):
+    delete_file_references(sender, [instance.pk])
+
+
+@receiver(form_post_save, dispatch_uid='aldryn_forms_form_post_save_answers')
+def count_answer_statistics(sender, instance, form, request, **kwargs):
+    if form.instance.honeypot_filled or not is_answer_counting_enabled():
+        return
+    choice_fields = get_choice_fields(instance)
+    if choice_fields:
+        # The field ids are computed the same way as from the saved data.
+        form_fields = build_form_fields([field._asdict() for field in form.get_serialized_fields()])
+        count_answers(instance.name, get_answers(form_fields, choice_fields))
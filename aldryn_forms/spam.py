@@ -0,0 +1,51 @@
+import hashlib
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .constants import SPAM_COUNTER_DAYS, SPAM_COUNTER_PREFIX
+from .models import FormPlugin, SpamCounter
+
+
+def get_spam_counter_key(name: str, day: date) -> str:
+    """Get the cache key of the honeypot counter for the form name and the day."""
+    digest = hashlib.md5(name.encode()).hexdigest()
+    return f"{SPAM_COUNTER_PREFIX}:{day.isoformat()}:{digest}"
+
+
+def count_honeypot_hit(name: str) -> None:
+    """Increment the honeypot counter of the form in the cache."""
+    key = get_spam_counter_key(name, timezone.localdate())
+    timeout = SPAM_COUNTER_DAYS * 24 * 60 * 60
+    if cache.add(key, 1, timeout):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The key expired between add() and incr().
+        cache.add(key, 1, timeout)
+
+
+def flush_honeypot_counters(days: int = SPAM_COUNTER_DAYS) -> int:
+    """Move the honeypot counters from the cache into the database. Return the number of flushed hits."""
+    names = set(FormPlugin.objects.values_list('name', flat=True))
+    today = timezone.localdate()
+    flushed = 0
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        keys = {get_spam_counter_key(name, day): name for name in names}
+        for key, hits in cache.get_many(keys.keys()).items():
+            if not hits:
+                continue
+            try:
+                # Decrement instead of delete, so hits counted in the meantime are not lost.
+                cache.decr(key, hits)
+            except ValueError:
+                continue
+            counter, created = SpamCounter.objects.get_or_create(name=keys[key], day=day, defaults={'hits': hits})
+            if not created:
+                SpamCounter.objects.filter(pk=counter.pk).update(hits=F('hits') + hits)
+            flushed += hits
+    return flushed
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Iterable, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connection, transaction
+from django.db.models import Value
+from django.db.models.functions import Replace
+from django.http import HttpRequest
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from filer.models import filemodels, imagemodels
+
+from .compression import decompress_text
+from .constants import ALDRYN_FORMS_DEFERRED_UPLOADS, ALDRYN_FORMS_UPLOADS_STAGING_DIR, STAGED_UPLOAD_PREFIX
+from .models import FormSubmission, FormSubmissionBase, StagedUpload, SubmissionStep, SubmittedToBeSent
+from .references import add_file_references
+from .uploads import (
+    find_duplicate, get_filer_file_fields, get_upload_info, hash_file, is_deduplication_enabled, record_digest,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class StagedFile(NamedTuple):
+    """Replacement of the filer file in the cleaned data until the upload is moved into filer."""
+
+    original_filename: str
+    absolute_uri: str
+    token: str
+
+
+def is_deferred_upload_enabled() -> bool:
+    """Check if uploads are staged and moved into filer later by the aldryn_forms_ingest_uploads command."""
+    return getattr(settings, ALDRYN_FORMS_DEFERRED_UPLOADS, False)
+
+
+def get_staging_dir() -> str:
+    """Get the local directory for staged uploads."""
+    return getattr(
+        settings, ALDRYN_FORMS_UPLOADS_STAGING_DIR, os.path.join(tempfile.gettempdir(), "aldryn_forms_uploads"))
+
+
+def get_placeholder(token: str) -> str:
+    """Get the placeholder of the link to the staged upload."""
+    return f"{STAGED_UPLOAD_PREFIX}{token}"
+
+
+def stage_upload(uploaded_file: UploadedFile, folder, request: HttpRequest) -> StagedFile:
+    """Write the uploaded file into the staging directory and record it in the manifest."""
+    token = get_random_string(32)
+    staging_dir = get_staging_dir()
+    os.makedirs(staging_dir, exist_ok=True)
+    path = os.path.join(staging_dir, token)
+    with open(path, "wb") as staged_file:
+        for chunk in uploaded_file.chunks():
+            staged_file.write(chunk)
+    uploaded_file.seek(0)
+    StagedUpload.objects.create(
+        token=token,
+        path=path,
+        original_filename=uploaded_file.name,
+        folder=folder,
+        base_uri=request.build_absolute_uri("/"),
+        is_image=get_upload_info(uploaded_file).is_image,
+        file_fields=get_filer_file_fields(uploaded_file),
+    )
+    return StagedFile(uploaded_file.name, get_placeholder(token), token)
+
+
+def link_staged_uploads(tokens: Iterable[str], post_ident: Optional[str], submission_id: Optional[int]) -> None:
+    """Record the submission and the post_ident of the steps which contain the placeholders of the staged uploads."""
+    StagedUpload.objects.filter(token__in=tokens).update(post_ident=post_ident or None, submission_id=submission_id)
+
+
+def has_staged_uploads(submission: FormSubmissionBase) -> bool:
+    """Check if the submission links an upload that has not been moved into filer yet."""
+    if STAGED_UPLOAD_PREFIX in decompress_text(submission.data):
+        return True
+    return bool(submission.post_ident) and submission.get_steps().filter(data__contains=STAGED_UPLOAD_PREFIX).exists()
+
+
+def replace_placeholder(staged: StagedUpload, uri: str) -> int:
+    """Replace the placeholder of the staged upload by the link in the submissions and steps containing it.
+
+    Only the rows linked to the upload are updated. Placeholders are never compressed (see compress_text), so the
+    replacement is done by the database and a step appended in the meantime is not overwritten. The link is added
+    into the file references of the rows. Return the number of updated rows.
+    """
+    # The values are stored in JSON.
+    old, new = json.dumps(get_placeholder(staged.token))[1:-1], json.dumps(uri)[1:-1]
+    querysets = []
+    if staged.submission_id is not None:
+        querysets.append(FormSubmission.objects.filter(pk=staged.submission_id))
+    if staged.post_ident:
+        for model in (FormSubmission, SubmittedToBeSent, SubmissionStep):
+            querysets.append(model.objects.filter(post_ident=staged.post_ident))
+    updated = 0
+    for queryset in querysets:
+        pks = list(queryset.filter(data__contains=old).values_list("pk", flat=True))
+        if not pks:
+            continue
+        model = queryset.model
+        values = {"data": Replace("data", Value(old), Value(new))}
+        if issubclass(model, FormSubmissionBase):
+            values["updated_at"] = timezone.now()
+        updated += model.objects.filter(pk__in=pks).update(**values)
+        add_file_references(model, pks, urlparse(uri).path)
+    return updated
+
+
+def ingest_upload(staged: StagedUpload) -> str:
+    """Save the staged file into filer. Return the absolute URI of the filer file."""
+    model = imagemodels.Image if staged.is_image else filemodels.File
+    deduplicate = is_deduplication_enabled()
+    with open(staged.path, "rb") as staged_file:
+        file = File(staged_file, name=staged.original_filename)
+        digest = hash_file(file) if deduplicate else None
+        filer_file = find_duplicate(digest, staged.folder) if deduplicate else None
+        if filer_file is None:
+            filer_file = model(
+                folder=staged.folder,
+                file=file,
+                name=staged.original_filename,
+                original_filename=staged.original_filename,
+                is_public=True,
+                **staged.file_fields,
+            )
+            filer_file.save()
+            if deduplicate:
+                record_digest(filer_file, digest)
+    return build_absolute_uri(staged.base_uri, filer_file.url)
+
+
+def build_absolute_uri(base_uri: str, url: str) -> str:
+    """Build the absolute URI of the file the same way as HttpRequest.build_absolute_uri()."""
+    if url.startswith(("http://", "https://", "//")):
+        return url
+    return base_uri.rstrip("/") + "/" + url.lstrip("/")
+
+
+def ingest_staged_uploads(workers: int = 4, limit: Optional[int] = None) -> Tuple[int, int]:
+    """Move staged uploads into filer and patch the links in the submissions.
+
+    The uploads are claimed under row locks until they are ingested, so the uploads locked by another run of the
+    command are skipped. The files are saved into filer in parallel by the workers. Return the number of ingested and
+    failed uploads.
+    """
+    with transaction.atomic():
+        staged_uploads = list(
+            StagedUpload.objects.select_for_update(skip_locked=True, of=("self",)).select_related("folder")[:limit])
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(partial(_ingest_or_error, in_thread=True), staged_uploads))
+        else:
+            results = [_ingest_or_error(staged) for staged in staged_uploads]
+
+        ingested, failed = 0, 0
+        for staged, (uri, error) in zip(staged_uploads, results):
+            if error is not None:
+                logger.error(f'Upload "{staged.original_filename}" ({staged.token}) was not ingested: {error}')
+                failed += 1
+                continue
+            replace_placeholder(staged, uri)
+            staged.delete()
+            ingested += 1
+    for staged, (uri, error) in zip(staged_uploads, results):
+        if error is None:
+            try:
+                os.remove(staged.path)
+            except OSError:
+                pass
+    return ingested, failed
+
+
+def _ingest_or_error(staged: StagedUpload, in_thread: bool = False) -> Tuple[Optional[str], Optional[Exception]]:
+    try:
+        return ingest_upload(staged), None
+    except Exception as error:
+        return None, error
+    finally:
+        if in_thread:
+            # Each worker thread has its own database connection.
+            connection.close()
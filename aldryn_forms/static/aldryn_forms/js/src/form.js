@@ -486,15 +486,118 @@ function adjustUploads(form) {
 }
 
 
+const chunkedUploadAttempts = 5
+
+
+async function sendChunk(upload, file, headers) {
+    const response = await fetch(`${upload.url}?offset=${upload.offset}`, {
+        method: "POST",
+        body: file.slice(upload.offset, upload.offset + upload.chunk_size),
+        headers: headers,
+    })
+    const result = await response.json()
+    if (!response.ok) {
+        const error = new Error(result.error)
+        error.status = response.status
+        throw error
+    }
+    return result
+}
+
+async function uploadInChunks(form, input, file) {
+    // The upload is kept in the file, so that it is resumed when the form is sent again.
+    const csrf = form.querySelector("input[name=csrfmiddlewaretoken]")
+    const headers = {"X-Requested-With": "XMLHttpRequest"}
+    if (csrf) {
+        headers["X-CSRFToken"] = csrf.value
+    }
+    if (!file.aldrynFormsUpload) {
+        const data = new FormData()
+        data.append("form_plugin_id", form.querySelector("input[name=form_plugin_id]").value)
+        data.append("field_name", input.name)
+        data.append("filename", file.name)
+        data.append("size", file.size)
+        data.append("content_type", file.type)
+        const response = await fetch(input.dataset.chunked_upload_url, {method: "POST", body: data, headers: headers})
+        const result = await response.json()
+        if (!response.ok) {
+            throw new Error(result.error)
+        }
+        file.aldrynFormsUpload = result
+    }
+    const upload = file.aldrynFormsUpload
+    let attempts = 0
+    while (!upload.completed) {
+        try {
+            Object.assign(upload, await sendChunk(upload, file, headers))
+            attempts = 0
+        } catch (error) {
+            attempts += 1
+            if (attempts >= chunkedUploadAttempts || (error.status && error.status !== 409 && error.status < 500)) {
+                throw error
+            }
+            // Ask the server where to resume the upload.
+            try {
+                const response = await fetch(upload.url, {headers: headers})
+                if (response.ok) {
+                    Object.assign(upload, await response.json())
+                }
+            } catch (e) {
+                console.error(e)
+            }
+        }
+    }
+    return upload.token
+}
+
+async function uploadFilesInChunks(form, formData) {
+    // Replace files by tokens of the files uploaded in chunks.
+    const names = []
+    for (const pair of formData.entries()) {
+        if (pair[1] instanceof File && !names.includes(pair[0])) {
+            names.push(pair[0])
+        }
+    }
+    for (const name of names) {
+        const input = form.querySelector(`input[name="${name}"]`)
+        if (!input || !input.dataset.chunked_upload_url) {
+            continue
+        }
+        const files = formData.getAll(name)
+        formData.delete(name)
+        for (const file of files) {
+            if (file instanceof File && file.size) {
+                formData.append(name + "_upload_token", await uploadInChunks(form, input, file))
+            }
+        }
+    }
+    return formData
+}
+
+
+function getIdempotencyKey(form) {
+    // The key is kept until the form is successfully sent, so that re-sends are recognized as duplicates.
+    if (!form.dataset.idempotency_key) {
+        form.dataset.idempotency_key = window.crypto && window.crypto.randomUUID
+            ? window.crypto.randomUUID()
+            : `${Date.now()}-${Math.random().toString(36).slice(2)}`
+    }
+    return form.dataset.idempotency_key
+}
+
 export async function sendData(form) {
     removeMessages(form)
-    const formData = form.classList.contains("adjust-uploads") ? adjustUploads(form) : new FormData(form)
+    let formData = form.classList.contains("adjust-uploads") ? adjustUploads(form) : new FormData(form)
     try {
+        formData = await uploadFilesInChunks(form, formData)
         const response = await fetch(form.action, {
             method: "POST",
             body: formData,
             headers: {
                 "X-Requested-With": "XMLHttpRequest",
+                "Idempotency-Key": getIdempotencyKey(form),
+                // Uploads are checked by the limits of the form while they are received.
+                "X-Aldryn-Forms-Plugin-Id": formData.get("form_plugin_id"),
             },
         })
         const data = await response.json()
@@ -516,6 +619,7 @@ export async function sendData(form) {
                 }
             }
         } else {
+            delete form.dataset.idempotency_key
             if (form.dataset.run_next) {
                 document[form.dataset.run_next](form, data)
             } else {
@@ -0,0 +1,67 @@
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from .constants import ALDRYN_FORMS_STATISTICS
+from .models import FormSubmission, SubmissionStatistics
+
+
+def is_statistics_enabled() -> bool:
+    return bool(getattr(settings, ALDRYN_FORMS_STATISTICS, False))
+
+
+def count_submission(submission: FormSubmission) -> None:
+    """Add the new submission to the statistics of its day."""
+    lookup = {
+        "name": submission.name,
+        "day": timezone.localdate(submission.sent_at),
+        "language": submission.language,
+    }
+    spam, pending = int(submission.honeypot_filled), int(bool(submission.post_ident))
+    increments = {"total": F("total") + 1, "spam": F("spam") + spam, "pending": F("pending") + pending}
+    if SubmissionStatistics.objects.filter(**lookup).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            SubmissionStatistics.objects.create(total=1, spam=spam, pending=pending, **lookup)
+    except IntegrityError:
+        # The row was created by a concurrent submission.
+        SubmissionStatistics.objects.filter(**lookup).update(**increments)
+
+
+def uncount_pending(submission: FormSubmission) -> None:
+    """Remove the submission, whose post_ident was cleared, from the pending number of its day."""
+    SubmissionStatistics.objects.filter(
+        name=submission.name, day=timezone.localdate(submission.sent_at), language=submission.language,
+    ).update(pending=Greatest(F("pending") - 1, 0))
+
+
+def update_statistics(since: date) -> int:
+    """Recompute the statistics of the days since the date from the submissions. Return the number of rows.
+
+    All rows of the recomputed days are replaced, so forms whose submissions were deleted are not counted anymore.
+    The statistics of older days are kept.
+    """
+    start = datetime.combine(since, time.min)
+    if settings.USE_TZ:
+        start = timezone.make_aware(start)
+    rows = (
+        FormSubmission.objects.filter(sent_at__gte=start)
+        .annotate(day=TruncDate("sent_at"))
+        .values("name", "day", "language")
+        .annotate(
+            total=Count("pk"),
+            spam=Count("pk", filter=Q(honeypot_filled=True)),
+            pending=Count("pk", filter=Q(post_ident__isnull=False)),
+        )
+        .order_by()
+    )
+    statistics = [SubmissionStatistics(**row) for row in rows]
+    with transaction.atomic():
+        SubmissionStatistics.objects.filter(day__gte=since).delete()
+        SubmissionStatistics.objects.bulk_create(statistics)
+    return len(statistics)
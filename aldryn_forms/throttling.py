@@ -0,0 +1,119 @@
+import hashlib
+import time
+from typing import Optional, Union
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils.translation import gettext_lazy as _
+
+from .constants import ALDRYN_FORMS_RATE_LIMIT, RATE_LIMIT_PERIODS, RATE_LIMIT_PREFIX
+
+
+RATE_LIMITED_FORMS = "aldryn_forms_rate_limited_forms"
+RATE_LIMIT_MESSAGE = _("Too many submissions. Please try again later.")
+
+
+def get_rate_limit_settings() -> dict:
+    """Get the rate limit settings. The limiter is disabled if the dict is empty."""
+    return getattr(settings, ALDRYN_FORMS_RATE_LIMIT, {})
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """Parse rate in format "number/period", e.g. "10/m" or "3/10s". Return number of requests and period in seconds."""
+    try:
+        num, period = rate.split("/")
+        multiplier = int(period[:-1]) if len(period) > 1 else 1
+        return int(num), multiplier * RATE_LIMIT_PERIODS[period[-1]]
+    except (ValueError, KeyError, IndexError) as err:
+        raise ImproperlyConfigured(f'Invalid rate "{rate}" in settings.{ALDRYN_FORMS_RATE_LIMIT}.') from err
+
+
+def get_client_ip(request: HttpRequest) -> str:
+    """Get the client IP address. The header can be set for a site behind a proxy.
+
+    Proxies append addresses to X-Forwarded-For and the entries before them are sent by the client, so they can be
+    forged. The address added by the nearest trusted proxy is taken: the last one, or the one at the number of the
+    trusted proxies (setting proxy_count) counted from the right.
+    """
+    config = get_rate_limit_settings()
+    value = request.META.get(config.get("ip_header", "REMOTE_ADDR"), "")
+    addresses = [address.strip() for address in value.split(",") if address.strip()]
+    if not addresses:
+        return ""
+    proxy_count = config.get("proxy_count", 1)
+    return addresses[-min(max(proxy_count, 1), len(addresses))]
+
+
+def get_client_key(request: HttpRequest, form_plugin_id: Union[int, str]) -> str:
+    """Get the key of the client composed of IP address, form id and session."""
+    session = getattr(request, "session", None)
+    session_key = "" if session is None else (session.session_key or "")
+    value = f"{get_client_ip(request)}:{form_plugin_id}:{session_key}"
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def increment(key: str, timeout: int) -> int:
+    """Atomically increment the counter in the cache and return the new value."""
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key expired between add() and incr().
+        cache.add(key, 1, timeout)
+        return 1
+
+
+def hit_window(client_key: str, limit: int, period: int, now: float) -> bool:
+    """Register the hit in the sliding window. Return True if the limit was not exceeded.
+
+    The count of the previous fixed window is weighted by the part of it still covered
+    by the sliding window, so the counters do not have to store timestamps of hits.
+    """
+    window = int(now // period)
+    key = f"{RATE_LIMIT_PREFIX}:{period}:{client_key}"
+    current = increment(f"{key}:{window}", period * 2)
+    previous = cache.get(f"{key}:{window - 1}", 0)
+    elapsed = (now % period) / period
+    return previous * (1 - elapsed) + current <= limit
+
+
+def is_rate_limited(request: HttpRequest, form_plugin_id: Union[int, str]) -> bool:
+    """Check if the client exceeded the submission rate of the form.
+
+    A string key (e.g. of the form and the chunked upload) counts the hits separately from the submissions.
+
+    The result is stored in the request, so the hit is counted only once,
+    even if the form is processed by both the middleware and the plugin.
+    """
+    rate_limited_forms = getattr(request, RATE_LIMITED_FORMS, {})
+    if form_plugin_id in rate_limited_forms:
+        return rate_limited_forms[form_plugin_id]
+
+    config = get_rate_limit_settings()
+    limited = False
+    if config:
+        client_key = get_client_key(request, form_plugin_id)
+        now = time.time()
+        for name in ("burst", "rate"):
+            if config.get(name):
+                limit, period = parse_rate(config[name])
+                # All windows are hit, so that the burst does not hide the hits from the rate.
+                limited = not hit_window(client_key, limit, period, now) or limited
+
+    rate_limited_forms[form_plugin_id] = limited
+    setattr(request, RATE_LIMITED_FORMS, rate_limited_forms)
+    return limited
+
+
+def get_rate_limited_response(request: HttpRequest, form_plugin_id: int) -> Optional[HttpResponse]:
+    """Get the response with status 429 if it is enabled and the client exceeded the submission rate."""
+    if not get_rate_limit_settings().get("status_429"):
+        return None
+    if not is_rate_limited(request, form_plugin_id):
+        return None
+    if request.META.get('HTTP_X_REQUESTED_WITH') == "XMLHttpRequest":
+        return JsonResponse({"status": "ERROR", "message": str(RATE_LIMIT_MESSAGE)}, status=429)
+    return HttpResponse(RATE_LIMIT_MESSAGE, status=429, content_type="text/plain; charset=utf-8")
@@ -0,0 +1,107 @@
+from typing import Dict, Optional
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http import HttpRequest
+from django.utils.translation import gettext
+
+from .forms import FileSizeCheckMixin
+from .models import FormPlugin
+from .uploads import MAGIC_BYTES, SVG_MIME_TYPE, sniff_content_type
+from .utils import get_plugin_tree
+
+
+FORM_PLUGIN_ID_HEADER = "HTTP_X_ALDRYN_FORMS_PLUGIN_ID"
+SNIFFED_TYPES = {content_type for _, content_type in MAGIC_BYTES}
+
+
+class RejectedUpload(SimpleUploadedFile):
+    """Replacement of the file rejected while it was received. Its data are not stored."""
+
+    def __init__(self, name: str, content_type: str, upload_error: str):
+        super().__init__(name, b"", content_type)
+        self.upload_error = upload_error
+
+
+def is_accepted_content(form_field: FileSizeCheckMixin, file_name: str, content_type: str, data: bytes) -> bool:
+    """Check the type of the file sniffed from its first bytes. The type sent by the client is used if it is unknown."""
+    if content_type != SVG_MIME_TYPE:
+        sniffed_type = sniff_content_type(data)
+        if sniffed_type is not None:
+            content_type = sniffed_type
+        elif content_type.startswith("image/") or content_type in SNIFFED_TYPES:
+            # The file claims a type with known magic bytes, but they do not match.
+            content_type = "application/octet-stream"
+    return form_field.is_accepted_type(file_name, content_type)
+
+
+def get_upload_fields(form_plugin_id: int) -> Dict[str, FileSizeCheckMixin]:
+    """Get the upload fields of the form with the rules of their plugins."""
+    form_plugin = get_plugin_tree(FormPlugin, pk=form_plugin_id)
+    upload_fields = {}
+    for field in form_plugin.get_form_fields():
+        plugin_instance = field.plugin_instance
+        form_field = plugin_instance.get_plugin_class_instance().get_form_field(plugin_instance)
+        if isinstance(form_field, FileSizeCheckMixin):
+            upload_fields[field.name] = form_field
+    return upload_fields
+
+
+class FormUploadLimitHandler(FileUploadHandler):
+    """Reject the file as soon as the size exceeds the limit of the field or the first chunk is not of accepted type.
+
+    The rest of the rejected file is dropped, so it is not stored by the next handlers.
+    """
+
+    def __init__(self, request: HttpRequest, upload_fields: Dict[str, FileSizeCheckMixin]):
+        super().__init__(request)
+        self.upload_fields = upload_fields
+        self.field_sizes: Dict[str, int] = {}
+        self.upload_error: Optional[str] = None
+
+    def new_file(self, field_name, file_name, content_type, *args, **kwargs):
+        super().new_file(field_name, file_name, content_type, *args, **kwargs)
+        self.upload_error = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.upload_error is not None:
+            return None
+        form_field = self.upload_fields.get(self.field_name)
+        if form_field is None:
+            return raw_data
+        if start == 0 and form_field.accepted_types and not is_accepted_content(
+                form_field, self.file_name, self.content_type, raw_data):
+            self.upload_error = gettext('"%(file_name)s" is not of accepted file type.') % {
+                'file_name': self.file_name} + " " + form_field.get_accepted_types_message()
+            return None
+        size = self.field_sizes.get(self.field_name, 0) + start + len(raw_data)
+        self.upload_error = form_field.check_files_size(size)
+        return raw_data if self.upload_error is None else None
+
+    def file_complete(self, file_size):
+        if self.upload_error is not None:
+            return RejectedUpload(self.file_name, self.content_type, self.upload_error)
+        if self.field_name in self.upload_fields:
+            self.field_sizes[self.field_name] = self.field_sizes.get(self.field_name, 0) + file_size
+        return None
+
+
+def get_form_plugin_id(request: HttpRequest) -> Optional[int]:
+    """Get the form id before the body is parsed. It is sent in the header or in the query string."""
+    form_plugin_id = request.META.get(FORM_PLUGIN_ID_HEADER) or request.GET.get("form_plugin_id") or ""
+    return int(form_plugin_id) if form_plugin_id.isdigit() else None
+
+
+def install_upload_limits(request: HttpRequest) -> None:
+    """Install the handler with the limits of the submitted form. It must be called before request.POST is read."""
+    if request.method != "POST" or not request.content_type.startswith("multipart/"):
+        return
+    form_plugin_id = get_form_plugin_id(request)
+    if form_plugin_id is None:
+        return
+    try:
+        upload_fields = get_upload_fields(form_plugin_id)
+    except FormPlugin.DoesNotExist:
+        return
+    if upload_fields:
+        request.upload_handlers.insert(0, FormUploadLimitHandler(request, upload_fields))
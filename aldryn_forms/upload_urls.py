@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import chunked_upload_start_view, chunked_upload_view
+
+
+urlpatterns = [
+    path('', chunked_upload_start_view, name='aldryn_forms_chunked_upload_start'),
+    path('<str:token>/', chunked_upload_view, name='aldryn_forms_chunked_upload'),
+]
@@ -0,0 +1,145 @@
+import hashlib
+import mimetypes
+from io import BytesIO
+from typing import Any, Dict, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+
+from filer.models import filemodels
+from PIL import Image
+
+from .constants import ALDRYN_FORMS_DEDUPLICATE_UPLOADS
+from .models import FileDigest
+
+
+UPLOAD_INFO = "aldryn_forms_upload_info"
+UPLOAD_DIGEST = "aldryn_forms_upload_digest"
+SVG_MIME_TYPE = "image/svg+xml"
+MAGIC_BYTES = (
+    (b"%PDF-", "application/pdf"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/msword"),
+)
+
+
+class UploadInfo(NamedTuple):
+    """Type and dimensions of the uploaded file."""
+
+    is_image: bool
+    mime_type: Optional[str] = None
+    width: Optional[float] = None
+    height: Optional[float] = None
+    transparent: bool = False
+
+
+class UploadDigest(NamedTuple):
+    """Hashes and size of the uploaded file."""
+
+    sha1: str
+    sha256: str
+    size: int
+
+
+def sniff_image(uploaded_file: UploadedFile) -> UploadInfo:
+    """Identify the image by its magic bytes and read the dimensions from its header.
+
+    Pillow only parses the header in Image.open(). The pixel data is not decoded.
+    """
+    try:
+        uploaded_file.seek(0)
+        with Image.open(uploaded_file) as img:
+            transparent = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+            return UploadInfo(True, Image.MIME.get(img.format), img.size[0], img.size[1], transparent)
+    except Exception:
+        return UploadInfo(False)
+    finally:
+        uploaded_file.seek(0)
+
+
+def sniff_content_type(data: bytes) -> Optional[str]:
+    """Identify the type of the file by the magic bytes at its beginning."""
+    for signature, content_type in MAGIC_BYTES:
+        if data.startswith(signature):
+            return content_type
+    try:
+        with Image.open(BytesIO(data)) as img:
+            return Image.MIME.get(img.format)
+    except Exception:
+        return None
+
+
+def get_upload_info(uploaded_file: UploadedFile) -> UploadInfo:
+    """Get the type and dimensions of the uploaded file. The result is stored in the file for the next calls."""
+    info = getattr(uploaded_file, UPLOAD_INFO, None)
+    if info is None:
+        if uploaded_file.content_type == SVG_MIME_TYPE:
+            # The dimensions are set by the image field after the SVG is loaded.
+            info = UploadInfo(True, SVG_MIME_TYPE, transparent=True)
+        else:
+            info = sniff_image(uploaded_file)
+        set_upload_info(uploaded_file, info)
+    return info
+
+
+def set_upload_info(uploaded_file: UploadedFile, info: UploadInfo) -> None:
+    """Store the type and dimensions in the uploaded file."""
+    setattr(uploaded_file, UPLOAD_INFO, info)
+
+
+def get_filer_file_fields(uploaded_file: UploadedFile) -> Dict[str, Any]:
+    """Get values of the filer file fields, so that filer does not read and decode the file again.
+
+    Filer skips its own computation when the size and the SHA1 hash are set in the constructor.
+    An empty dict is returned when the dimensions of the image are not known.
+    """
+    info = get_upload_info(uploaded_file)
+    if info.is_image and (info.width is None or info.height is None):
+        return {}
+    digest = get_upload_digest(uploaded_file)
+    fields = {
+        '_file_size': digest.size,
+        'sha1': digest.sha1,
+        # Filer guesses the type from the file name.
+        'mime_type': mimetypes.guess_type(uploaded_file.name)[0] or 'application/octet-stream',
+    }
+    if info.is_image:
+        fields.update({'_width': info.width, '_height': info.height, '_transparent': info.transparent})
+    return fields
+
+
+def hash_file(file) -> UploadDigest:
+    """Compute the hashes of the file in one pass over its chunks."""
+    sha1, sha256, size = hashlib.sha1(), hashlib.sha256(), 0
+    file.seek(0)
+    for chunk in file.chunks():
+        sha1.update(chunk)
+        sha256.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return UploadDigest(sha1.hexdigest(), sha256.hexdigest(), size)
+
+
+def get_upload_digest(uploaded_file: UploadedFile) -> UploadDigest:
+    """Get the hashes of the uploaded file. The result is stored in the file for the next calls."""
+    digest = getattr(uploaded_file, UPLOAD_DIGEST, None)
+    if digest is None:
+        digest = hash_file(uploaded_file)
+        setattr(uploaded_file, UPLOAD_DIGEST, digest)
+    return digest
+
+
+def is_deduplication_enabled() -> bool:
+    """Check if an uploaded file is replaced by the same file already stored in the folder."""
+    return getattr(settings, ALDRYN_FORMS_DEDUPLICATE_UPLOADS, False)
+
+
+def find_duplicate(digest: UploadDigest, folder) -> Optional[filemodels.File]:
+    """Find the oldest filer file in the folder with the same SHA-256 hash and size."""
+    file_ids = FileDigest.objects.filter(sha256=digest.sha256, size=digest.size).values("file_id")
+    return filemodels.File.objects.filter(pk__in=file_ids, folder=folder).order_by("pk").first()
+
+
+def record_digest(filer_file: filemodels.File, digest: UploadDigest) -> None:
+    """Store the hash of the filer file, so that it can be found by the next uploads."""
+    FileDigest.objects.update_or_create(file=filer_file, defaults={"sha256": digest.sha256, "size": digest.size})
@@ -1,8 +1,11 @@
-from django.http import HttpResponseBadRequest, HttpResponseRedirect
+from django.http import HttpResponseBadRequest, HttpResponseRedirect, JsonResponse
 from django.shortcuts import render
-from django.urls import resolve
+from django.urls import resolve, reverse
+from django.views.decorators.http import require_http_methods, require_POST
 
-from .models import FormPlugin
+from .chunked import ChunkedUploadError, append_chunk, get_chunked_upload_settings, start_upload
+from .models import ChunkedUpload, FormPlugin
+from .throttling import RATE_LIMIT_MESSAGE, get_rate_limited_response, is_rate_limited
 from .utils import get_plugin_tree
 
 
@@ -33,6 +36,10 @@ def submit_form_view(request):
             # fail if plugin_id has been tampered with
             return HttpResponseBadRequest()
 
+        response = get_rate_limited_response(request, int(form_plugin_id))
+        if response is not None:
+            return response
+
         try:
             # I believe this could be an issue as we don't check if the form submitted
             # is in anyway tied to this page.
@@ -49,3 +56,66 @@ def submit_form_view(request):
         if form.is_valid() and success_url:
             return HttpResponseRedirect(success_url)
     return render(request, template, context)
+
+
+def get_chunked_upload_data(upload: ChunkedUpload) -> dict:
+    return {
+        "token": upload.token,
+        "url": reverse("aldryn_forms_chunked_upload", kwargs={"token": upload.token}),
+        "offset": upload.received,
+        "completed": upload.completed,
+    }
+
+
+@require_POST
+def chunked_upload_start_view(request):
+    """Start the upload of a file in chunks."""
+    options = get_chunked_upload_settings()
+    if options is None:
+        return HttpResponseBadRequest()
+    form_plugin_id = request.POST.get('form_plugin_id') or ''
+    size = request.POST.get('size') or ''
+    if not form_plugin_id.isdigit() or not size.isdigit():
+        return HttpResponseBadRequest()
+    # Starting an upload is counted as an attempt to submit the form.
+    if is_rate_limited(request, int(form_plugin_id)):
+        return JsonResponse({"error": str(RATE_LIMIT_MESSAGE)}, status=429)
+    try:
+        upload = start_upload(
+            int(form_plugin_id),
+            request.POST.get('field_name', ''),
+            request.POST.get('filename', ''),
+            int(size),
+            request.POST.get('content_type') or 'application/octet-stream',
+        )
+    except ChunkedUploadError as error:
+        return JsonResponse({"error": str(error)}, status=error.status)
+    return JsonResponse({**get_chunked_upload_data(upload), "chunk_size": options["chunk_size"]}, status=201)
+
+
+@require_http_methods(["GET", "POST"])
+def chunked_upload_view(request, token):
+    """Append the chunk in the request body at the offset. GET returns the offset to resume the upload."""
+    if get_chunked_upload_settings() is None:
+        return HttpResponseBadRequest()
+    if request.method == "GET":
+        try:
+            upload = ChunkedUpload.objects.get(token=token)
+        except ChunkedUpload.DoesNotExist:
+            return JsonResponse({"error": "Upload does not exist."}, status=404)
+        return JsonResponse(get_chunked_upload_data(upload))
+    offset = request.GET.get('offset') or ''
+    if not offset.isdigit():
+        return HttpResponseBadRequest()
+    form_plugin_id = ChunkedUpload.objects.filter(token=token).values_list('form_plugin_id', flat=True).first()
+    if form_plugin_id is None:
+        return JsonResponse({"error": "Upload does not exist."}, status=404)
+    # The chunks are counted for each upload, so that they do not use up the submissions of the form.
+    if is_rate_limited(request, f"{form_plugin_id}:{token}"):
+        return JsonResponse({"error": str(RATE_LIMIT_MESSAGE)}, status=429)
+    try:
+        # The body is read in blocks, so that the whole chunk is not held in memory.
+        upload = append_chunk(token, int(offset), request)
+    except ChunkedUploadError as error:
+        return JsonResponse({"error": str(error)}, status=error.status)
+    return JsonResponse(get_chunked_upload_data(upload))
@@ -1,15 +1,20 @@
 import json
 from datetime import datetime, timezone
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.contrib.messages import get_messages
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils.module_loading import import_string
 
 import responses
 from freezegun import freeze_time
 from testfixtures import LogCapture
 
+from aldryn_forms.admin.base import get_list_display_field
+from aldryn_forms.admin.selection import iter_chunks
 from aldryn_forms.models import FormSubmission, Webhook
 
 
@@ -129,21 +134,65 @@ class AdminActionsTest(TestCase):
              "'test', 'label': 'Test 2', 'field_occurrence': 1, 'value': 2}]}"),
         )
 
+    def post_action(self, action, path_name, query="", **data):
+        response = self.client.post(
+            reverse("admin:aldryn_forms_formsubmission_changelist") + query, {"action": action, **data})
+        self.assertEqual(response.status_code, 302)
+        path, _, query = response["Location"].partition("?")
+        self.assertEqual(path, reverse(path_name))
+        self.assertRegex(query, r"^selection=[\w-]+$")
+        return response["Location"]
+
     def test_action_export_webhook(self):
-        data = {"action": "export_webhook", "_selected_action": [str(self.sub1.pk), str(self.sub2.pk)]}
-        response = self.client.post(reverse("admin:aldryn_forms_formsubmission_changelist"), data)
-        self.assertRedirects(
-            response, reverse("admin:webhook_export") + f"?ids={self.sub2.pk}.{self.sub1.pk}",
-            fetch_redirect_response=False)
+        url = self.post_action(
+            "export_webhook", "admin:webhook_export", _selected_action=[str(self.sub1.pk), str(self.sub2.pk)])
+        self.assertContains(self.client.get(url), "Number of items: 2")
+        response = self.client.post(url, {"webhook": self.hook.pk})
+        self.assertEqual([item["name"] for item in response.json()["data"]], ["Test 1", "Test 2"])
         self.log_handler.check()
 
     def test_action_send_webhook(self):
-        data = {"action": "send_webhook", "_selected_action": [str(self.sub1.pk), str(self.sub2.pk)]}
-        response = self.client.post(reverse("admin:aldryn_forms_formsubmission_changelist"), data)
+        url = self.post_action("send_webhook", "admin:webhook_send", _selected_action=[str(self.sub1.pk)])
+        with responses.RequestsMock() as rsps:
+            rsps.add(responses.POST, self.url, body="{}")
+            response = self.client.post(url, {"webhook": self.hook.pk})
+            self.assertEqual(len(rsps.calls), 1)
         self.assertRedirects(
-            response, reverse("admin:webhook_send") + f"?ids={self.sub2.pk}.{self.sub1.pk}",
-            fetch_redirect_response=False)
-        self.log_handler.check()
+            response, reverse("admin:aldryn_forms_formsubmission_changelist"), fetch_redirect_response=False)
+
+    def test_action_select_across(self):
+        FormSubmission.objects.create(name="Other", data="[]")
+        url = self.post_action(
+            "export_webhook", "admin:webhook_export", _selected_action=[str(self.sub1.pk)], select_across="1",
+            query="?q=Test")
+        self.assertContains(self.client.get(url), "Number of items: 2")
+
+    def test_search_help_text(self):
+        response = self.client.get(reverse("admin:aldryn_forms_formsubmission_changelist"))
+        self.assertContains(response, "In compact submissions only the values of the fields are found")
+
+    def test_selection_of_other_user(self):
+        url = self.post_action("export_webhook", "admin:webhook_export", _selected_action=[str(self.sub1.pk)])
+        other = get_user_model().objects.create(username="other", is_active=True, is_staff=True, is_superuser=True)
+        self.client.force_login(other)
+        response = self.client.get(url)
+        self.assertRedirects(
+            response, reverse("admin:aldryn_forms_formsubmission_changelist"), fetch_redirect_response=False)
+
+    def test_action_select_across_stores_filter(self):
+        url = self.post_action(
+            "export_webhook", "admin:webhook_export", _selected_action=[str(self.sub1.pk)], select_across="1",
+            query="?q=Test")
+        FormSubmission.objects.create(name="Test 3", data=json.dumps([{"label": "Test 3", "name": "test", "value": 3}]))
+        FormSubmission.objects.create(name="Other", data="[]")
+        response = self.client.post(url, {"webhook": self.hook.pk})
+        self.assertEqual([item["name"] for item in response.json()["data"]], ["Test 1", "Test 2", "Test 3"])
+
+    def test_iter_chunks(self):
+        with freeze_time(datetime(2025, 3, 26, tzinfo=timezone.utc)):
+            sub3 = FormSubmission.objects.create(name="Test 3", data="[]")
+        chunks = [list(chunk) for chunk in iter_chunks(FormSubmission.objects.all(), chunk_size=2)]
+        self.assertEqual(chunks, [[sub3, self.sub1], [self.sub2]])
 
     def test_action_honeypot_filled_on(self):
         data = {"action": "honeypot_filled_on", "_selected_action": [str(self.sub1.pk)]}
@@ -191,3 +240,43 @@ class AdminActionsTest(TestCase):
                     </span>
                 </span>
             </td>""", html=True)
+
+    @override_settings(ALDRYN_FORMS_ADMIN_LARGE_TABLE={})
+    def test_formsubmission_changelist_large_table(self):
+        cache.delete("aldryn_forms_admin_names_formsubmission")
+        self.addCleanup(cache.delete, "aldryn_forms_admin_names_formsubmission")
+        url = reverse("admin:aldryn_forms_formsubmission_changelist")
+        response = self.client.get(url)
+        changelist = response.context["cl"]
+        self.assertIsNone(changelist.date_hierarchy)
+        self.assertFalse(changelist.show_full_result_count)
+        self.assertEqual(changelist.result_count, 2)
+        self.assertEqual([submission.get_deferred_fields() for submission in changelist.result_list], [
+            {"data", "recipients"}, {"data", "recipients"}])
+        name_filter = changelist.filter_specs[0]
+        self.assertEqual(name_filter.lookup_choices, [("Test 1", "Test 1"), ("Test 2", "Test 2")])
+        FormSubmission.objects.create(name="Test 3", data="[]")
+        # The names are cached.
+        response = self.client.get(url, {"name": "Test 2"})
+        changelist = response.context["cl"]
+        self.assertEqual(len(changelist.filter_specs[0].lookup_choices), 2)
+        self.assertQuerySetEqual(changelist.result_list, [self.sub2])
+
+    @override_settings(
+        ALDRYN_FORMS_ADMIN_LARGE_TABLE={},
+        ALDRYN_FORMS_SUBMISSION_LIST_DISPLAY_FIELD="aldryn_forms.admin.display_form_submission_data")
+    def test_formsubmission_changelist_large_table_display_data(self):
+        response = self.client.get(reverse("admin:aldryn_forms_formsubmission_changelist"))
+        self.assertEqual([submission.get_deferred_fields() for submission in response.context["cl"].result_list], [
+            set(), set()])
+
+    def test_list_display_field_resolved_once(self):
+        self.assertIsNone(get_list_display_field())
+        with override_settings(
+                ALDRYN_FORMS_SUBMISSION_LIST_DISPLAY_FIELD="aldryn_forms.admin.display_form_submission_data"):
+            with patch("aldryn_forms.admin.base.import_string", wraps=import_string) as mock_import:
+                response = self.client.get(reverse("admin:aldryn_forms_formsubmission_changelist"))
+            self.assertEqual(mock_import.call_count, 1)
+            self.assertEqual(len(response.context["cl"].result_list), 2)
+            self.assertEqual(get_list_display_field().__name__, "display_form_submission_data")
+        self.assertIsNone(get_list_display_field())
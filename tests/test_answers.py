@@ -0,0 +1,104 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
+
+from cms.api import add_plugin, create_page
+from cms.test_utils.testcases import CMSTestCase
+
+from aldryn_forms.answers import get_choice_fields, update_answer_counts
+from aldryn_forms.api.views import AnswerCountViewSet
+from aldryn_forms.models import FieldAnswerCount, FormSubmission, Option
+
+
+@override_settings(ALDRYN_FORMS_ANSWER_COUNTS=True)
+class FieldAnswerCountTest(CMSTestCase):
+
+    def setUp(self):
+        self.page = create_page("test page", "test_page.html", "en")
+        self.placeholder = self.page.get_placeholders("en").get(slot="content")
+        self.form_plugin = add_plugin(self.placeholder, "FormPlugin", "en", name="Survey", action_backend="default")
+        add_plugin(self.placeholder, "TextField", "en", target=self.form_plugin, label="Name", name="name")
+        color = add_plugin(self.placeholder, "SelectField", "en", target=self.form_plugin, label="Color", name="color")
+        self.colors = [Option.objects.create(field=color, value=value, position=i) for i, value in enumerate(
+            ["Red", "Blue"])]
+        pets = add_plugin(
+            self.placeholder, "MultipleSelectField", "en", target=self.form_plugin, label="Pets", name="pets")
+        self.pets = [Option.objects.create(field=pets, value=value, position=i) for i, value in enumerate(
+            ["Cat", "Dog"])]
+        add_plugin(self.placeholder, "BooleanField", "en", target=self.form_plugin, label="News", name="news")
+        add_plugin(self.placeholder, "SubmitButton", "en", target=self.form_plugin)
+
+    def submit(self, color, pets, news=False):
+        data = {
+            "language": "en", "form_plugin_id": self.form_plugin.pk, "name": "Tester",
+            "color": color.pk, "pets": [pet.pk for pet in pets],
+        }
+        if news:
+            data["news"] = "on"
+        response = self.client.post(self.page.get_absolute_url("en"), data)
+        self.assertEqual(response.status_code, 200)
+
+    def get_counts(self):
+        return list(FieldAnswerCount.objects.order_by("field_id", "value").values_list("field_id", "value", "count"))
+
+    def test_get_choice_fields(self):
+        self.assertEqual(get_choice_fields(self.form_plugin), {"color": False, "pets": True, "news": False})
+
+    def test_count(self):
+        self.submit(self.colors[0], self.pets, news=True)
+        self.submit(self.colors[0], self.pets[:1])
+        self.submit(self.colors[1], [])
+        expected = [
+            ("Color-:1", "Blue", 1),
+            ("Color-:1", "Red", 2),
+            ("News-:1", "No", 2),
+            ("News-:1", "Yes", 1),
+            ("Pets-:1", "Cat", 2),
+            ("Pets-:1", "Dog", 1),
+        ]
+        self.assertEqual(self.get_counts(), expected)
+        FieldAnswerCount.objects.all().delete()
+        self.assertEqual(update_answer_counts("Survey"), 6)
+        self.assertEqual(self.get_counts(), expected)
+
+    def test_spam_not_counted(self):
+        add_plugin(self.placeholder, "HoneypotField", "en", target=self.form_plugin, label="Trap", name="trap")
+        data = {
+            "language": "en", "form_plugin_id": self.form_plugin.pk, "name": "Tester", "color": self.colors[0].pk,
+            "pets": [self.pets[0].pk], "trap": "x",
+        }
+        self.client.post(self.page.get_absolute_url("en"), data)
+        self.assertEqual(self.get_counts(), [])
+        FormSubmission.objects.create(name="Survey", data='[{"name": "color", "value": "Red"}]', honeypot_filled=True)
+        self.assertEqual(update_answer_counts(), 0)
+
+    @override_settings(ALDRYN_FORMS_ANSWER_COUNTS=False)
+    def test_disabled(self):
+        self.submit(self.colors[0], [])
+        self.assertEqual(self.get_counts(), [])
+
+    def test_command(self):
+        data = [
+            {"name": "color", "label": "Color", "value": "Red"},
+            {"name": "pets", "label": "Pets", "value": "Cat, Dog"},
+        ]
+        FormSubmission.objects.create(name="Survey", data=json.dumps(data))
+        FieldAnswerCount.objects.create(name="Survey", field_id="Color-:1", value="Green", count=5)
+        out = StringIO()
+        call_command("aldryn_forms_update_answer_counts", verbosity=2, stdout=out)
+        self.assertEqual(out.getvalue(), "Updated 3 answer counters.\n")
+        self.assertEqual(self.get_counts(), [("Color-:1", "Red", 1), ("Pets-:1", "Cat", 1), ("Pets-:1", "Dog", 1)])
+
+    def test_api(self):
+        self.submit(self.colors[0], self.pets[1:])
+        view = AnswerCountViewSet.as_view({"get": "list"})
+        request = RequestFactory().get("/", {"name": "Survey", "field_id": "Pets-:1"})
+        self.assertEqual(view(request).status_code, 403)
+        request._user = get_user_model().objects.create(username="admin", is_superuser=True)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["results"], [{"name": "Survey", "field_id": "Pets-:1", "value": "Dog", "count": 1}])
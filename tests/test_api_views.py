@@ -1,14 +1,20 @@
+import gzip
 import json
 from datetime import datetime, timezone
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.utils import NotSupportedError
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.http import http_date
 
 from freezegun import freeze_time
+from rest_framework.renderers import JSONRenderer
 
+from aldryn_forms.api.serializers import FormSubmissionSerializer, SubmissionRowSerializer
+from aldryn_forms.api.utils import get_etag
 from aldryn_forms.api.views import FormViewSet, SubmissionsViewSet
-from aldryn_forms.models import FormPlugin, FormSubmission
+from aldryn_forms.models import FormPlugin, FormSubmission, SubmissionStep, SubmittedToBeSent
 
 
 class DataMixin:
@@ -43,6 +49,26 @@ class FormViewSetTest(DataMixin, TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, data)
 
+    def test_not_modified(self):
+        plugin = FormPlugin.objects.create(name="Form")
+        request = RequestFactory().get("/", HTTP_IF_NONE_MATCH=f'"{get_etag(1, plugin.changed_date, "/", "json")}"')
+        request._user = self.user
+        response = self.view(request)
+        self.assertEqual(response.status_code, 304)
+        self.assertIn("Accept", response["Vary"])
+
+    @override_settings(ALDRYN_FORMS_API_CACHE={"timeout": 60})
+    def test_cache(self):
+        plugin = FormPlugin.objects.create(name="Form")
+        etag = get_etag(1, plugin.changed_date, "/", "json")
+        data = {"count": 1, "next": None, "previous": None, "results": [{"name": "Cached"}]}
+        cache.set(f"aldryn_forms_api_forms_{etag}", data)
+        self.addCleanup(cache.clear)
+        response = self.view(self.request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, data)
+        self.assertEqual(response["ETag"], f'"{etag}"')
+
 
 @freeze_time(datetime(2025, 3, 14, 9, 30, tzinfo=timezone.utc))
 class SubmissionsViewSetTest(DataMixin, TestCase):
@@ -86,6 +112,75 @@ class SubmissionsViewSetTest(DataMixin, TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, self.submitted_posts_list)
 
+    def test_response_fields(self):
+        data = [
+            {"label": "Test", "name": "test", "value": 1},
+            {"label": "Other", "name": "other", "value": 2},
+        ]
+        FormSubmission.objects.create(name="Test submit", data=json.dumps(data))
+        request = RequestFactory().get("/", {"fields": "sent_at,form_data,name", "data_fields": "test"})
+        request._user = self.user
+        response = self.view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [{
+            "name": "Test submit",
+            "sent_at": "2025-03-14T04:30:00-05:00",
+            "form_data": [{"name": "test", "label": "Test", "field_occurrence": 1, "value": 1}],
+        }])
+
+    def test_response_unknown_fields(self):
+        request = RequestFactory().get("/", {"fields": "name,data"})
+        request._user = self.user
+        response = self.view(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"fields": ["Unknown fields: data."]})
+
+    def test_conditional_get(self):
+        data = json.dumps([{"label": "Test", "name": "test", "value": 1}])
+        FormSubmission.objects.create(name="Test submit", data=data)
+        request = RequestFactory().get("/", {"name": "Test submit"})
+        request._user = self.user
+        response = self.view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+        self.assertIn("Accept", response["Vary"])
+        etag = response["ETag"]
+        request = RequestFactory().get("/", {"name": "Test submit"}, HTTP_IF_NONE_MATCH=etag)
+        request._user = self.user
+        response = self.view(request)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        # The fingerprint is not a time of modification.
+        request = RequestFactory().get("/", {"name": "Test submit"}, HTTP_IF_MODIFIED_SINCE=http_date())
+        request._user = self.user
+        self.assertEqual(self.view(request).status_code, 200)
+        request = RequestFactory().get("/", {"name": "Test submit"}, HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT="text/html")
+        request._user = self.user
+        self.assertNotEqual(self.view(request)["ETag"], etag)
+        request = RequestFactory().get("/", {"name": "Other"}, HTTP_IF_NONE_MATCH=etag)
+        request._user = self.user
+        self.assertEqual(self.view(request).status_code, 200)
+        FormSubmission.objects.create(name="Test submit", data=data)
+        request = RequestFactory().get("/", {"name": "Test submit"}, HTTP_IF_NONE_MATCH=etag)
+        request._user = self.user
+        response = self.view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_conditional_get_after_update(self):
+        submission = FormSubmission.objects.create(name="Test submit", data="[]")
+        request = RequestFactory().get("/")
+        request._user = self.user
+        etag = self.view(request)["ETag"]
+        with freeze_time(datetime(2025, 3, 14, 10, 0, tzinfo=timezone.utc)):
+            FormSubmission.objects.filter(pk=submission.pk).update(post_ident="1234")
+            self.assertTrue(submission.expire_post_ident())
+        request = RequestFactory().get("/", HTTP_IF_NONE_MATCH=etag)
+        request._user = self.user
+        response = self.view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
     def test_get_object(self):
         data = [
             {"label": "Test", "name": "test", "value": 1},
@@ -101,3 +196,113 @@ class SubmissionsViewSetTest(DataMixin, TestCase):
         response = view(self.request, pk=42)
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.data, {"error": {"message": "Object not found."}})
+
+
+@freeze_time(datetime(2025, 3, 14, 9, 30, tzinfo=timezone.utc))
+class SubmissionRowSerializerTest(TestCase):
+
+    fields = [
+        {"name": "text_1", "label": "Name", "field_occurrence": 1, "value": "Dave"},
+        {"name": "text_2", "label": "Name", "field_occurrence": 2, "value": "Lister " * 200},
+        {"name": "hidden_1", "label": "", "field_occurrence": 1, "value": 42},
+    ]
+
+    def create_submission(self, model=FormSubmission, **kwargs):
+        submission = model(name="Test submit", **kwargs)
+        submission.set_data(self.fields)
+        submission.set_recipients([("Dave Lister", "dave@lister.foo")])
+        submission.save()
+        return submission
+
+    def assert_same_output(self, model=FormSubmission):
+        submissions = model.objects.order_by("pk")
+        renderer = JSONRenderer()
+        for hostname in ("example.com", None):
+            expected = [FormSubmissionSerializer(submission, context={"hostname": hostname}).data
+                        for submission in submissions]
+            serializer = SubmissionRowSerializer(hostname)
+            self.assertEqual(
+                renderer.render(list(serializer.serialize_queryset(submissions))), renderer.render(expected))
+            self.assertEqual(
+                renderer.render([serializer.to_representation(submission) for submission in submissions]),
+                renderer.render(expected))
+
+    def test_same_output(self):
+        self.create_submission()
+        FormSubmission.objects.create(name="Invalid", data="invalid", recipients="invalid")
+        self.create_submission(post_ident="1234")
+        SubmissionStep.objects.create(
+            submission_type="formsubmission", post_ident="1234", data=json.dumps([{"name": "step", "value": 1}]))
+        self.assert_same_output()
+
+    def test_projection(self):
+        submission = self.create_submission()
+        serializer = SubmissionRowSerializer("example.com", ["hostname", "form_data"], ["text_2", "hidden_1"])
+        self.assertEqual(serializer.fields, ("data", "schema_id", "post_ident"))
+        self.assertEqual(serializer.to_representation(submission), {
+            "hostname": "example.com",
+            "form_data": self.fields[1:],
+        })
+        serializer = SubmissionRowSerializer("example.com", ["hostname"])
+        self.assertEqual(list(serializer.serialize_queryset(FormSubmission.objects.all())), [
+            {"hostname": "example.com"}])
+
+    @override_settings(ALDRYN_FORMS_COMPACT_DATA=True, ALDRYN_FORMS_COMPRESSION={"threshold": 100})
+    def test_same_output_compact_compressed(self):
+        self.create_submission()
+        self.create_submission(SubmittedToBeSent, post_ident="1234")
+        self.assert_same_output()
+        self.assert_same_output(SubmittedToBeSent)
+
+
+@freeze_time(datetime(2025, 3, 14, 9, 30, tzinfo=timezone.utc))
+class SubmissionsNdjsonTest(DataMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.view = SubmissionsViewSet.as_view({"get": "ndjson"})
+        for name in ("Contact", "Order", "Contact"):
+            data = json.dumps([{"label": "Test", "name": "test", "value": name}])
+            FormSubmission.objects.create(name=name, data=data)
+
+    def test_forbidden(self):
+        response = self.view(self.unauthorized_request)
+        self.assertEqual(response.status_code, 403)
+
+    def test_stream(self):
+        request = RequestFactory().get("/", {"name": "Contact"})
+        request._user = self.user
+        response = self.view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0]), {
+            "hostname": "example.com",
+            "name": "Contact",
+            "language": "en",
+            "sent_at": "2025-03-14T04:30:00-05:00",
+            "form_recipients": [],
+            "form_data": [{"name": "test", "label": "Test", "field_occurrence": 1, "value": "Contact"}],
+        })
+
+    def test_stream_gzip(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        request._user = self.user
+        response = self.view(request)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        lines = gzip.decompress(b"".join(response.streaming_content)).splitlines()
+        self.assertEqual([json.loads(line)["name"] for line in lines], ["Contact", "Order", "Contact"])
+
+    def test_stream_not_modified(self):
+        request = RequestFactory().get("/")
+        request._user = self.user
+        etag = self.view(request)["ETag"]
+        request = RequestFactory().get("/", HTTP_IF_NONE_MATCH=etag)
+        request._user = self.user
+        self.assertEqual(self.view(request).status_code, 304)
+        request = RequestFactory().get("/", HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING="gzip")
+        request._user = self.user
+        self.assertEqual(self.view(request).status_code, 200)
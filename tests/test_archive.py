@@ -0,0 +1,191 @@
+import gzip
+import json
+import lzma
+from datetime import datetime, timezone
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from freezegun import freeze_time
+
+from aldryn_forms.admin.exporter import Exporter
+from aldryn_forms.api.pagination import KeysetPagination
+from aldryn_forms.api.views import SubmissionsViewSet
+from aldryn_forms.archive import (
+    archive_submissions, count_archived_submissions, get_archive_storage, get_archived_submissions,
+    iter_archived_submissions,
+)
+from aldryn_forms.models import ArchiveSegment, FormSubmission
+
+
+def create_submission(name, sent_at, value, language="en"):
+    data = json.dumps([{"label": "Test", "name": "test", "value": value}])
+    with freeze_time(sent_at):
+        return FormSubmission.objects.create(name=name, data=data, language=language)
+
+
+@freeze_time(datetime(2025, 6, 10, 9, 0, tzinfo=timezone.utc))
+class ArchiveSubmissionsTest(TestCase):
+
+    def setUp(self):
+        create_submission("Contact", datetime(2025, 1, 5, tzinfo=timezone.utc), "a")
+        create_submission("Contact", datetime(2025, 1, 25, tzinfo=timezone.utc), "b", "de")
+        create_submission("Contact", datetime(2025, 2, 3, tzinfo=timezone.utc), "c")
+        create_submission("Order", datetime(2025, 1, 7, tzinfo=timezone.utc), "d")
+        self.recent = create_submission("Contact", datetime(2025, 6, 1, tzinfo=timezone.utc), "e")
+
+    def archive(self, **options):
+        out = StringIO()
+        call_command("aldryn_forms_archive_submissions", days=30, sleep=0, stdout=out, **options)
+        return out.getvalue()
+
+    def test_dry_run(self):
+        self.assertEqual(self.archive(dry_run=True), (
+            "Contact 2025-01: Would archive 2 submissions.\n"
+            "Order 2025-01: Would archive 1 submissions.\n"
+            "Contact 2025-02: Would archive 1 submissions.\n"
+        ))
+        self.assertEqual(FormSubmission.objects.count(), 5)
+        self.assertFalse(ArchiveSegment.objects.exists())
+
+    def test_archive(self):
+        self.assertEqual(self.archive(verbosity=2, batch_size=1), (
+            "Contact 2025-01: Archived 2 submissions.\n"
+            "Order 2025-01: Archived 1 submissions.\n"
+            "Contact 2025-02: Archived 1 submissions.\n"
+        ))
+        self.assertQuerySetEqual(FormSubmission.objects.values_list("pk", flat=True), [self.recent.pk])
+        segment = ArchiveSegment.objects.get(name="Contact", month="2025-01-01")
+        self.assertEqual(segment.count, 2)
+        self.assertEqual(segment.compression, "gzip")
+        self.assertEqual(segment.first_sent_at, datetime(2025, 1, 5, tzinfo=timezone.utc))
+        self.assertEqual(segment.last_sent_at, datetime(2025, 1, 25, tzinfo=timezone.utc))
+        self.assertTrue(segment.path.startswith("aldryn_forms_archive/contact/2025-01"))
+        with get_archive_storage().open(segment.path, "rb") as segment_file:
+            rows = [json.loads(line) for line in gzip.decompress(segment_file.read()).splitlines()]
+        # The submissions are written the newest first.
+        self.assertEqual([row["language"] for row in rows], ["de", "en"])
+        self.assertEqual(json.loads(rows[0]["data"])[0]["value"], "b")
+        self.assertEqual(segment.language_counts, {"en": 1, "de": 1})
+        self.assertEqual((segment.first_pk, segment.last_pk), (rows[1]["id"], rows[0]["id"]))
+        self.assertIsNotNone(segment.completed_at)
+
+    def test_archive_completes_interrupted_segment(self):
+        with patch("aldryn_forms.archive.complete_segment", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                archive_submissions(datetime(2025, 2, 1, tzinfo=timezone.utc))
+        segment = ArchiveSegment.objects.get()
+        self.assertIsNone(segment.completed_at)
+        self.assertEqual(FormSubmission.objects.count(), 5)
+        archive_submissions(datetime(2025, 2, 1, tzinfo=timezone.utc))
+        self.assertQuerySetEqual(
+            ArchiveSegment.objects.values_list("name", "count").order_by("pk"), [("Contact", 2), ("Order", 1)],
+            transform=None)
+        self.assertEqual(FormSubmission.objects.count(), 2)
+
+    def test_count_archived_submissions(self):
+        archive_submissions(datetime(2025, 3, 1, tzinfo=timezone.utc))
+        self.assertEqual(count_archived_submissions("Contact"), 3)
+        self.assertEqual(count_archived_submissions("Contact", "en"), 2)
+        with patch("aldryn_forms.archive.read_segment") as read_segment:
+            self.assertEqual(count_archived_submissions(end=datetime(2025, 2, 1, tzinfo=timezone.utc)), 3)
+            read_segment.assert_not_called()
+        start, end = datetime(2025, 1, 6, tzinfo=timezone.utc), datetime(2025, 3, 1, tzinfo=timezone.utc)
+        self.assertEqual(count_archived_submissions("Contact", start=start, end=end), 2)
+
+    @override_settings(ALDRYN_FORMS_ARCHIVE={"compression": "xz", "location": "archive"})
+    def test_archive_xz(self):
+        archive_submissions(datetime(2025, 2, 1, tzinfo=timezone.utc))
+        segment = ArchiveSegment.objects.get(name="Order")
+        self.assertTrue(segment.path.startswith("archive/order/2025-01"))
+        self.assertTrue(segment.path.endswith(".jsonl.xz"))
+        with get_archive_storage().open(segment.path, "rb") as segment_file:
+            self.assertEqual(len(lzma.decompress(segment_file.read()).splitlines()), 1)
+        self.assertEqual([submission.name for submission in get_archived_submissions("Order")], ["Order"])
+
+    def test_get_archived_submissions(self):
+        archive_submissions(datetime(2025, 3, 1, tzinfo=timezone.utc))
+        submissions = list(get_archived_submissions("Contact"))
+        self.assertEqual([submission.get_form_data()[0].value for submission in submissions], ["c", "b", "a"])
+        self.assertIsNone(submissions[0].post_ident)
+        self.assertEqual(submissions[0].sent_at, datetime(2025, 2, 3, tzinfo=timezone.utc))
+        self.assertEqual(len(list(get_archived_submissions(language="de"))), 1)
+        submissions = get_archived_submissions(
+            start=datetime(2025, 1, 6, tzinfo=timezone.utc), end=datetime(2025, 2, 3, tzinfo=timezone.utc))
+        self.assertEqual(sorted(submission.get_form_data()[0].value for submission in submissions), ["b", "d"])
+
+    def test_exporter(self):
+        archive_submissions(datetime(2025, 3, 1, tzinfo=timezone.utc))
+        archived = list(get_archived_submissions("Contact"))
+        exporter = Exporter(FormSubmission.objects.all(), archived)
+        dataset = exporter.get_dataset([archived[0].get_form_data()[0].field_id])
+        self.assertEqual([row[0] for row in dataset], ["e", "c", "b", "a"])
+
+    def test_api(self):
+        archive_submissions(datetime(2025, 3, 1, tzinfo=timezone.utc))
+        request = RequestFactory().get("/", {
+            "archived": "1", "name": "Contact", "sent_at_range_after": "2025-01-10",
+            "sent_at_range_before": "2025-06-30"})
+        request._user = get_user_model().objects.create(username="admin", is_superuser=True)
+        response = SubmissionsViewSet.as_view({"get": "list"})(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data["next"])
+        self.assertEqual(
+            [result["form_data"][0]["value"] for result in response.data["results"]], ["e", "c", "b"])
+
+    def test_api_pages(self):
+        archive_submissions(datetime(2025, 3, 1, tzinfo=timezone.utc))
+        create_submission("Contact", datetime(2025, 1, 25, tzinfo=timezone.utc), "f")
+        user = get_user_model().objects.create(username="admin", is_superuser=True)
+        view = SubmissionsViewSet.as_view({"get": "list"})
+        request = RequestFactory().get("/", {"archived": "1"})
+        values = []
+        with patch.object(KeysetPagination, "page_size", 2):
+            while request is not None:
+                request._user = user
+                response = view(request)
+                self.assertEqual(response.status_code, 200)
+                values.extend(result["form_data"][0]["value"] for result in response.data["results"])
+                request = RequestFactory().get(response.data["next"]) if response.data["next"] else None
+        # The submission "f" in the database has the same sent_at as the archived "b" and a greater primary key.
+        self.assertEqual(values, ["e", "c", "f", "b", "d", "a"])
+        request = RequestFactory().get("/", {"archived": "1", "cursor": "invalid"})
+        request._user = user
+        self.assertEqual(view(request).status_code, 404)
+
+    def test_api_ndjson(self):
+        archive_submissions(datetime(2025, 3, 1, tzinfo=timezone.utc))
+        request = RequestFactory().get("/", {"archived": "1", "language": "en"})
+        request._user = get_user_model().objects.create(username="admin", is_superuser=True)
+        response = SubmissionsViewSet.as_view({"get": "ndjson"})(request)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["form_data"][0]["value"] for row in rows], ["e", "c", "d", "a"])
+
+    def test_iter_archived_submissions(self):
+        archive_submissions(datetime(2025, 3, 1, tzinfo=timezone.utc))
+        submissions = iter_archived_submissions()
+        self.assertEqual([submission.get_form_data()[0].value for submission in submissions], ["c", "b", "d", "a"])
+        submissions = iter_archived_submissions(language="en", end=datetime(2025, 2, 1, tzinfo=timezone.utc))
+        self.assertEqual([submission.get_form_data()[0].value for submission in submissions], ["d", "a"])
+
+    def test_api_etag(self):
+        archive_submissions(datetime(2025, 2, 1, tzinfo=timezone.utc))
+        user = get_user_model().objects.create(username="admin", is_superuser=True)
+
+        def get_etag():
+            request = RequestFactory().get("/", {"archived": "1", "name": "Contact"})
+            request._user = user
+            return SubmissionsViewSet.as_view({"get": "list"})(request)["ETag"]
+
+        etag = get_etag()
+        sent_at = datetime(2025, 2, 1, tzinfo=timezone.utc)
+        ArchiveSegment.objects.create(
+            name="Order", month=sent_at.date(), path="order.jsonl.gz", compression="gzip", count=1,
+            first_sent_at=sent_at, last_sent_at=sent_at)
+        self.assertEqual(get_etag(), etag)
+        with freeze_time(datetime(2025, 6, 11, tzinfo=timezone.utc)):
+            archive_submissions(datetime(2025, 3, 1, tzinfo=timezone.utc))
+        self.assertNotEqual(get_etag(), etag)
@@ -0,0 +1,210 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from django.conf.urls.i18n import i18n_patterns
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import include, path
+
+from cms.api import add_plugin, create_page
+from cms.test_utils.testcases import CMSTestCase
+
+from filer.models import File, Folder
+from freezegun import freeze_time
+
+from aldryn_forms.chunked import get_chunked_upload_settings
+from aldryn_forms.models import ChunkedUpload, FormSubmission
+
+
+urlpatterns = [
+    path("uploads/", include("aldryn_forms.upload_urls")),
+] + i18n_patterns(path("", include("cms.urls")))
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ChunkedUploadTest(CMSTestCase):
+
+    def setUp(self):
+        self.chunks_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.chunks_dir)
+        settings = override_settings(ALDRYN_FORMS_CHUNKED_UPLOADS={"chunk_size": 4, "dir": self.chunks_dir})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.page = create_page('test page', 'test_page.html', 'en')
+        placeholder = self.page.get_placeholders('en').get(slot='content')
+        self.form_plugin = add_plugin(
+            placeholder, "FormPlugin", "en", name="Upload", redirect_to={"external_link": "http://www.google.com"})
+        self.folder = Folder.objects.create(name="Uploads")
+        self.file_plugin = add_plugin(
+            placeholder, 'FileField', 'en', target=self.form_plugin, label="File", name="file", upload_to=self.folder,
+            accepted_types=".txt", max_size=10)
+        add_plugin(placeholder, 'TextField', 'en', target=self.form_plugin, label="Name", name="name")
+        self.form_plugin.action_backend = "default"
+        self.form_plugin.save()
+
+    def start(self, **kwargs):
+        data = {
+            "form_plugin_id": self.form_plugin.pk,
+            "field_name": "file",
+            "filename": "file.txt",
+            "size": 7,
+            "content_type": "text/plain",
+            **kwargs,
+        }
+        return self.client.post("/uploads/", data)
+
+    def send_chunk(self, token, offset, content):
+        return self.client.post(
+            f"/uploads/{token}/?offset={offset}", content, content_type="application/octet-stream")
+
+    def upload(self, content=b"content"):
+        token = self.start(size=len(content)).json()["token"]
+        for offset in range(0, len(content), 4):
+            self.send_chunk(token, offset, content[offset:offset + 4])
+        return token
+
+    def test_start(self):
+        response = self.start()
+        self.assertEqual(response.status_code, 201)
+        upload = ChunkedUpload.objects.get()
+        self.assertEqual(response.json(), {
+            "token": upload.token,
+            "url": f"/uploads/{upload.token}/",
+            "offset": 0,
+            "completed": False,
+            "chunk_size": 4,
+        })
+
+    def test_start_not_accepted_type(self):
+        response = self.start(filename="file.exe", content_type="application/octet-stream")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {"error": '"file.exe" is not of accepted file type. Accepted file types are: .txt.'})
+        self.assertFalse(ChunkedUpload.objects.exists())
+
+    def test_start_too_large(self):
+        response = self.start(size=11)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json(), {"error": "File size exceeded the specified limit 10.0B."})
+
+    def test_start_exceeds_global_limit(self):
+        self.file_plugin.max_size = None
+        self.file_plugin.save()
+        with override_settings(ALDRYN_FORMS_CHUNKED_UPLOADS={"dir": self.chunks_dir, "max_size": 5}):
+            response = self.start()
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json(), {"error": "File size exceeded the specified limit 5.0B."})
+
+    def test_start_exceeds_total_size(self):
+        with override_settings(ALDRYN_FORMS_CHUNKED_UPLOADS={"dir": self.chunks_dir, "max_total_size": 10}):
+            self.assertEqual(self.start().status_code, 201)
+            response = self.start()
+        self.assertEqual(response.status_code, 507)
+        self.assertEqual(ChunkedUpload.objects.count(), 1)
+
+    @override_settings(ALDRYN_FORMS_RATE_LIMIT={"rate": "2/m"})
+    def test_rate_limited(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        token = self.start().json()["token"]
+        self.assertEqual(self.send_chunk(token, 0, b"cont").status_code, 200)
+        self.assertEqual(self.send_chunk(token, 4, b"e").status_code, 200)
+        self.assertEqual(self.send_chunk(token, 5, b"n").status_code, 429)
+        self.assertEqual(self.start().status_code, 201)
+        response = self.start()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json(), {"error": "Too many submissions. Please try again later."})
+
+    def test_assembled_type_sniffed(self):
+        self.file_plugin.accepted_types = "application/pdf"
+        self.file_plugin.save()
+        token = self.start(filename="file.pdf", content_type="application/pdf").json()["token"]
+        self.send_chunk(token, 0, b"cont")
+        response = self.send_chunk(token, 4, b"ent")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {
+            "error": '"file.pdf" is not of accepted file type. Accepted file types are: application/pdf.'})
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(os.listdir(self.chunks_dir), [])
+
+    def test_start_not_upload_field(self):
+        response = self.start(field_name="name")
+        self.assertEqual(response.status_code, 400)
+
+    def test_chunks(self):
+        token = self.start().json()["token"]
+        response = self.send_chunk(token, 0, b"cont")
+        self.assertEqual(response.json()["offset"], 4)
+        # The chunk was already received.
+        response = self.send_chunk(token, 0, b"cont")
+        self.assertEqual(response.status_code, 409)
+        response = self.client.get(f"/uploads/{token}/")
+        self.assertEqual(response.json()["offset"], 4)
+        response = self.send_chunk(token, 4, b"ent")
+        self.assertEqual(response.json()["completed"], True)
+        with open(os.path.join(self.chunks_dir, token), "rb") as assembled:
+            self.assertEqual(assembled.read(), b"content")
+        self.assertEqual(sorted(os.listdir(self.chunks_dir)), [token])
+
+    def test_chunk_too_large(self):
+        token = self.start().json()["token"]
+        response = self.send_chunk(token, 0, b"content")
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(ChunkedUpload.objects.get().received, 0)
+        self.assertEqual(os.listdir(self.chunks_dir), [])
+
+    def test_submit_tokens(self):
+        token = self.upload()
+        self.client.post(self.page.get_absolute_url("en"), {
+            "form_plugin_id": self.form_plugin.pk, "name": "Tester", "file_upload_token": token})
+        filer_file = File.objects.get()
+        self.assertEqual((filer_file.original_filename, filer_file.file.read()), ("file.txt", b"content"))
+        data = json.loads(FormSubmission.objects.get().data)
+        self.assertEqual(data[0]["value"], f"http://testserver{filer_file.url}")
+
+    def test_submit_tokens_once(self):
+        token = self.upload()
+        data = {"form_plugin_id": self.form_plugin.pk, "name": "Tester", "file_upload_token": token}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.page.get_absolute_url("en"), data)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(os.listdir(self.chunks_dir), [])
+        self.client.post(self.page.get_absolute_url("en"), data)
+        self.assertEqual(File.objects.count(), 1)
+        self.assertEqual(json.loads(FormSubmission.objects.order_by("pk").last().data)[0]["value"], "")
+
+    def test_dir_required(self):
+        with override_settings(ALDRYN_FORMS_CHUNKED_UPLOADS={}):
+            with self.assertRaises(ImproperlyConfigured):
+                get_chunked_upload_settings()
+
+    def test_submit_incomplete_upload(self):
+        token = self.start().json()["token"]
+        self.client.post(self.page.get_absolute_url("en"), {
+            "form_plugin_id": self.form_plugin.pk, "name": "Tester", "file_upload_token": token})
+        self.assertFalse(File.objects.exists())
+
+    def test_submit_file(self):
+        upload = SimpleUploadedFile("file.txt", b"content", content_type="text/plain")
+        self.client.post(self.page.get_absolute_url("en"), {
+            "form_plugin_id": self.form_plugin.pk, "name": "Tester", "file": upload})
+        self.assertEqual(File.objects.get().file.read(), b"content")
+
+    def test_widget_attributes(self):
+        attrs = self.file_plugin.get_plugin_class_instance().get_form_field_widget_attrs(self.file_plugin)
+        self.assertEqual(attrs["data-chunked_upload_url"], "/uploads/")
+        self.assertEqual(attrs["data-chunk_size"], 4)
+
+    def test_remove_expired_uploads(self):
+        with freeze_time(datetime(2025, 3, 14, 8, 0, tzinfo=timezone.utc)):
+            token = self.upload()
+        with freeze_time(datetime(2025, 3, 15, 8, 0, 1, tzinfo=timezone.utc)):
+            call_command("aldryn_forms_remove_expired_uploads")
+        self.assertFalse(ChunkedUpload.objects.filter(token=token).exists())
+        self.assertEqual(os.listdir(self.chunks_dir), [])
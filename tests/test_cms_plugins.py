@@ -1,10 +1,11 @@
 import json
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from unittest.mock import patch
 
 from django.contrib.auth.models import User
 from django.contrib.messages import get_messages
 from django.core import mail
+from django.core.cache import cache
 from django.test import override_settings
 
 from cms.api import add_plugin, create_page
@@ -16,6 +17,7 @@ from requests.exceptions import HTTPError
 from testfixtures import LogCapture
 
 from aldryn_forms.models import FormPlugin, FormSubmission, SubmittedToBeSent, Webhook
+from aldryn_forms.spam import get_spam_counter_key
 
 
 class DataMixin:
@@ -81,6 +83,66 @@ class FormPluginTestCase(DataMixin, CMSTestCase):
         self._check_mailbox()
         self.log_handler.check()
 
+    @override_settings(ALDRYN_FORMS_DUPLICATE_SUBMISSION_WINDOW=60)
+    def test_form_submission_duplicate(self):
+        cache.clear()
+        self.form_plugin.action_backend = 'default'
+        self.form_plugin.save()
+
+        form_plugin = FormPlugin.objects.last()
+        data = {"language": "en", "form_plugin_id": form_plugin.pk, "name": "Tester"}
+        with responses.RequestsMock():
+            self.client.post(self.page.get_absolute_url('en'), data)
+            response = self.client.post(self.page.get_absolute_url('en'), {**data, "name": " Tester "})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertQuerySetEqual(FormSubmission.objects.values_list(
+            "name", "data", "post_ident").all().order_by('pk'), [
+            ('Contact us', '[{"name": "name", "label": "Name", "field_occurrence": 1, "value": "Tester"}]', None),
+        ], transform=None)
+        self._check_mailbox()
+        self.log_handler.check(
+            ('aldryn_forms.cms_plugins', 'INFO', 'Duplicate submission of form "Contact us" ignored.'),
+        )
+
+    @override_settings(ALDRYN_FORMS_DUPLICATE_SUBMISSION_WINDOW=60)
+    def test_form_submission_duplicate_idempotency_key(self):
+        cache.clear()
+        self.form_plugin.action_backend = 'default'
+        self.form_plugin.save()
+
+        form_plugin = FormPlugin.objects.last()
+        data = {"language": "en", "form_plugin_id": form_plugin.pk, "name": "Tester"}
+        headers = {"Idempotency-Key": "c5b3b6f4"}
+        with responses.RequestsMock():
+            self.client.post(self.page.get_absolute_url('en'), data, headers=headers)
+            self.client.post(self.page.get_absolute_url('en'), {**data, "name": "Other"}, headers=headers)
+            self.client.post(self.page.get_absolute_url('en'), data, headers={"Idempotency-Key": "e0d8a9c1"})
+
+        self.assertQuerySetEqual(FormSubmission.objects.values_list("data", flat=True).order_by('pk'), [
+            '[{"name": "name", "label": "Name", "field_occurrence": 1, "value": "Tester"}]',
+            '[{"name": "name", "label": "Name", "field_occurrence": 1, "value": "Tester"}]',
+        ], transform=None)
+
+    @override_settings(ALDRYN_FORMS_DUPLICATE_SUBMISSION_WINDOW=60)
+    def test_form_submission_duplicate_released_on_error(self):
+        cache.clear()
+        self.form_plugin.action_backend = 'default'
+        self.form_plugin.save()
+
+        form_plugin = FormPlugin.objects.last()
+        data = {"language": "en", "form_plugin_id": form_plugin.pk, "name": "Tester"}
+        with patch("aldryn_forms.action_backends.DefaultAction.form_valid", side_effect=RuntimeError) as form_valid:
+            try:
+                self.client.post(self.page.get_absolute_url('en'), data)
+            except RuntimeError:
+                pass
+        form_valid.assert_called_once()
+        with responses.RequestsMock():
+            self.client.post(self.page.get_absolute_url('en'), data)
+
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
     def test_form_submission_email_action(self):
         self.form_plugin.action_backend = 'email_only'
         self.form_plugin.save()
@@ -339,6 +401,26 @@ class FormPluginTestCase(DataMixin, CMSTestCase):
         self.log_handler.check((
             'aldryn_forms.cms_plugins', 'INFO', 'Post disabled due to Honeypot "Trap" value: "Spam!"'))
 
+    @override_settings(ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION=30, ALDRYN_FORMS_HONEYPOT_SKIP_PERSISTENCE=True)
+    def test_honeypot_field_filled_skip_persistence(self):
+        cache.clear()
+        self.form_plugin.action_backend = 'default'
+        self.form_plugin.save()
+        add_plugin(self.placeholder, 'HoneypotField', 'en', target=self.form_plugin, label="Trap", name="trap")
+
+        form_plugin = FormPlugin.objects.last()
+        data = {"language": "en", "form_plugin_id": form_plugin.pk, "name": "Tester", "trap": "Spam!"}
+        with patch("aldryn_forms.action_backends.DefaultAction.form_valid") as form_valid:
+            response = self.client.post(self.page.get_absolute_url('en'), data)
+            response = self.client.post(self.page.get_absolute_url('en'), data)
+
+        self.assertEqual(response.status_code, 200)
+        form_valid.assert_not_called()
+        self.assertEqual(FormSubmission.objects.count(), 0)
+        self.assertEqual(SubmittedToBeSent.objects.count(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(cache.get(get_spam_counter_key("Contact us", date(2025, 3, 13))), 2)
+
     def test_send_success_message(self):
         self.form_plugin.success_message = "Thank you."
         self.form_plugin.action_backend = 'default'
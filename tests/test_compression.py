@@ -0,0 +1,113 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from aldryn_forms.compression import compress_records, compress_text, decompress_text
+from aldryn_forms.models import FormSubmission
+from aldryn_forms.references import get_linked_paths, relink_file
+
+
+COMPRESSION = {"algorithm": "zlib", "threshold": 100}
+
+
+@override_settings(ALDRYN_FORMS_COMPRESSION=COMPRESSION)
+class CompressionTest(TestCase):
+
+    fields = [
+        {"name": "textarea_1", "label": "Message", "field_occurrence": 1, "value": "Lorem ipsum " * 50},
+        {"name": "file_1", "label": "File", "field_occurrence": 1, "value": "http://testserver/media/file.txt"},
+    ]
+
+    def create_submission(self, fields):
+        submission = FormSubmission(name="Contact")
+        submission.set_data(fields)
+        submission.set_recipients([("Dave Lister", "dave@lister.foo")])
+        submission.save()
+        return submission
+
+    def test_compress_text(self):
+        text = json.dumps(self.fields)
+        compressed = compress_text(text)
+        self.assertTrue(compressed.startswith("~zlib:"))
+        self.assertLess(len(compressed), len(text))
+        self.assertEqual(decompress_text(compressed), text)
+        self.assertEqual(compress_text("[]"), "[]")
+        self.assertEqual(decompress_text("[]"), "[]")
+        with self.assertRaises(ValueError):
+            decompress_text("~zlib:invalid")
+        with self.assertRaises(ValueError):
+            decompress_text("~unknown:data")
+
+    @override_settings(ALDRYN_FORMS_COMPRESSION=None)
+    def test_disabled(self):
+        self.assertEqual(compress_text(json.dumps(self.fields)), json.dumps(self.fields))
+
+    def test_submission(self):
+        submission = self.create_submission(self.fields)
+        submission.refresh_from_db()
+        self.assertTrue(submission.data.startswith("~zlib:"))
+        self.assertEqual(submission.form_data(), self.fields)
+        self.assertEqual(submission.form_recipients(), [{"name": "Dave Lister", "email": "dave@lister.foo"}])
+        self.assertEqual(get_linked_paths(submission.data), {"/media/file.txt"})
+
+    def test_links(self):
+        submission = self.create_submission(self.fields)
+        self.assertEqual(relink_file("/media/file.txt", "/media/other.txt"), 1)
+        submission.refresh_from_db()
+        self.assertTrue(submission.data.startswith("~zlib:"))
+        self.assertEqual(submission.get_form_data()[1].value, "http://testserver/media/other.txt")
+
+    def test_command(self):
+        with override_settings(ALDRYN_FORMS_COMPRESSION=None):
+            submission = self.create_submission(self.fields)
+            short = self.create_submission(self.fields[1:])
+        out = StringIO()
+        call_command("aldryn_forms_compress_submissions", dry_run=True, stdout=out)
+        self.assertIn("Form submissions: Would compress 1 records", out.getvalue())
+        self.assertFalse(FormSubmission.objects.filter(data__startswith="~").exists())
+        out = StringIO()
+        call_command("aldryn_forms_compress_submissions", verbosity=2, benchmark=10, stdout=out)
+        self.assertIn("Form submissions: Compressed 1 records", out.getvalue())
+        self.assertIn("get_form_data of 2 submissions", out.getvalue())
+        submission.refresh_from_db()
+        short.refresh_from_db()
+        self.assertTrue(submission.data.startswith("~zlib:"))
+        self.assertEqual(submission.form_data(), self.fields)
+        self.assertEqual(short.data, json.dumps(self.fields[1:]))
+
+    def test_compress_records_skips_changed(self):
+        with override_settings(ALDRYN_FORMS_COMPRESSION=None):
+            submission = self.create_submission(self.fields)
+        changed = json.dumps(self.fields + [{"name": "step", "label": "Step", "value": "merged"}])
+
+        def change_during_batch(text, options=None):
+            # A step is merged after the batch was read.
+            FormSubmission.objects.filter(pk=submission.pk).update(data=changed)
+            return compress_text(text, options)
+
+        with patch("aldryn_forms.compression.compress_text", side_effect=change_during_batch):
+            self.assertEqual(compress_records(FormSubmission.objects.all()).count, 0)
+        submission.refresh_from_db()
+        self.assertEqual(submission.data, changed)
+
+    def test_admin_search(self):
+        submission = self.create_submission(self.fields)
+        self.create_submission(self.fields[1:])
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "admin")
+        self.client.force_login(admin)
+        url = reverse("admin:aldryn_forms_formsubmission_changelist")
+        response = self.client.get(url, {"q": "lorem ipsum"})
+        self.assertEqual(list(response.context["cl"].result_list), [submission])
+        response = self.client.get(url, {"q": "(Lorem ipsum ){50}"})
+        self.assertEqual(list(response.context["cl"].result_list), [submission])
+
+    @override_settings(ALDRYN_FORMS_COMPRESSION=None)
+    def test_command_disabled(self):
+        with self.assertRaises(CommandError):
+            call_command("aldryn_forms_compress_submissions")
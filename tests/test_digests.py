@@ -0,0 +1,107 @@
+import json
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+
+from cms.api import add_plugin, create_page
+from cms.test_utils.testcases import CMSTestCase
+
+from filer.models import Clipboard, ClipboardItem, File, Folder
+
+from aldryn_forms.digests import digest_missing_files, get_upload_folder_ids
+from aldryn_forms.models import FileDigest, FormSubmission, SubmissionStep
+
+
+class DeduplicationTest(CMSTestCase):
+
+    def setUp(self):
+        self.page = create_page('test page', 'test_page.html', 'en')
+        placeholder = self.page.get_placeholders('en').get(slot='content')
+        self.form_plugin = add_plugin(
+            placeholder, "FormPlugin", "en", name="Upload", redirect_to={"external_link": "http://www.google.com"})
+        self.folder = Folder.objects.create(name="Uploads")
+        add_plugin(
+            placeholder, 'FileField', 'en', target=self.form_plugin, label="File", name="file", upload_to=self.folder)
+        self.form_plugin.action_backend = "default"
+        self.form_plugin.save()
+
+    def post_file(self, content=b"content"):
+        upload = SimpleUploadedFile("cv.txt", content, content_type="text/plain")
+        self.client.post(self.page.get_absolute_url("en"), {"form_plugin_id": self.form_plugin.pk, "file": upload})
+
+    def get_links(self):
+        data = FormSubmission.objects.order_by("pk").values_list("data", flat=True)
+        return [json.loads(item)[0]["value"] for item in data]
+
+    @override_settings(ALDRYN_FORMS_DEDUPLICATE_UPLOADS=True)
+    def test_upload_reused(self):
+        self.post_file()
+        self.post_file()
+        self.post_file(b"other content")
+        self.assertEqual(File.objects.count(), 2)
+        first, second, third = self.get_links()
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertQuerySetEqual(FileDigest.objects.order_by("pk").values_list("size", flat=True), [7, 13])
+
+    @override_settings(ALDRYN_FORMS_DEDUPLICATE_UPLOADS=True)
+    def test_other_folder_not_reused(self):
+        self.post_file()
+        File.objects.update(folder=Folder.objects.create(name="Other"))
+        self.post_file()
+        self.assertEqual(File.objects.count(), 2)
+
+    def test_command_dry_run(self):
+        self.post_file()
+        self.post_file()
+        out = StringIO()
+        call_command("aldryn_forms_deduplicate_uploads", dry_run=True, stdout=out)
+        self.assertEqual(
+            out.getvalue(), "2 files are not hashed yet and are not checked.\nFound 0 duplicates (0.0B).\n")
+        self.assertFalse(FileDigest.objects.exists())
+        digest_missing_files(get_upload_folder_ids(), 100)
+        out = StringIO()
+        call_command("aldryn_forms_deduplicate_uploads", dry_run=True, stdout=out)
+        self.assertEqual(out.getvalue(), "Found 1 duplicates (7.0B).\n")
+        self.assertEqual(File.objects.count(), 2)
+        self.assertEqual(FileDigest.objects.count(), 2)
+
+    def test_command(self):
+        self.post_file()
+        self.post_file()
+        self.post_file(b"other content")
+        first, _, third = self.get_links()
+        out = StringIO()
+        call_command("aldryn_forms_deduplicate_uploads", batch_size=1, stdout=out)
+        self.assertEqual(out.getvalue(), "Deleted 1 duplicates (7.0B).\n")
+        self.assertEqual(File.objects.count(), 2)
+        self.assertEqual(self.get_links(), [first, first, third])
+
+    def test_command_keeps_files_used_elsewhere(self):
+        self.post_file()
+        self.post_file()
+        self.post_file()
+        clipboard = Clipboard.objects.create(user=self.get_superuser())
+        ClipboardItem.objects.create(clipboard=clipboard, file=File.objects.order_by("pk")[1])
+        File.objects.create(
+            folder=self.folder, file=SimpleUploadedFile("cv.txt", b"content"), original_filename="cv.txt")
+        out = StringIO()
+        call_command("aldryn_forms_deduplicate_uploads", stdout=out)
+        self.assertEqual(out.getvalue(), "Deleted 1 duplicates (7.0B).\n")
+        self.assertEqual(File.objects.count(), 3)
+
+    def test_command_keeps_other_links(self):
+        self.post_file()
+        self.post_file()
+        first, second = self.get_links()
+        other = FormSubmission.objects.create(
+            name="Other", data=json.dumps([{"name": "file", "value": f"{second}.bak\n{second}"}]))
+        step = SubmissionStep.objects.create(
+            submission_type="formsubmission", post_ident="1234", data=json.dumps([{"name": "file", "value": second}]))
+        call_command("aldryn_forms_deduplicate_uploads", stdout=StringIO())
+        other.refresh_from_db()
+        step.refresh_from_db()
+        self.assertEqual(other.form_data()[0]["value"], f"{second}.bak\n{first}")
+        self.assertEqual(json.loads(step.data)[0]["value"], first)
@@ -0,0 +1,20 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+
+from aldryn_forms.duplicates import normalize_value
+
+
+class NormalizeValueTest(SimpleTestCase):
+
+    def test_string(self):
+        self.assertEqual(normalize_value(" Tester\t"), "Tester")
+
+    def test_upload(self):
+        self.assertEqual(normalize_value(SimpleUploadedFile("test.txt", b"content")), ["test.txt", 7])
+
+    def test_list(self):
+        self.assertEqual(normalize_value([" a", 1, None, True]), ["a", 1, None, True])
+
+    def test_other(self):
+        self.assertEqual(normalize_value(1.5), 1.5)
+        self.assertEqual(normalize_value(object), "<class 'object'>")
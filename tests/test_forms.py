@@ -0,0 +1,112 @@
+import threading
+import time
+from unittest.mock import patch
+
+from django.db import OperationalError, connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+
+from cms.api import add_plugin, create_page
+
+from aldryn_forms.constants import ALDRYN_FORMS_POST_IDENT_NAME
+from aldryn_forms.models import FormSubmission, SubmissionStep
+
+
+@override_settings(ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION=30)
+class ParallelStepsTest(TransactionTestCase):
+
+    steps = 8
+
+    def setUp(self):
+        page = create_page("test page", "test_page.html", "en")
+        placeholder = page.get_placeholders("en").get(slot="content")
+        self.form_plugin = add_plugin(placeholder, "FormWithIdentPlugin", "en", name="Steps")
+        add_plugin(placeholder, "TextField", "en", target=self.form_plugin, label="Step", name="step")
+
+    def submit(self, value: str, barrier: threading.Barrier, errors: list) -> None:
+        try:
+            plugin = self.form_plugin.get_plugin_class_instance()
+            request = RequestFactory().post("/", {"form_plugin_id": self.form_plugin.pk, "step": value})
+            form = plugin.get_form_class(self.form_plugin)(**plugin.get_form_kwargs(self.form_plugin, request))
+            self.assertTrue(form.is_valid())
+            form.cleaned_data[ALDRYN_FORMS_POST_IDENT_NAME] = "1234567890"
+            barrier.wait()
+            for attempt in range(50):
+                try:
+                    with transaction.atomic():
+                        form.save()
+                    break
+                except OperationalError:
+                    # The in-memory SQLite database of tests locks whole tables for parallel writes.
+                    # The failed transaction is rolled back, so the post can be sent again.
+                    if connection.vendor != "sqlite" or attempt == 49:
+                        raise
+                    time.sleep(0.01)
+        except Exception as err:  # pragma: no cover
+            errors.append(err)
+        finally:
+            connection.close()
+
+    def test_no_fields_lost(self):
+        barrier = threading.Barrier(self.steps)
+        errors = []
+        threads = [
+            threading.Thread(target=self.submit, args=(str(step), barrier, errors)) for step in range(self.steps)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(FormSubmission.objects.count(), 1)
+        self.assertEqual(SubmissionStep.objects.count(), self.steps - 1)
+        submission = FormSubmission.objects.get()
+        submission.merge_steps()
+        values = sorted(field.value for field in submission.get_form_data() if field.name == "step")
+        self.assertEqual(values, [str(step) for step in range(self.steps)])
+        self.assertFalse(SubmissionStep.objects.exists())
+
+
+@override_settings(ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION=30)
+class PostIdentLockTest(TestCase):
+
+    def setUp(self):
+        page = create_page("test page", "test_page.html", "en")
+        placeholder = page.get_placeholders("en").get(slot="content")
+        self.form_plugin = add_plugin(placeholder, "FormWithIdentPlugin", "en", name="Steps")
+        add_plugin(placeholder, "TextField", "en", target=self.form_plugin, label="Step", name="step")
+
+    def get_form(self):
+        plugin = self.form_plugin.get_plugin_class_instance()
+        request = RequestFactory().post("/", {"form_plugin_id": self.form_plugin.pk, "step": "2"})
+        form = plugin.get_form_class(self.form_plugin)(**plugin.get_form_kwargs(self.form_plugin, request))
+        self.assertTrue(form.is_valid())
+        form.cleaned_data[ALDRYN_FORMS_POST_IDENT_NAME] = "1234567890"
+        return form
+
+    def test_step_appended_after_expiry(self):
+        form = self.get_form()
+        FormSubmission.objects.create(name="Steps", data="[]", post_ident="1234567890")
+        previous = FormSubmission.objects.only("post_ident").get()
+        self.assertTrue(FormSubmission.objects.get().expire_post_ident())
+        form.append_into_previous_submission(previous)
+        self.assertFalse(SubmissionStep.objects.exists())
+        submission = FormSubmission.objects.get()
+        self.assertIsNone(submission.post_ident)
+        self.assertEqual([field.value for field in submission.get_form_data()], ["2"])
+
+    def test_submission_created_while_waiting_for_lock(self):
+        form = self.get_form()
+
+        def create_parallel_submission(model, post_ident):
+            # The parallel post holding the lock creates the submission. Without the unique constraint of the
+            # partitioned table only the lookup under the lock finds it.
+            model.objects.create(name="Steps", data="[]", post_ident=post_ident)
+
+        with patch("aldryn_forms.forms.lock_post_ident", side_effect=create_parallel_submission) as lock, \
+                patch.object(form, "save_form_submission") as save_form_submission:
+            form.save()
+        lock.assert_called_once_with(FormSubmission, "1234567890")
+        save_form_submission.assert_not_called()
+        self.assertEqual(FormSubmission.objects.count(), 1)
+        self.assertEqual(SubmissionStep.objects.count(), 1)
@@ -1,9 +1,11 @@
 import json
 import smtplib
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from io import StringIO
 from unittest.mock import Mock, patch
 
 from django.core import mail
+from django.core.cache import cache
 from django.core.management import call_command
 from django.test import TestCase, override_settings
 
@@ -11,7 +13,8 @@ import responses
 from freezegun import freeze_time
 from testfixtures import LogCapture
 
-from aldryn_forms.models import FormSubmission, SubmittedToBeSent, Webhook
+from aldryn_forms.models import FormPlugin, FormSubmission, SpamCounter, SubmissionStep, SubmittedToBeSent, Webhook
+from aldryn_forms.spam import count_honeypot_hit, get_spam_counter_key
 
 
 @override_settings(ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION=30)
@@ -35,6 +38,23 @@ class RemoveExpiredPostIdentsTest(TestCase):
             call_command("aldryn_forms_remove_expired_post_idents")
         self.assertQuerySetEqual(FormSubmission.objects.values_list('post_ident'), [(None,)], transform=None)
 
+    def test_steps_merged(self):
+        with freeze_time(datetime(2025, 3, 14, 8, 59, 59, tzinfo=timezone.utc)):
+            FormSubmission.objects.create(name="Test", data=json.dumps(self.data), post_ident="1234567890")
+            SubmissionStep.objects.create(
+                submission_type="formsubmission", post_ident="1234567890",
+                data=json.dumps([{"label": "Step", "name": "step", "value": 2}]))
+            SubmissionStep.objects.create(
+                submission_type="submittedtobesent", post_ident="1234567890",
+                data=json.dumps([{"label": "Other", "name": "other", "value": 3}]))
+        with freeze_time(datetime(2025, 3, 14, 9, 30, tzinfo=timezone.utc)):
+            call_command("aldryn_forms_remove_expired_post_idents")
+        self.assertQuerySetEqual(FormSubmission.objects.values_list('post_ident', 'data'), [
+            (None, '[{"label": "Test", "name": "test", "value": 1}, {"label": "Step", "name": "step", "value": 2}]'),
+        ], transform=None)
+        self.assertQuerySetEqual(SubmissionStep.objects.values_list('submission_type'), [
+            ("submittedtobesent",)], transform=None)
+
     @override_settings(ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION=0)
     def test_disabled(self):
         with freeze_time(datetime(2025, 3, 14, 8, 59, 59, tzinfo=timezone.utc)):
@@ -103,6 +123,32 @@ class SendEmailsTest(TestCase):
             "'field_occurrence': 1, 'value': 1}]}"
         ))
 
+    def test_post_removed_with_steps(self):
+        with freeze_time(datetime(2025, 3, 14, 8, 59, 59, tzinfo=timezone.utc)):
+            tosent = SubmittedToBeSent.objects.create(
+                name="Test",
+                data=json.dumps(self.data),
+                post_ident="1234567890"
+            )
+            SubmissionStep.objects.create(
+                submission_type="submittedtobesent", post_ident="1234567890",
+                data=json.dumps([{"label": "Step", "name": "step", "value": 2}]))
+        webhook = Webhook.objects.create(name="Test", url=self.url)
+        tosent.webhooks.add(webhook)
+        with freeze_time(datetime(2025, 3, 14, 9, 30, tzinfo=timezone.utc)):
+            with responses.RequestsMock() as rsps:
+                rsps.add(responses.POST, self.url, body=json.dumps([{"status": "OK"}]))
+                call_command("aldryn_forms_send_emails")
+        self.assertEqual(SubmittedToBeSent.objects.count(), 0)
+        self.assertEqual(SubmissionStep.objects.count(), 0)
+        self.log_handler.check((
+            'aldryn_forms.api.webhook', 'DEBUG',
+            "{'hostname': 'example.com', 'name': 'Test', 'language': 'en', 'sent_at': "
+            "'2025-03-14T03:59:59-05:00', 'form_recipients': [], 'form_data': "
+            "[{'name': 'test', 'label': 'Test', 'field_occurrence': 1, 'value': 1}, "
+            "{'name': 'step', 'label': 'Step', 'field_occurrence': 1, 'value': 2}]}"
+        ))
+
     @override_settings(ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION=0)
     def test_disabled(self):
         with freeze_time(datetime(2025, 3, 14, 9, 0, tzinfo=timezone.utc)):
@@ -188,3 +234,39 @@ class SendEmailsTest(TestCase):
             "'2025-03-14T03:59:59-05:00', 'form_recipients': [], 'form_data': "
             "[{'name': 'test', 'label': 'Test', 'field_occurrence': 1, 'value': 1}]}"
         ))
+
+
+@freeze_time(datetime(2025, 3, 14, 12, 0, tzinfo=timezone.utc))
+class FlushSpamCountersTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        FormPlugin.objects.create(name="Contact us")
+
+    def test_nothing_to_flush(self):
+        call_command("aldryn_forms_flush_spam_counters")
+        self.assertFalse(SpamCounter.objects.exists())
+
+    def test_flush(self):
+        count_honeypot_hit("Contact us")
+        count_honeypot_hit("Contact us")
+        call_command("aldryn_forms_flush_spam_counters")
+        count_honeypot_hit("Contact us")
+        call_command("aldryn_forms_flush_spam_counters")
+        self.assertQuerySetEqual(SpamCounter.objects.values_list("name", "day", "hits"), [
+            ("Contact us", date(2025, 3, 14), 3),
+        ], transform=None)
+        self.assertEqual(cache.get(get_spam_counter_key("Contact us", date(2025, 3, 14))), 0)
+
+
+class BenchmarkFormDataTest(TestCase):
+
+    def test_command(self):
+        FormSubmission.objects.create(name="Test", data=json.dumps([{"label": "Test", "name": "test", "value": 1}]))
+        stdout = StringIO()
+        call_command("aldryn_forms_benchmark_form_data", rows=10, name="Test", stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(lines[0].split(". ")[1], "Submissions: 10.")
+        self.assertEqual([line.split(":")[0] for line in lines[1:]], [
+            "Object hooks", "get_form_data", "get_form_data cached"])
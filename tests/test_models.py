@@ -2,15 +2,17 @@ import json
 
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from cms.api import add_plugin
 from cms.models import Placeholder
 
 from filer.models import Folder
 
+from aldryn_forms.admin.exporter import Exporter
 from aldryn_forms.models import (
-    FileUploadFieldPlugin, FormSubmission, ImageUploadFieldPlugin, MultipleFilesUploadFieldPlugin, Option,
+    FileUploadFieldPlugin, FormSchema, FormSubmission, ImageUploadFieldPlugin, MultipleFilesUploadFieldPlugin, Option,
+    SubmissionStep, prefetch_form_data,
 )
 
 
@@ -172,3 +174,93 @@ class FormSubmissionTest(TestCase):
     def test_form_data(self):
         data = [{'name': 'test', 'label': 'Test', 'field_occurrence': 1, 'value': 1}]
         self.assertEqual(self.submission.form_data(), data)
+
+    def test_form_data_occurrences(self):
+        submission = FormSubmission(data=json.dumps([
+            {"label": "Name", "name": "text_1", "value": "Dave"},
+            {"label": "Name", "name": "text_2", "value": "Arnold"},
+            {"name": "email_1"},
+            "invalid",
+        ]))
+        form_data = submission.get_form_data()
+        self.assertEqual([field.field_occurrence for field in form_data[:3]], [1, 2, 1])
+        self.assertEqual([field.field_id for field in form_data[:3]], ["Name-text:1", "Name-text:2", "email_1:1"])
+        self.assertEqual(form_data[2].value, "")
+        self.assertEqual(form_data[3], "invalid")
+
+    def test_form_data_cached(self):
+        with self.assertNumQueries(0):
+            first = self.submission.get_form_data()
+            first.clear()
+            self.assertEqual(self.submission.get_form_data()[0].value, 1)
+        self.submission.data = json.dumps([{"label": "Test", "name": "test", "value": 2}])
+        self.assertEqual(self.submission.get_form_data()[0].value, 2)
+
+    def test_form_data_with_steps_not_cached(self):
+        self.submission.post_ident = "1234"
+        self.assertEqual(len(self.submission.get_form_data()), 1)
+        SubmissionStep.objects.create(
+            submission_type="formsubmission", post_ident="1234", data=json.dumps([{"name": "step", "value": 2}]))
+        self.assertEqual([field.value for field in self.submission.get_form_data()], [1, 2])
+
+    def test_prefetch_form_data(self):
+        pending = FormSubmission.objects.create(name="Test", data=self.submission.data, post_ident="1234")
+        for value in (2, 3):
+            data = json.dumps([{"name": "step", "value": value}])
+            SubmissionStep.objects.create(submission_type="formsubmission", post_ident="1234", data=data)
+        submissions = list(FormSubmission.objects.order_by("pk"))
+        with self.assertNumQueries(1):
+            prefetch_form_data(submissions)
+        with self.assertNumQueries(0):
+            self.assertEqual([[field.value for field in submission.get_form_data()] for submission in submissions], [
+                [1], [1, 2, 3]])
+        self.assertEqual(submissions[1].pk, pending.pk)
+
+
+@override_settings(ALDRYN_FORMS_COMPACT_DATA=True)
+class CompactFormDataTest(TestCase):
+
+    fields = [
+        {"name": "email_1", "label": "E-mail", "field_occurrence": 1, "value": "dave@lister.foo"},
+        {"name": "text_1", "label": "Message", "field_occurrence": 1, "value": "Hello"},
+        {"name": "text_2", "label": "Message", "field_occurrence": 2, "value": "World"},
+    ]
+
+    def create_submission(self, fields, **kwargs):
+        submission = FormSubmission(name="Contact", **kwargs)
+        submission.set_data(fields)
+        submission.save()
+        return submission
+
+    def test_encode(self):
+        submission = self.create_submission(self.fields)
+        self.assertEqual(submission.data, '["dave@lister.foo","Hello","World"]')
+        self.assertEqual(submission.schema.fields, [
+            ["email_1", "E-mail"], ["text_1", "Message"], ["text_2", "Message"]])
+        self.assertEqual(submission.form_data(), self.fields)
+        self.assertEqual(self.create_submission(self.fields).schema, submission.schema)
+        self.create_submission(self.fields[:1])
+        self.assertEqual(FormSchema.objects.count(), 2)
+
+    @override_settings(ALDRYN_FORMS_COMPACT_DATA=False)
+    def test_disabled(self):
+        submission = self.create_submission(self.fields)
+        self.assertIsNone(submission.schema)
+        self.assertEqual(json.loads(submission.data), self.fields)
+
+    def test_merge_steps(self):
+        submission = self.create_submission(self.fields[:1], post_ident="1234")
+        SubmissionStep.objects.create(
+            submission_type="formsubmission", post_ident="1234", data=json.dumps(self.fields[1:]))
+        submission.merge_steps()
+        submission.refresh_from_db()
+        self.assertEqual(submission.data, '["dave@lister.foo","Hello","World"]')
+        self.assertEqual(submission.form_data(), self.fields)
+
+    def test_exporter(self):
+        submission = self.create_submission(self.fields)
+        FormSubmission.objects.create(name="Contact", data=json.dumps(self.fields[1:]))
+        exporter = Exporter(FormSubmission.objects.order_by("pk"))
+        field_ids = [field.field_id for field in submission.get_form_data()]
+        dataset = exporter.get_dataset(field_ids[::-1])
+        self.assertEqual(list(dataset), [("World", "Hello", "dave@lister.foo"), ("World", "Hello", "")])
@@ -0,0 +1,75 @@
+from datetime import date, datetime, timezone
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from freezegun import freeze_time
+
+from aldryn_forms.models import FormSubmission, Webhook
+from aldryn_forms.partitioning import (
+    get_partition, get_partitions, is_partitioned, is_partitioning_supported, lock_post_ident, partition_table,
+)
+
+
+class PartitioningTest(TestCase):
+
+    def test_get_partition(self):
+        partition = get_partition(date(2024, 12, 17))
+        self.assertEqual(partition.name, "aldryn_forms_formsubmission_p2024_12")
+        self.assertEqual(partition.start, datetime(2024, 12, 1, tzinfo=timezone.utc))
+        self.assertEqual(partition.end, datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+    @override_settings(ALDRYN_FORMS_PARTITIONING={})
+    def test_sqlite_is_not_supported(self):
+        self.assertFalse(is_partitioning_supported())
+        partition_table(using="default")
+        self.assertFalse(is_partitioned())
+        self.assertEqual(get_partitions(), [])
+        # Parallel posts are not serialized on other databases.
+        with self.assertNumQueries(0):
+            lock_post_ident(FormSubmission, "1234")
+
+    @override_settings(ALDRYN_FORMS_PARTITIONING={})
+    def test_commands_are_noop(self):
+        for command, options in (
+            ("aldryn_forms_create_partitions", {"convert": True}),
+            ("aldryn_forms_drop_partitions", {"days": 30}),
+        ):
+            out = StringIO()
+            call_command(command, stdout=out, **options)
+            self.assertEqual(out.getvalue(), "Partitioning is not enabled or not supported by the database.\n")
+
+
+@skipUnless(connection.vendor == "postgresql", "Partitioning requires PostgreSQL.")
+@override_settings(ALDRYN_FORMS_PARTITIONING={})
+class PostgreSQLPartitioningTest(TestCase):
+
+    def test_partition_table(self):
+        webhook = Webhook.objects.create(name="Test", url="http://example.com/", method="post")
+        with freeze_time(datetime(2025, 1, 5, tzinfo=timezone.utc)):
+            FormSubmission.objects.create(name="Old", data="[]")
+        submissions = [FormSubmission.objects.create(name=f"Test {number}", data="[]") for number in range(3)]
+        submissions[0].webhooks.add(webhook)
+        changes = []
+
+        def change_rows(seconds):
+            # The rows changed while the batches are copied are copied again at the end.
+            if not changes:
+                FormSubmission.objects.filter(pk=submissions[1].pk).update(name="Changed")
+                FormSubmission.objects.filter(pk=submissions[2].pk).delete()
+                changes.append(FormSubmission.objects.create(name="Added", data="[]"))
+
+        with patch("aldryn_forms.partitioning.time.sleep", side_effect=change_rows):
+            self.assertEqual(partition_table(months_ahead=1, batch_size=2, sleep=1), 4)
+        self.assertTrue(is_partitioned())
+        self.assertIn(get_partition(date(2025, 1, 1)), get_partitions())
+        self.assertQuerySetEqual(
+            FormSubmission.objects.order_by("pk").values_list("name", flat=True),
+            ["Old", "Test 0", "Changed", "Added"])
+        self.assertQuerySetEqual(FormSubmission.objects.get(pk=submissions[0].pk).webhooks.all(), [webhook])
+        self.assertGreater(FormSubmission.objects.create(name="New", data="[]").pk, changes[0].pk)
+        self.assertEqual(partition_table(), 0)
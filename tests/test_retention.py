@@ -0,0 +1,124 @@
+import json
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+
+from cms.api import add_plugin, create_page
+from cms.test_utils.testcases import CMSTestCase
+
+from filer.models import File, Folder
+from freezegun import freeze_time
+
+from aldryn_forms.models import FileReference, FormSubmission, SubmissionStep
+from aldryn_forms.references import get_linked_paths
+from aldryn_forms.retention import delete_in_batches, get_file_path, get_linked_files
+
+
+RETENTION_POLICIES = {"Upload": 30, "*": 365}
+
+
+@override_settings(ALDRYN_FORMS_RETENTION_POLICIES=RETENTION_POLICIES)
+class PurgeSubmissionsTest(CMSTestCase):
+
+    def setUp(self):
+        self.page = create_page('test page', 'test_page.html', 'en')
+        placeholder = self.page.get_placeholders('en').get(slot='content')
+        self.form_plugin = add_plugin(
+            placeholder, "FormPlugin", "en", name="Upload", redirect_to={"external_link": "http://www.google.com"})
+        add_plugin(
+            placeholder, 'FileField', 'en', target=self.form_plugin, label="File", name="file",
+            upload_to=Folder.objects.create(name="Uploads"))
+        self.form_plugin.action_backend = "default"
+        self.form_plugin.save()
+
+    def post_file(self, day, content=b"content"):
+        upload = SimpleUploadedFile("file.txt", content, content_type="text/plain")
+        with freeze_time(datetime(2025, 3, day, 9, 0, tzinfo=timezone.utc)):
+            self.client.post(self.page.get_absolute_url("en"), {"form_plugin_id": self.form_plugin.pk, "file": upload})
+        return FormSubmission.objects.latest("pk")
+
+    def purge(self, **options):
+        out = StringIO()
+        with freeze_time(datetime(2025, 4, 10, 9, 0, tzinfo=timezone.utc)):
+            call_command("aldryn_forms_purge_submissions", sleep=0, batch_size=1, stdout=out, **options)
+        return out.getvalue()
+
+    def test_purge(self):
+        expired = self.post_file(1)
+        kept = self.post_file(20, b"other content")
+        FormSubmission.objects.create(name="Other", data="[]", sent_at=datetime(2025, 3, 1, tzinfo=timezone.utc))
+        SubmissionStep.objects.create(submission_type="formsubmission", post_ident="1234", data="[]")
+        FormSubmission.objects.filter(pk=expired.pk).update(post_ident="1234")
+        self.assertEqual(self.purge(verbosity=2), (
+            "Upload: Deleted 1 submissions and 1 files.\n"
+            "*: Deleted 0 submissions and 0 files.\n"
+        ))
+        self.assertQuerySetEqual(
+            FormSubmission.objects.order_by("pk").values_list("pk", flat=True), [kept.pk, kept.pk + 1])
+        self.assertEqual(File.objects.count(), 1)
+        self.assertFalse(SubmissionStep.objects.exists())
+
+    def test_file_linked_by_kept_submission(self):
+        expired = self.post_file(1)
+        kept = FormSubmission.objects.create(
+            name="Upload", data=expired.data, sent_at=datetime(2025, 3, 20, tzinfo=timezone.utc))
+        self.purge()
+        self.assertQuerySetEqual(FormSubmission.objects.all(), [kept])
+        self.assertEqual(File.objects.count(), 1)
+
+    def test_dry_run(self):
+        self.post_file(1)
+        self.post_file(2)
+        self.assertEqual(self.purge(dry_run=True), (
+            "Upload: Would delete 2 submissions and 2 files.\n"
+            "*: Would delete 0 submissions and 0 files.\n"
+        ))
+        self.assertEqual(FormSubmission.objects.count(), 2)
+        self.assertEqual(File.objects.count(), 2)
+
+    def test_no_policies(self):
+        self.post_file(1)
+        with override_settings(ALDRYN_FORMS_RETENTION_POLICIES={}):
+            self.assertEqual(self.purge(), "")
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+    def test_delete_in_batches(self):
+        for _ in range(3):
+            FormSubmission.objects.create(name="Test", data="[]")
+        self.assertEqual(delete_in_batches(FormSubmission.objects.all(), batch_size=2), 3)
+        self.assertFalse(FormSubmission.objects.exists())
+
+    def test_get_linked_paths(self):
+        data = json.dumps([
+            {"name": "file", "value": "http://testserver/media/a.txt\nhttp://testserver/media/b.txt"},
+            {"name": "name", "value": "Tester"},
+            {"name": "number", "value": 1},
+            {"name": "path", "value": "/home/tester\nhttps://example.com/media"},
+        ])
+        self.assertEqual(get_linked_paths(data), {"/media/a.txt", "/media/b.txt"})
+
+    def test_get_linked_files(self):
+        submission = self.post_file(1)
+        self.post_file(2, b"other content")
+        paths = get_linked_paths(submission.data) | {"/media/missing.txt", "/static/file.txt"}
+        folder_ids = set(File.objects.values_list("folder_id", flat=True))
+        with self.assertNumQueries(1):
+            files = get_linked_files(paths, folder_ids)
+        self.assertEqual([get_file_path(filer_file) for filer_file in files], list(get_linked_paths(submission.data)))
+
+    def test_file_references(self):
+        submission = self.post_file(1)
+        path = FileReference.objects.get(submission_type="formsubmission", object_id=submission.pk).path
+        self.assertEqual(get_linked_paths(submission.data), {path})
+        submission.data = "[]"
+        submission.save()
+        self.assertFalse(FileReference.objects.exists())
+        step = SubmissionStep.objects.create(
+            submission_type="formsubmission", post_ident="1234", data=json.dumps([{"name": "f", "value": path}]))
+        self.assertQuerySetEqual(FileReference.objects.values_list("submission_type", "object_id"), [
+            ("submissionstep", step.pk)])
+        step.delete()
+        self.assertFalse(FileReference.objects.exists())
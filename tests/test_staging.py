@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+
+from cms.api import add_plugin, create_page
+from cms.test_utils.testcases import CMSTestCase
+
+from filer.models import File, Folder
+from freezegun import freeze_time
+
+from aldryn_forms.models import FormSubmission, StagedUpload, SubmittedToBeSent
+from aldryn_forms.staging import build_absolute_uri, has_staged_uploads
+
+
+class StagingTest(CMSTestCase):
+
+    def setUp(self):
+        self.staging_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.staging_dir)
+        settings = override_settings(
+            ALDRYN_FORMS_DEFERRED_UPLOADS=True, ALDRYN_FORMS_UPLOADS_STAGING_DIR=self.staging_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.page = create_page('test page', 'test_page.html', 'en')
+        placeholder = self.page.get_placeholders('en').get(slot='content')
+        self.form_plugin = add_plugin(
+            placeholder, "FormPlugin", "en", name="Upload", redirect_to={"external_link": "http://www.google.com"})
+        self.folder = Folder.objects.create(name="Uploads")
+        add_plugin(
+            placeholder, 'FileField', 'en', target=self.form_plugin, label="File", name="file", upload_to=self.folder)
+        self.form_plugin.action_backend = "default"
+        self.form_plugin.save()
+
+    def post_file(self):
+        upload = SimpleUploadedFile("file.txt", b"content", content_type="text/plain")
+        self.client.post(self.page.get_absolute_url("en"), {"form_plugin_id": self.form_plugin.pk, "file": upload})
+
+    def test_upload_staged(self):
+        self.post_file()
+        self.assertFalse(File.objects.exists())
+        staged = StagedUpload.objects.get()
+        self.assertEqual(staged.folder, self.folder)
+        self.assertEqual(staged.base_uri, "http://testserver/")
+        with open(staged.path, "rb") as staged_file:
+            self.assertEqual(staged_file.read(), b"content")
+        submission = FormSubmission.objects.get()
+        self.assertEqual(json.loads(submission.data)[0]["value"], f"aldryn-forms-staged-upload:{staged.token}")
+        self.assertTrue(has_staged_uploads(submission))
+        self.assertEqual((staged.submission_id, staged.post_ident), (submission.pk, None))
+
+    def test_ingest(self):
+        self.post_file()
+        staged = StagedUpload.objects.get()
+        call_command("aldryn_forms_ingest_uploads", workers=1)
+        filer_file = File.objects.get()
+        self.assertEqual(
+            (filer_file.original_filename, filer_file.folder, filer_file.size), ("file.txt", self.folder, 7))
+        submission = FormSubmission.objects.get()
+        self.assertEqual(json.loads(submission.data)[0]["value"], f"http://testserver{filer_file.url}")
+        self.assertFalse(has_staged_uploads(submission))
+        self.assertFalse(StagedUpload.objects.exists())
+        self.assertFalse(os.path.exists(staged.path))
+
+    def test_ingest_patches_linked_rows_only(self):
+        self.post_file()
+        staged = StagedUpload.objects.get()
+        placeholder = json.dumps([{"name": "file", "value": f"aldryn-forms-staged-upload:{staged.token}"}])
+        other = FormSubmission.objects.create(name="Other", data=placeholder)
+        call_command("aldryn_forms_ingest_uploads", workers=1)
+        self.assertFalse(has_staged_uploads(FormSubmission.objects.exclude(pk=other.pk).get()))
+        other.refresh_from_db()
+        self.assertEqual(other.data, placeholder)
+
+    @override_settings(ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION=30)
+    def test_ingest_postponed(self):
+        self.post_file()
+        staged = StagedUpload.objects.get()
+        submission = FormSubmission.objects.get()
+        self.assertEqual(staged.submission_id, submission.pk)
+        self.assertEqual(staged.post_ident, submission.post_ident)
+        call_command("aldryn_forms_ingest_uploads", workers=1)
+        uri = f"http://testserver{File.objects.get().url}"
+        self.assertEqual(json.loads(FormSubmission.objects.get().data)[0]["value"], uri)
+        self.assertEqual(json.loads(SubmittedToBeSent.objects.get().data)[0]["value"], uri)
+
+    def test_ingest_failed(self):
+        self.post_file()
+        staged = StagedUpload.objects.get()
+        os.remove(staged.path)
+        with self.assertLogs("aldryn_forms.staging", "ERROR"):
+            call_command("aldryn_forms_ingest_uploads", workers=1)
+        self.assertFalse(File.objects.exists())
+        self.assertTrue(StagedUpload.objects.exists())
+        self.assertTrue(has_staged_uploads(FormSubmission.objects.get()))
+
+    def test_send_emails_waits_for_uploads(self):
+        with freeze_time(datetime(2025, 3, 14, 8, 0, tzinfo=timezone.utc)):
+            SubmittedToBeSent.objects.create(
+                name="Test",
+                data=json.dumps([{"label": "File", "name": "file", "value": "aldryn-forms-staged-upload:token"}]),
+                recipients=json.dumps([{"name": "Dave", "email": "dave@foo.foo"}]),
+                post_ident="1234567890",
+            )
+        with freeze_time(datetime(2025, 3, 14, 9, 30, tzinfo=timezone.utc)):
+            call_command("aldryn_forms_send_emails")
+        self.assertTrue(SubmittedToBeSent.objects.exists())
+
+    def test_build_absolute_uri(self):
+        self.assertEqual(build_absolute_uri("http://host/", "/media/file.txt"), "http://host/media/file.txt")
+        self.assertEqual(build_absolute_uri("http://host/", "https://cdn/file.txt"), "https://cdn/file.txt")
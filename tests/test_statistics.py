@@ -0,0 +1,120 @@
+from datetime import date, datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from freezegun import freeze_time
+
+from aldryn_forms.api.views import StatisticsViewSet
+from aldryn_forms.models import FormSubmission, SubmissionStatistics, SubmittedToBeSent
+from aldryn_forms.statistics import update_statistics
+
+
+def create_submission(name="Contact", sent_at=datetime(2025, 3, 14, 12, tzinfo=timezone.utc), **kwargs):
+    with freeze_time(sent_at):
+        return FormSubmission.objects.create(name=name, data="[]", **kwargs)
+
+
+def get_statistics():
+    return list(SubmissionStatistics.objects.order_by("day", "name", "language").values_list(
+        "name", "day", "language", "total", "spam", "pending"))
+
+
+@override_settings(ALDRYN_FORMS_STATISTICS=True)
+class CountSubmissionTest(TestCase):
+
+    def test_count(self):
+        create_submission()
+        create_submission(honeypot_filled=True)
+        create_submission(post_ident="1234")
+        create_submission(language="de")
+        create_submission(sent_at=datetime(2025, 3, 15, 12, tzinfo=timezone.utc))
+        SubmittedToBeSent.objects.create(name="Contact", data="[]")
+        self.assertEqual(get_statistics(), [
+            ("Contact", date(2025, 3, 14), "de", 1, 0, 0),
+            ("Contact", date(2025, 3, 14), "en", 3, 1, 1),
+            ("Contact", date(2025, 3, 15), "en", 1, 0, 0),
+        ])
+
+    def test_local_day(self):
+        # 2025-03-14 03:00 UTC is 2025-03-13 in America/Chicago.
+        create_submission(sent_at=datetime(2025, 3, 14, 3, tzinfo=timezone.utc))
+        self.assertEqual(get_statistics(), [("Contact", date(2025, 3, 13), "en", 1, 0, 0)])
+
+    def test_update_does_not_count(self):
+        submission = create_submission()
+        submission.save()
+        self.assertEqual(get_statistics(), [("Contact", date(2025, 3, 14), "en", 1, 0, 0)])
+
+    @override_settings(ALDRYN_FORMS_MULTIPLE_SUBMISSION_DURATION=30)
+    def test_expired_post_ident(self):
+        create_submission(post_ident="1234")
+        create_submission(post_ident="5678")
+        create_submission(post_ident="9012", sent_at=datetime(2025, 3, 14, 12, 20, tzinfo=timezone.utc))
+        with freeze_time(datetime(2025, 3, 14, 12, 45, tzinfo=timezone.utc)):
+            call_command("aldryn_forms_remove_expired_post_idents")
+        self.assertEqual(get_statistics(), [("Contact", date(2025, 3, 14), "en", 3, 0, 1)])
+
+    @override_settings(ALDRYN_FORMS_STATISTICS=False)
+    def test_disabled(self):
+        create_submission()
+        self.assertEqual(get_statistics(), [])
+
+
+@freeze_time(datetime(2025, 3, 16, 12, tzinfo=timezone.utc))
+class UpdateStatisticsTest(TestCase):
+
+    def setUp(self):
+        create_submission(sent_at=datetime(2025, 3, 10, 12, tzinfo=timezone.utc))
+        create_submission(honeypot_filled=True)
+        create_submission(post_ident="1234")
+        create_submission("Order")
+        SubmissionStatistics.objects.create(name="Contact", day=date(2025, 3, 1), language="en", total=5)
+        SubmissionStatistics.objects.create(name="Contact", day=date(2025, 3, 14), language="en", total=9)
+        SubmissionStatistics.objects.create(name="Contact", day=date(2025, 3, 15), language="en", total=9)
+        SubmissionStatistics.objects.create(name="Deleted", day=date(2025, 3, 15), language="en", total=2)
+
+    def test_update(self):
+        self.assertEqual(update_statistics(date(2025, 3, 12)), 2)
+        self.assertEqual(get_statistics(), [
+            ("Contact", date(2025, 3, 1), "en", 5, 0, 0),
+            ("Contact", date(2025, 3, 14), "en", 2, 1, 1),
+            ("Order", date(2025, 3, 14), "en", 1, 0, 0),
+        ])
+
+    def test_command(self):
+        out = StringIO()
+        call_command("aldryn_forms_update_statistics", verbosity=2, stdout=out)
+        self.assertEqual(out.getvalue(), "Updated 3 rows of statistics since 2025-03-10.\n")
+        call_command("aldryn_forms_update_statistics", "--all", verbosity=2, stdout=out)
+        self.assertEqual(get_statistics(), [
+            ("Contact", date(2025, 3, 1), "en", 5, 0, 0),
+            ("Contact", date(2025, 3, 10), "en", 1, 0, 0),
+            ("Contact", date(2025, 3, 14), "en", 2, 1, 1),
+            ("Order", date(2025, 3, 14), "en", 1, 0, 0),
+        ])
+
+
+class StatisticsViewSetTest(TestCase):
+
+    def setUp(self):
+        self.view = StatisticsViewSet.as_view({"get": "list"})
+        SubmissionStatistics.objects.create(name="Contact", day=date(2025, 3, 14), language="en", total=3, spam=1)
+        SubmissionStatistics.objects.create(name="Contact", day=date(2025, 3, 15), language="de", total=2)
+        SubmissionStatistics.objects.create(name="Order", day=date(2025, 3, 15), language="en", total=1)
+
+    def test_forbidden(self):
+        response = self.view(RequestFactory().get("/"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_list(self):
+        request = RequestFactory().get("/", {"name": "Contact", "day_range_after": "2025-03-14"})
+        request._user = get_user_model().objects.create(username="admin", is_superuser=True)
+        response = self.view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [
+            {"name": "Contact", "day": "2025-03-15", "language": "de", "total": 2, "spam": 0, "pending": 0},
+            {"name": "Contact", "day": "2025-03-14", "language": "en", "total": 3, "spam": 1, "pending": 0},
+        ])
@@ -0,0 +1,107 @@
+import threading
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from freezegun import freeze_time
+
+from aldryn_forms.throttling import get_client_ip, hit_window, is_rate_limited, parse_rate
+
+
+class ParseRateTest(SimpleTestCase):
+
+    def test_rate(self):
+        self.assertEqual(parse_rate("10/m"), (10, 60))
+
+    def test_rate_with_multiplier(self):
+        self.assertEqual(parse_rate("3/10s"), (3, 10))
+
+    def test_invalid_rate(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'Invalid rate "10/w" in settings.ALDRYN_FORMS_RATE_LIMIT.'):
+            parse_rate("10/w")
+
+
+class GetClientIpTest(SimpleTestCase):
+
+    def test_remote_addr(self):
+        request = RequestFactory().post("/", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(get_client_ip(request), "10.0.0.1")
+
+    @override_settings(ALDRYN_FORMS_RATE_LIMIT={"ip_header": "HTTP_X_FORWARDED_FOR"})
+    def test_forwarded_for(self):
+        # The first entry is sent by the client. The last one is added by the proxy.
+        request = RequestFactory().post("/", HTTP_X_FORWARDED_FOR="1.2.3.4, 10.0.0.2")
+        self.assertEqual(get_client_ip(request), "10.0.0.2")
+
+    @override_settings(ALDRYN_FORMS_RATE_LIMIT={"ip_header": "HTTP_X_FORWARDED_FOR", "proxy_count": 2})
+    def test_forwarded_for_proxy_count(self):
+        request = RequestFactory().post("/", HTTP_X_FORWARDED_FOR="1.2.3.4, 10.0.0.2, 10.0.0.3")
+        self.assertEqual(get_client_ip(request), "10.0.0.2")
+        request = RequestFactory().post("/", HTTP_X_FORWARDED_FOR="10.0.0.3")
+        self.assertEqual(get_client_ip(request), "10.0.0.3")
+
+
+class HitWindowTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_limit(self):
+        self.assertEqual([hit_window("client", 2, 60, 120.0) for _ in range(3)], [True, True, False])
+
+    def test_sliding_window(self):
+        hit_window("client", 2, 60, 120.0)
+        hit_window("client", 2, 60, 130.0)
+        # Half of the previous window is still counted: 2 * 0.5 + 1.
+        self.assertTrue(hit_window("client", 2, 60, 210.0))
+        # 2 * 0.5 + 2.
+        self.assertFalse(hit_window("client", 2, 60, 210.0))
+        # 2 * 0 + 3.
+        self.assertFalse(hit_window("client", 2, 60, 240.0))
+        self.assertTrue(hit_window("client", 2, 60, 300.0))
+
+
+@freeze_time(datetime(2025, 3, 14, 9, 0, 10, tzinfo=timezone.utc))
+@override_settings(ALDRYN_FORMS_RATE_LIMIT={"burst": "5/m", "rate": "100/h"})
+class IsRateLimitedTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_disabled(self):
+        with override_settings(ALDRYN_FORMS_RATE_LIMIT={}), patch("aldryn_forms.throttling.hit_window") as hit:
+            self.assertFalse(is_rate_limited(RequestFactory().post("/"), 1))
+        hit.assert_not_called()
+
+    def test_result_stored_in_request(self):
+        request = RequestFactory().post("/")
+        for _ in range(10):
+            self.assertFalse(is_rate_limited(request, 1))
+
+    def test_key_by_form(self):
+        for _ in range(5):
+            self.assertFalse(is_rate_limited(RequestFactory().post("/"), 1))
+        self.assertTrue(is_rate_limited(RequestFactory().post("/"), 1))
+        self.assertFalse(is_rate_limited(RequestFactory().post("/"), 2))
+
+    def test_concurrency(self):
+        results = []
+        barrier = threading.Barrier(20)
+
+        def submit():
+            request = RequestFactory().post("/")
+            barrier.wait()
+            results.append(is_rate_limited(request, 1))
+
+        threads = [threading.Thread(target=submit) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(False), 5)
+        self.assertEqual(results.count(True), 15)
@@ -0,0 +1,90 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, modify_settings
+
+from cms.api import add_plugin, create_page
+from cms.test_utils.testcases import CMSTestCase
+
+from filer.models import File, Folder
+
+from aldryn_forms.forms import RestrictedFileField
+from aldryn_forms.upload_limits import FormUploadLimitHandler, RejectedUpload
+
+
+class FormUploadLimitHandlerTest(SimpleTestCase):
+
+    def setUp(self):
+        request = RequestFactory().post("/")
+        fields = {"file": RestrictedFileField(max_size=10, accepted_types=[".pdf", "application/pdf"])}
+        self.handler = FormUploadLimitHandler(request, fields)
+
+    def test_accepted(self):
+        self.handler.new_file("file", "file.pdf", "application/pdf", 9)
+        self.assertEqual(self.handler.receive_data_chunk(b"%PDF-", 0), b"%PDF-")
+        self.assertEqual(self.handler.receive_data_chunk(b"1234", 5), b"1234")
+        self.assertIsNone(self.handler.file_complete(9))
+
+    def test_size_exceeded(self):
+        self.handler.new_file("file", "file.pdf", "application/pdf", 12)
+        self.assertEqual(self.handler.receive_data_chunk(b"%PDF-", 0), b"%PDF-")
+        self.assertIsNone(self.handler.receive_data_chunk(b"1234567", 5))
+        # The rest of the file is dropped.
+        self.assertIsNone(self.handler.receive_data_chunk(b"8", 12))
+        upload = self.handler.file_complete(13)
+        self.assertIsInstance(upload, RejectedUpload)
+        self.assertEqual(upload.upload_error, "File size exceeded the specified limit 10.0B.")
+
+    def test_size_of_files_in_field(self):
+        self.handler.new_file("file", "first.pdf", "application/pdf", 6)
+        self.handler.receive_data_chunk(b"%PDF-1", 0)
+        self.assertIsNone(self.handler.file_complete(6))
+        self.handler.new_file("file", "second.pdf", "application/pdf", 6)
+        self.assertIsNone(self.handler.receive_data_chunk(b"%PDF-1", 0))
+
+    def test_magic_bytes_not_accepted(self):
+        self.handler.new_file("file", "file.exe", "application/pdf", 4)
+        self.assertIsNone(self.handler.receive_data_chunk(b"MZ\x90\x00", 0))
+        self.assertEqual(
+            self.handler.file_complete(4).upload_error,
+            '"file.exe" is not of accepted file type. Accepted file types are: .pdf, application/pdf.')
+
+    def test_other_field(self):
+        self.handler.new_file("other", "file.exe", "application/octet-stream", 20)
+        self.assertEqual(self.handler.receive_data_chunk(b"MZ\x90\x00" * 5, 0), b"MZ\x90\x00" * 5)
+        self.assertIsNone(self.handler.file_complete(20))
+
+
+@modify_settings(MIDDLEWARE={"append": "aldryn_forms.middleware.handle_post.HandleHttpPost"})
+class UploadLimitsMiddlewareTest(CMSTestCase):
+
+    def setUp(self):
+        self.page = create_page('test page', 'test_page.html', 'en')
+        placeholder = self.page.get_placeholders('en').get(slot='content')
+        self.form_plugin = add_plugin(placeholder, "FormPlugin", "en", name="Upload")
+        add_plugin(
+            placeholder, 'FileField', 'en', target=self.form_plugin, label="File", name="file",
+            upload_to=Folder.objects.create(name="Uploads"), max_size=10, help_text="Max. MAXSIZE")
+        self.form_plugin.action_backend = "default"
+        self.form_plugin.save()
+
+    def post(self, content, **headers):
+        upload = SimpleUploadedFile("file.txt", content, content_type="text/plain")
+        return self.client.post(
+            self.page.get_absolute_url("en"), {"form_plugin_id": self.form_plugin.pk, "file": upload},
+            headers={"X-Requested-With": "XMLHttpRequest", **headers})
+
+    def test_rejected(self):
+        response = self.post(b"x" * 11, x_aldryn_forms_plugin_id=str(self.form_plugin.pk))
+        self.assertJSONEqual(response.content, {
+            "status": "ERROR", "form": {"file": ["File size exceeded the specified limit 10.0B."]}})
+        self.assertFalse(File.objects.exists())
+
+    def test_accepted(self):
+        response = self.post(b"x" * 10, x_aldryn_forms_plugin_id=str(self.form_plugin.pk))
+        self.assertEqual(response.json()["status"], "SUCCESS")
+        self.assertEqual(File.objects.get().size, 10)
+
+    def test_without_form_id(self):
+        # The size is checked after the file is received.
+        response = self.post(b"x" * 11)
+        self.assertJSONEqual(response.content, {
+            "status": "ERROR", "form": {"file": ["File size exceeded the specified limit 10.0B."]}})
@@ -0,0 +1,130 @@
+import hashlib
+from io import BytesIO
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+
+from cms.api import add_plugin, create_page
+from cms.test_utils.testcases import CMSTestCase
+
+from filer.models import File, Folder, Image
+from PIL import Image as PILImage
+
+from aldryn_forms.forms import RestrictedImageField
+from aldryn_forms.uploads import UploadInfo, get_filer_file_fields, get_upload_info
+
+
+def create_image(name="image.png", size=(30, 20), mode="RGBA", image_format="PNG") -> SimpleUploadedFile:
+    buffer = BytesIO()
+    PILImage.new(mode, size).save(buffer, format=image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class GetUploadInfoTest(SimpleTestCase):
+
+    def test_image(self):
+        self.assertEqual(get_upload_info(create_image()), UploadInfo(True, "image/png", 30, 20, True))
+
+    def test_image_not_transparent(self):
+        upload = create_image("image.jpg", mode="RGB", image_format="JPEG")
+        self.assertEqual(get_upload_info(upload), UploadInfo(True, "image/jpeg", 30, 20, False))
+
+    def test_file(self):
+        upload = SimpleUploadedFile("file.txt", b"content", content_type="text/plain")
+        self.assertEqual(get_upload_info(upload), UploadInfo(False))
+
+    def test_svg(self):
+        upload = SimpleUploadedFile("image.svg", b"<svg></svg>", content_type="image/svg+xml")
+        self.assertEqual(get_upload_info(upload), UploadInfo(True, "image/svg+xml", transparent=True))
+
+    def test_sniffed_once(self):
+        upload = create_image()
+        with patch("aldryn_forms.uploads.Image.open", wraps=PILImage.open) as image_open:
+            get_upload_info(upload)
+            get_upload_info(upload)
+        image_open.assert_called_once()
+        self.assertEqual(upload.tell(), 0)
+
+
+class GetFilerFileFieldsTest(SimpleTestCase):
+
+    def test_image(self):
+        upload = create_image()
+        self.assertEqual(get_filer_file_fields(upload), {
+            "_file_size": upload.size,
+            "sha1": hashlib.sha1(upload.read()).hexdigest(),
+            "mime_type": "image/png",
+            "_width": 30,
+            "_height": 20,
+            "_transparent": True,
+        })
+
+    def test_file(self):
+        upload = SimpleUploadedFile("file.txt", b"content", content_type="text/plain")
+        self.assertEqual(get_filer_file_fields(upload), {
+            "_file_size": 7,
+            "sha1": hashlib.sha1(b"content").hexdigest(),
+            "mime_type": "text/plain",
+        })
+
+    def test_unknown_dimensions(self):
+        upload = SimpleUploadedFile("image.svg", b"<svg></svg>", content_type="image/svg+xml")
+        self.assertEqual(get_filer_file_fields(upload), {})
+
+
+class RestrictedImageFieldTest(SimpleTestCase):
+
+    def test_image_not_decoded(self):
+        field = RestrictedImageField(max_width=40, max_height=40)
+        upload = create_image()
+        field.files = [upload]
+        with patch("PIL.Image.Image.load") as load:
+            self.assertEqual(field.clean(upload), [upload])
+        load.assert_not_called()
+        self.assertEqual(upload.content_type, "image/png")
+
+    def test_image_too_wide(self):
+        field = RestrictedImageField(max_width=20)
+        upload = create_image()
+        field.files = [upload]
+        with self.assertRaisesMessage(Exception, "Image width must be under 20 pixels. Current width is 30 pixels."):
+            field.clean(upload)
+
+    def test_invalid_image(self):
+        field = RestrictedImageField()
+        upload = SimpleUploadedFile("image.png", b"content", content_type="image/png")
+        field.files = [upload]
+        with self.assertRaisesMessage(Exception, "Upload a valid image."):
+            field.clean(upload)
+
+
+class FileFieldFormPreSaveTest(CMSTestCase):
+
+    def setUp(self):
+        self.page = create_page('test page', 'test_page.html', 'en')
+        placeholder = self.page.get_placeholders('en').get(slot='content')
+        self.form_plugin = add_plugin(
+            placeholder, "FormPlugin", "en", name="Upload", redirect_to={"external_link": "http://www.google.com"})
+        folder = Folder.objects.create(name="Uploads")
+        add_plugin(placeholder, 'FileField', 'en', target=self.form_plugin, label="File", name="file", upload_to=folder)
+        self.form_plugin.action_backend = "none"
+        self.form_plugin.save()
+
+    def test_image(self):
+        data = {"form_plugin_id": self.form_plugin.pk, "file": create_image()}
+        with patch("PIL.Image.open", wraps=PILImage.open) as image_open:
+            self.client.post(self.page.get_absolute_url("en"), data)
+        # Only the header was read to sniff the type. Filer did not open the image again.
+        image_open.assert_called_once()
+        image = Image.objects.get()
+        self.assertEqual((image.width, image.height, image.mime_type), (30, 20, "image/png"))
+        self.assertEqual(image.sha1, hashlib.sha1(image.file.read()).hexdigest())
+
+    def test_file(self):
+        upload = SimpleUploadedFile("file.txt", b"content", content_type="text/plain")
+        self.client.post(self.page.get_absolute_url("en"), {"form_plugin_id": self.form_plugin.pk, "file": upload})
+        self.assertQuerySetEqual(File.objects.values_list("original_filename", "_file_size", "mime_type"), [
+            ("file.txt", 7, "text/plain")
+        ], transform=None)
+        self.assertFalse(Image.objects.exists())
@@ -4,6 +4,7 @@ from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.core.cache import cache
 from django.http import HttpResponseBadRequest
 from django.test import modify_settings, override_settings
 from django.urls import clear_url_caches
@@ -12,7 +13,7 @@ from cms.api import add_plugin, create_page
 from cms.appresolver import clear_app_resolvers
 from cms.test_utils.testcases import CMSTestCase
 
-from aldryn_forms.models import FormPlugin, FormSubmission, SubmittedToBeSent
+from aldryn_forms.models import FormPlugin, FormSubmission, SubmissionStep, SubmittedToBeSent
 
 
 class SubmitFormViewTest(CMSTestCase):
@@ -225,10 +226,19 @@ class SubmitFormViewTest(CMSTestCase):
         ]
         SubmittedToBeSent.objects.create(name="Test", data=json.dumps(data), post_ident=post_ident)
         self._submit_one_form_instead_multiple(self.redirect_url_with_params, "FormWithIdentPlugin", post_ident)
+        self.assertQuerySetEqual(SubmittedToBeSent.objects.values_list("name", "data"), [
+            ('Test', '[{"label": "Test", "name": "test", "value": 1}]'),
+        ])
+        self.assertQuerySetEqual(SubmissionStep.objects.values_list("submission_type", "post_ident", "data"), [
+            ('submittedtobesent', post_ident,
+             '[{"name": "email", "label": "Email", "field_occurrence": 1, "value": "test2@test.foo"}]'),
+        ])
+        SubmittedToBeSent.objects.get().merge_steps()
         self.assertQuerySetEqual(SubmittedToBeSent.objects.values_list("name", "data"), [
             ('Test', '[{"label": "Test", "name": "test", "value": 1}, '
              '{"name": "email", "label": "Email", "field_occurrence": 1, "value": "test2@test.foo"}]'),
         ])
+        self.assertFalse(SubmissionStep.objects.exists())
 
     def test_view_submit_one_form_instead_multiple(self):
         self._submit_one_form_instead_multiple(self.redirect_url)
@@ -400,6 +410,34 @@ class SubmitFormViewTest(CMSTestCase):
         self.assertQuerySetEqual(FormSubmission.objects.values_list('data'), [])
         self.assertEqual(len(mail.outbox), 0)
 
+    @modify_settings(MIDDLEWARE={"append": "aldryn_forms.middleware.handle_post.HandleHttpPost"})
+    @override_settings(ALDRYN_FORMS_RATE_LIMIT={"burst": "1/m", "status_429": True})
+    def test_middleware_rate_limited_json(self):
+        cache.clear()
+        page, form_plugin, headers = self._prepare_form()
+        data = {"form_plugin_id": form_plugin.pk, "email_1": "test@test.foo"}
+        response = self.client.post(page.get_absolute_url("en"), data, **headers)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(page.get_absolute_url("en"), data, **headers)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json(), {
+            'status': 'ERROR', 'message': 'Too many submissions. Please try again later.'})
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+    @modify_settings(MIDDLEWARE={"append": "aldryn_forms.middleware.handle_post.HandleHttpPost"})
+    @override_settings(ALDRYN_FORMS_RATE_LIMIT={"burst": "1/m"})
+    def test_middleware_rate_limited_form_error(self):
+        cache.clear()
+        page, form_plugin, headers = self._prepare_form()
+        data = {"form_plugin_id": form_plugin.pk, "email_1": "test@test.foo"}
+        response = self.client.post(page.get_absolute_url("en"), data, **headers)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(page.get_absolute_url("en"), data, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'status': 'ERROR', 'form': {'__all__': ['Too many submissions. Please try again later.']}})
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
     @modify_settings(MIDDLEWARE={"append": "aldryn_forms.middleware.handle_post.HandleHttpPost"})
     def test_middleware_success_json(self):
         page, form_plugin, headers = self._prepare_form()
@@ -505,6 +543,13 @@ class SubmitFormViewTest(CMSTestCase):
         )
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {'status': 'SUCCESS', 'post_ident': "1234567890", 'message': 'OK'})
+        submission = FormSubmission.objects.get()
+        self.assertEqual(submission.data, '[{"label": "Test", "name": "test", "value": 1}]')
+        self.assertEqual(submission.form_data(), [
+            {"name": "test", "label": "Test", "field_occurrence": 1, "value": 1},
+            {"name": "email_1", "label": "Submit", "field_occurrence": 1, "value": "test2@test.foo"},
+        ])
+        submission.merge_steps()
         self.assertQuerySetEqual(FormSubmission.objects.values_list('data'), [
             ('[{"label": "Test", "name": "test", "value": 1}, '
              '{"name": "email_1", "label": "Submit", "field_occurrence": 1, "value": "test2@test.foo"}]',)